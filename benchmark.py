@@ -0,0 +1,584 @@
+"""
+Benchmark harness for the build pipeline (generate_list.py, check_videos.py).
+
+Generates a synthetic sessions/ tree of configurable size and shape, then runs
+the real scripts against it with every network call going to a local stub
+server (Open-Meteo archive, Google Maps short-link redirects, YouTube oEmbed
+and the YouTube Data API videos endpoint).
+Each scenario runs in a fresh subprocess, so module-level caches and peak RSS
+are per run. Per-stage wall times come from wrapping the scripts' own stage
+functions; time spent in a nested stage is charged to that stage only.
+
+Scenarios, run in this order on one copy of the archive per repeat:
+  generate           full build, no caches yet (all lookups hit the stubs)
+  generate-warm      full build again with warm weather/geocoding caches
+  incremental-cold   --incremental build without a build manifest
+  incremental-warm   --incremental build with nothing changed
+  laps-store         read every session's laps from the packed lap store
+  laps-json          the same laps parsed from the session files, for reference
+  videos-cold        check_videos.py with an empty status cache
+  videos-warm        check_videos.py again, every ID fresh in the cache
+  videos-api         check_videos.py --backend data-api with an empty status cache
+
+Results (per-run numbers and per-scenario medians) are written as JSON so runs
+on different commits can be diffed; --compare prints the per-stage change
+against an earlier results file.
+
+Run standalone:  python benchmark.py [--sessions N] [--laps N] [--repeat N]
+                                     [--out FILE] [--compare FILE]
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import resource  # Unix only: peak RSS of each scenario run
+except ImportError:
+    resource = None
+
+REPO_DIR = Path(__file__).resolve().parent
+RESULTS_FILE = "bench-results.json"
+RESULTS_SCHEMA = 1
+SCENARIOS = ["generate", "generate-warm", "incremental-cold", "incremental-warm",
+             "laps-store", "laps-json", "videos-cold", "videos-warm", "videos-api"]
+
+FIRST_NAMES = ["Luka", "Matej", "Ana", "Nika", "Jan", "Eva", "Tim", "Sara", "Žiga", "Maja",
+               "Marko", "Lana", "Rok", "Ema", "Nejc", "Zala", "Gal", "Pia", "Jure", "Tjaša"]
+LAST_NAMES = ["Novak", "Horvat", "Kovačič", "Krajnc", "Zupančič", "Potočnik", "Kos",
+              "Vidmar", "Golob", "Turk", "Božič", "Kralj", "Zupan", "Bizjak", "Hribar",
+              "Kolar", "Mlakar", "Vozel", "Erjavec", "Jerman"]
+ARCHIVE_START = date(2024, 1, 1)
+ARCHIVE_DAYS = 730
+VIDEO_ID_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+
+
+# --- Synthetic Archive ---
+
+def name_variant(name: str, rng: random.Random) -> str:
+    """A spelling slip of `name` that build_canonical_map() folds back to it
+    (case, spacing and punctuation only — the normalized key is unchanged)."""
+    return rng.choice([
+        name.lower(),
+        name.upper(),
+        name + ".",
+        name.replace(" ", "  "),
+        " " + name,
+    ])
+
+
+def format_lap(seconds: float) -> str:
+    minutes, rest = divmod(round(seconds * 1000), 60_000)
+    return f"{minutes:02d}:{rest // 1000:02d}.{rest % 1000:03d}"
+
+
+def generate_archive(root: Path, sessions: int, laps: int, drivers: int, tracks: int,
+                     variant_rate: float, outdoor_ratio: float, video_ratio: float,
+                     seed: int, stub_url: str) -> Dict[str, Any]:
+    """
+    Write a synthetic sessions/ tree under `root`. Outdoor sessions use the
+    generator's STATIC_TRACKS outdoor circuits (so they get weather lookups);
+    the rest go to indoor tracks that only exist here and must be geocoded
+    through their maps link. Returns a short description of what was written.
+    """
+    import generate_list
+
+    rng = random.Random(seed)
+    sessions_dir = root / "sessions"
+    sessions_dir.mkdir(parents=True, exist_ok=True)
+
+    combos = [f"{f} {l}" for l in LAST_NAMES for f in FIRST_NAMES]
+    driver_names = [combos[i % len(combos)] + (f" {i // len(combos) + 1}" if i >= len(combos) else "")
+                    for i in range(max(1, drivers))]
+    skill = {d: rng.uniform(-1.0, 3.0) for d in driver_names}
+
+    outdoor = [name for name, info in generate_list.STATIC_TRACKS.items() if info.get("outdoor")]
+    n_outdoor = min(len(outdoor), max(1, round(tracks * outdoor_ratio))) if outdoor_ratio > 0 else 0
+    n_indoor = max(1 if outdoor_ratio < 1 or not n_outdoor else 0, tracks - n_outdoor)
+    track_pool: List[Dict[str, Any]] = []
+    for i, name in enumerate(outdoor[:n_outdoor]):
+        track_pool.append({"name": name, "configuration": "Full", "maps_link": f"{stub_url}/maps/o{i}",
+                           "outdoor": True, "pace": rng.uniform(48, 70)})
+    for i in range(n_indoor):
+        track_pool.append({"name": f"Bench Indoor {i + 1}", "configuration": rng.choice(["Short", "Long", "2026"]),
+                           "maps_link": f"{stub_url}/maps/i{i}", "outdoor": False, "pace": rng.uniform(30, 50)})
+    outdoor_tracks = [t for t in track_pool if t["outdoor"]]
+    indoor_tracks = [t for t in track_pool if not t["outdoor"]] or outdoor_tracks
+
+    video_ids = ["".join(rng.choice(VIDEO_ID_CHARS) for _ in range(11))
+                 for _ in range(max(1, int(sessions * 0.8)))]
+
+    for _ in range(sessions):
+        session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        track = rng.choice(outdoor_tracks if outdoor_tracks and rng.random() < outdoor_ratio else indoor_tracks)
+        driver = rng.choice(driver_names)
+        pace = track["pace"] + skill[driver]
+        lap_times = []
+        for n in range(laps):
+            t = pace + rng.gauss(0, 0.4) + (3.0 if n == 0 else 0.0)
+            if rng.random() < 0.05:
+                t += rng.uniform(2, 6)  # traffic
+            lap_times.append({"lap": n + 1, "time": format_lap(t)})
+        track_name = track["name"]
+        if rng.random() < variant_rate:
+            driver = name_variant(driver, rng)
+        if rng.random() < variant_rate:
+            track_name = name_variant(track_name, rng)
+        session = {
+            "session_id": session_id,
+            "driver": driver,
+            "fastest_lap": min((lap["time"] for lap in lap_times), default=""),
+            "track": {"name": track_name, "configuration": track["configuration"], "maps_link": track["maps_link"]},
+            "kart": str(rng.randint(1, 30)),
+            "video_start_time": 0,
+            "video_url": f"https://youtu.be/{rng.choice(video_ids)}" if rng.random() < video_ratio else "",
+            "session_date": (ARCHIVE_START + timedelta(days=rng.randrange(ARCHIVE_DAYS))).isoformat(),
+            "laps": lap_times,
+        }
+        (sessions_dir / f"{session_id}.json").write_text(json.dumps(session, indent=2, ensure_ascii=False),
+                                                        encoding="utf-8")
+
+    return {"tracks": len(track_pool), "outdoor_tracks": len(outdoor_tracks), "drivers": len(driver_names)}
+
+
+# --- Stub Server ---
+
+def _unit(key: str) -> float:
+    """Deterministic pseudo-random number in [0, 1) for a string."""
+    return zlib.crc32(key.encode("utf-8")) / 2**32
+
+
+class StubServer:
+    """
+    Local stand-in for every external endpoint the scripts call. Counts
+    requests per endpoint; `latency` seconds are added to every response to
+    model a remote service.
+    """
+
+    def __init__(self, latency: float = 0.0, unavailable_ratio: float = 0.1) -> None:
+        self.latency = latency
+        self.unavailable_ratio = unavailable_ratio
+        self.counts: Counter = Counter()
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, as check_videos.py expects
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def do_GET(self) -> None:
+                stub.handle(self, body=True)
+
+            def do_HEAD(self) -> None:
+                stub.handle(self, body=False)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def take_counts(self) -> Dict[str, int]:
+        with self.lock:
+            counts = dict(self.counts)
+            self.counts.clear()
+        return counts
+
+    def handle(self, req: BaseHTTPRequestHandler, body: bool) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(req.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        status, headers, payload, endpoint = 404, {}, b"", "other"
+
+        if parts.path == "/v1/archive":
+            endpoint = "weather"
+            status, payload = 200, self.weather(query)
+            headers["Content-Type"] = "application/json"
+        elif parts.path.startswith("/maps/place/"):
+            endpoint = "maps_place"
+            status = 200
+        elif parts.path.startswith("/maps/"):
+            endpoint = "maps"
+            key = parts.path.rsplit("/", 1)[-1]
+            lat, lng = 45 + _unit(key + "lat") * 2, 13 + _unit(key + "lng") * 3
+            status = 302
+            headers["Location"] = f"{self.url}/maps/place/{key}/@{lat:.6f},{lng:.6f},15z/data=!3d{lat:.7f}!4d{lng:.7f}"
+        elif parts.path == "/oembed":
+            endpoint = "oembed"
+            if _unit(query.get("url", "")) >= self.unavailable_ratio:
+                status, payload = 200, b'{"type": "video", "provider_name": "YouTube"}'
+                headers["Content-Type"] = "application/json"
+        elif parts.path == "/youtube/v3/videos":
+            endpoint = "videos"
+            status, payload = self.videos(query)
+            headers["Content-Type"] = "application/json"
+
+        with self.lock:
+            self.counts[endpoint] += 1
+        req.send_response(status)
+        for name, value in headers.items():
+            req.send_header(name, value)
+        req.send_header("Content-Length", str(len(payload)))
+        req.end_headers()
+        if body and payload:
+            req.wfile.write(payload)
+
+    def videos(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        """videos.list with part=status. Agrees with the oEmbed stub: of the
+        unavailable videos, half are missing (deleted or private) and half
+        are returned with embedding disabled."""
+        ids = [i for i in query.get("id", "").split(",") if i]
+        if not query.get("key"):
+            return 403, b'{"error": {"code": 403, "errors": [{"reason": "forbidden"}]}}'
+        if len(ids) > 50 or query.get("part") != "status":
+            return 400, b'{"error": {"code": 400, "errors": [{"reason": "badRequest"}]}}'
+        items = []
+        for video_id in ids:
+            unit = _unit(f"https://www.youtube.com/watch?v={video_id}")
+            if unit < self.unavailable_ratio / 2:
+                continue
+            items.append({"id": video_id, "status": {"uploadStatus": "processed", "privacyStatus": "public",
+                                                     "embeddable": unit >= self.unavailable_ratio}})
+        return 200, json.dumps({"items": items}).encode("utf-8")
+
+    @staticmethod
+    def weather(query: Dict[str, str]) -> bytes:
+        start = date.fromisoformat(query["start_date"])
+        end = date.fromisoformat(query["end_date"])
+        days = [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+        seed = query.get("latitude", "") + query.get("longitude", "")
+        daily = {
+            "time": days,
+            "temperature_2m_max": [round(12 + 15 * _unit(seed + d), 1) for d in days],
+            "temperature_2m_min": [round(2 + 10 * _unit(d + seed), 1) for d in days],
+            "wind_speed_10m_max": [round(30 * _unit("w" + seed + d), 1) for d in days],
+            "precipitation_sum": [round(max(0.0, 20 * _unit("p" + d + seed) - 12), 1) for d in days],
+            "weather_code": [int(_unit("c" + d + seed) * 4) for d in days],
+        }
+        return json.dumps({"daily": daily}).encode("utf-8")
+
+
+# --- Stage Timing (runs inside each scenario subprocess) ---
+
+class StageTimer:
+    """Exclusive wall time per stage, for functions called on the main thread."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        self.stack: List[List[Any]] = []  # [stage, resumed_at]
+
+    def enter(self, stage: str) -> None:
+        now = time.perf_counter()
+        if self.stack:
+            self.totals[self.stack[-1][0]] += now - self.stack[-1][1]
+        self.stack.append([stage, now])
+        self.calls[stage] += 1
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        stage, resumed_at = self.stack.pop()
+        self.totals[stage] += now - resumed_at
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            self.enter(stage)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.exit()
+        return timed
+
+    def patch(self, owner: Any, stages: Dict[str, List[str]]) -> None:
+        for stage, names in stages.items():
+            for name in names:
+                setattr(owner, name, self.wrap(stage, getattr(owner, name)))
+
+
+def run_generate(timer: StageTimer, incremental: bool, jobs: int) -> Dict[str, Any]:
+    import generate_list
+    import write_batch
+
+    timer.patch(write_batch.WriteBatch, {"serialize": ["stage_json", "stage_text", "stage_bytes", "flush"]})
+    stages = {
+        "scan": ["list_session_files"],
+        "process": ["build_session_summaries"],
+        "canonicalize": ["build_canonical_map", "apply_canonical_names"],
+        "weather": ["load_weather_cache", "prefetch_weather", "save_weather_cache"],
+        "geocode": ["load_geocache", "geocode_batch", "save_geocache"],
+        "serialize": ["build_sharded_index", "build_comparison_bundles", "build_lap_store",
+                      "build_compact_outputs", "save_build_manifest"],
+        "aggregate": ["generate_sessions_list"],
+    }
+    if jobs <= 1:
+        # Chunks run in worker processes with --jobs, where they can't be
+        # wrapped; there the time stays in build_session_summaries ("process").
+        stages["process"].append("_scan_session_chunk")
+    timer.patch(generate_list, stages)
+    generate_list.generate_sessions_list(incremental=incremental, jobs=jobs)
+    return {"sessions": len(generate_list.list_session_files())}
+
+
+def run_laps(timer: StageTimer, from_store: bool) -> Dict[str, Any]:
+    """Read every session's lap times, from the lap store or from the session
+    files. "open" is opening the store (or listing the files), "read" is
+    getting each session's laps as numbers and summing them."""
+    import generate_list
+    import lap_store
+
+    total, laps = 0.0, 0
+    if from_store:
+        timer.enter("open")
+        store = lap_store.LapStore()
+        timer.exit()
+        timer.enter("read")
+        for session_id in store.ids:
+            values = store.laps(session_id)
+            total += float(sum(values)) if lap_store.np is None else float(lap_store.np.nansum(values))
+            laps += len(values)
+        timer.exit()
+    else:
+        timer.enter("open")
+        files = generate_list.list_session_files()
+        timer.exit()
+        timer.enter("read")
+        for filepath in files:
+            session_data = generate_list.load_session_file(filepath) or {}
+            times = [generate_list.parse_time_to_seconds(lap.get("time")) for lap in session_data.get("laps", [])
+                     if isinstance(lap, dict)]
+            total += sum(t for t in times if t is not None and t == t)
+            laps += len(times)
+        timer.exit()
+    return {"laps": laps, "lap_seconds": round(total, 3)}
+
+
+def run_videos(timer: StageTimer, rate: float, workers: int, backend: str) -> Dict[str, Any]:
+    import check_videos
+    import write_batch
+
+    class TimedPool(ThreadPoolExecutor):
+        def __enter__(self) -> "TimedPool":
+            timer.enter("lookup")
+            return super().__enter__()
+
+        def __exit__(self, *exc: Any) -> Any:
+            try:
+                return super().__exit__(*exc)
+            finally:
+                timer.exit()
+
+    timer.patch(write_batch.WriteBatch, {"serialize": ["stage_json", "stage_text", "stage_bytes", "flush"]})
+    timer.patch(check_videos, {
+        "scan": ["extract_youtube_id"],
+        "cache": ["load_status_cache", "save_status_cache"],
+        "process": ["check_all_sessions"],
+    })
+    check_videos.ThreadPoolExecutor = TimedPool
+    check_videos.RATE_LIMITER = check_videos.TokenBucket(rate, max(1, int(rate)))
+    if backend == "data-api":
+        check_videos.DATA_API_KEY = "stub-key"
+        check_videos.CACHE_FILE.unlink(missing_ok=True)
+    check_videos.check_all_sessions(workers=workers, backend=backend)
+    return {"http_calls": check_videos.STATS["http_calls"]}
+
+
+def run_scenario(scenario: str, result_file: Path, jobs: int, video_rate: float, video_workers: int) -> None:
+    """Entry point of a scenario subprocess (cwd = the archive root)."""
+    sys.path.insert(0, str(REPO_DIR))
+    timer = StageTimer()
+    started = time.perf_counter()
+    if scenario.startswith("videos"):
+        info = run_videos(timer, video_rate, video_workers, "data-api" if scenario == "videos-api" else "oembed")
+    elif scenario.startswith("laps"):
+        info = run_laps(timer, from_store=scenario == "laps-store")
+    else:
+        info = run_generate(timer, incremental=scenario.startswith("incremental"), jobs=jobs)
+    total = time.perf_counter() - started
+    result = {
+        "total_s": round(total, 4),
+        "stages": {k: round(v, 4) for k, v in sorted(timer.totals.items())},
+        "calls": dict(sorted(timer.calls.items())),
+        **info,
+    }
+    if resource is not None:
+        result["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result_file.write_text(json.dumps(result), encoding="utf-8")
+
+
+# --- Driver ---
+
+def median_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stages = sorted({s for r in runs for s in r["stages"]})
+    summary = {
+        "total_s": round(statistics.median(r["total_s"] for r in runs), 4),
+        "stages": {s: round(statistics.median(r["stages"].get(s, 0.0) for r in runs), 4) for s in stages},
+        "http": {k: int(statistics.median(r["http"].get(k, 0) for r in runs))
+                 for k in sorted({k for r in runs for k in r["http"]})},
+    }
+    if all("max_rss_kib" in r for r in runs):
+        summary["max_rss_kib"] = int(statistics.median(r["max_rss_kib"] for r in runs))
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results: Dict[str, Any], baseline_file: Path) -> None:
+    baseline = json.loads(baseline_file.read_text(encoding="utf-8"))
+    print(f"\nCompared with {baseline_file} (commit {(baseline.get('commit') or '?')[:10]}):")
+    for scenario, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        rows = [("total", before["median"]["total_s"], current["median"]["total_s"])]
+        rows += [(stage, before["median"]["stages"].get(stage, 0.0), t)
+                 for stage, t in current["median"]["stages"].items()]
+        print(f"  {scenario}")
+        for label, old, new in rows:
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"    {label:<14} {old:9.3f}s -> {new:9.3f}s  {change}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generate_list.py and check_videos.py on a synthetic archive.")
+    parser.add_argument("--sessions", type=int, default=2000, help="session files to generate (default %(default)s)")
+    parser.add_argument("--laps", type=int, default=20, help="laps per session (default %(default)s)")
+    parser.add_argument("--drivers", type=int, default=200, help="distinct drivers (default %(default)s)")
+    parser.add_argument("--tracks", type=int, default=12, help="distinct tracks (default %(default)s)")
+    parser.add_argument("--variant-rate", type=float, default=0.02,
+                        help="share of driver/track names written with a spelling slip (default %(default)s)")
+    parser.add_argument("--outdoor-ratio", type=float, default=0.4,
+                        help="share of sessions at outdoor tracks, which need weather (default %(default)s)")
+    parser.add_argument("--video-ratio", type=float, default=0.6,
+                        help="share of sessions with a YouTube link (default %(default)s)")
+    parser.add_argument("--unavailable-ratio", type=float, default=0.1,
+                        help="share of videos the oEmbed stub reports as unavailable (default %(default)s)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every stub response (default 0)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; medians are reported (default %(default)s)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--jobs", type=int, default=1, help="generate_list.py --jobs (default 1)")
+    parser.add_argument("--video-rate", type=float, default=1000.0,
+                        help="check_videos.py request rate against the stub (default %(default)g/s)")
+    parser.add_argument("--video-workers", type=int, default=4)
+    parser.add_argument("--keep", metavar="DIR", help="build the archive in DIR and keep it")
+    parser.add_argument("--out", default=RESULTS_FILE, help="results file (default %(default)s)")
+    parser.add_argument("--compare", metavar="FILE", help="print per-stage changes against an earlier results file")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_scenario(args.run, Path(args.result), args.jobs, args.video_rate, args.video_workers)
+        return
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    scenarios = [s for s in SCENARIOS if s in scenarios]
+
+    stub = StubServer(latency=args.latency_ms / 1000, unavailable_ratio=args.unavailable_ratio)
+    stub.start()
+    env = dict(os.environ,
+               OPEN_METEO_ARCHIVE_URL=f"{stub.url}/v1/archive",
+               OEMBED_URL=f"{stub.url}/oembed",
+               YOUTUBE_API_URL=f"{stub.url}/youtube/v3/videos")
+
+    base = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="karting-bench-"))
+    template = base / "template"
+    params = {k: getattr(args, k) for k in ("sessions", "laps", "drivers", "tracks", "variant_rate", "outdoor_ratio",
+                                            "video_ratio", "unavailable_ratio", "latency_ms", "seed", "repeat", "jobs")}
+    try:
+        print(f"Generating {args.sessions} synthetic session(s) × {args.laps} lap(s) in {template}…")
+        started = time.perf_counter()
+        shutil.rmtree(template, ignore_errors=True)
+        archive = generate_archive(template, args.sessions, args.laps, args.drivers, args.tracks,
+                                   args.variant_rate, args.outdoor_ratio, args.video_ratio, args.seed, stub.url)
+        print(f"  {archive['tracks']} track(s) ({archive['outdoor_tracks']} outdoor), "
+              f"{archive['drivers']} driver(s), {time.perf_counter() - started:.1f}s")
+
+        runs: Dict[str, List[Dict[str, Any]]] = {s: [] for s in scenarios}
+        for n in range(args.repeat):
+            work = base / "run"
+            shutil.rmtree(work, ignore_errors=True)
+            shutil.copytree(template, work)
+            for scenario in scenarios:
+                result_file = base / "result.json"
+                stub.take_counts()
+                cmd = [sys.executable, str(Path(__file__).resolve()), "--run", scenario, "--result", str(result_file),
+                       "--jobs", str(args.jobs), "--video-rate", str(args.video_rate),
+                       "--video-workers", str(args.video_workers)]
+                proc = subprocess.run(cmd, cwd=work, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+                if proc.returncode:
+                    raise SystemExit(f"Scenario {scenario} failed:\n{proc.stderr}")
+                result = json.loads(result_file.read_text(encoding="utf-8"))
+                result["http"] = stub.take_counts()
+                runs[scenario].append(result)
+                print(f"  [{n + 1}/{args.repeat}] {scenario:<17} {result['total_s']:8.3f}s  "
+                      + " ".join(f"{k}={v:.3f}" for k, v in result["stages"].items()))
+    finally:
+        stub.stop()
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+    results = {
+        "schema": RESULTS_SCHEMA,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "archive": archive,
+        "scenarios": {s: {"median": median_of(r), "runs": r} for s, r in runs.items()},
+    }
+    Path(args.out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"\nSUCCESS: Wrote {args.out}")
+    for scenario, data in results["scenarios"].items():
+        m = data["median"]
+        http = ", ".join(f"{k}={v}" for k, v in m["http"].items()) or "none"
+        print(f"  {scenario:<17} median {m['total_s']:.3f}s (HTTP: {http})")
+    if args.compare:
+        compare(results, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Build graph for the generated site artifacts.
+
+Each step declares the files it reads (session files, tracks-manual.json,
+championship-data.json, other steps' outputs, its own script) and the steps
+that must finish first. A step is skipped when the content hash of its
+inputs matches the previous run and its outputs still exist. Steps whose
+dependencies are done run in parallel, up to --jobs at a time.
+
+Steps:
+  telemetry     telemetry/ logs -> sessions/telemetry/ + session file links
+                (only when telemetry/ exists)
+  sessions      sessions/*.json, tracks-manual.json, name-aliases.json
+                -> sessions-list.json, tracks-list.json, leaderboards.json,
+                   index/, compare/, laps.bin + laps-index.json,
+                   tracks-geocache.json, weather-cache.json
+  sitemap       sessions-list.json -> sitemap.xml
+  championship  championship-data.json, sessions-list.json, name-aliases.json
+                -> championship-standings.json
+
+Input hashes are cached by (size, mtime) in .build-cache/build-graph.json, so
+an unchanged archive is checked without reading the session files again.
+
+The sessions step also goes stale when the earliest pending retry_after of
+tracks-geocache.json or weather-cache.json (remembered geocoding and weather
+failures) passes, so those lookups are retried even if no session changed.
+
+Run standalone:  python build.py [STEP ...] [--jobs N] [--force] [--dry-run]
+                                 [--metrics-out FILE] [--profile [FILE]]
+Naming a step also builds the steps it depends on.
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from championship import CHAMPIONSHIP_DATA_FILE, STANDINGS_FILE
+from generate_list import (BUILD_CACHE_DIR, COMPARE_DIR, GEOCACHE_FILE, LAP_INDEX_FILE, LAP_STORE_FILE,
+                           LEADERBOARDS_FILE, MANUAL_TRACKS_FILE, NAME_ALIASES_FILE, OUTPUT_FILE,
+                           SHARD_DIR, TRACKS_OUTPUT_FILE, WEATHER_CACHE_FILE, list_session_files)
+from ingest_telemetry import ARTIFACT_DIR, TELEMETRY_DIR, LOG_SUFFIXES
+from metrics import METRICS, run_profiled
+from write_batch import WriteBatch
+
+GRAPH_STATE_FILE = BUILD_CACHE_DIR / "build-graph.json"
+GRAPH_STATE_VERSION = 1
+
+SITE_URL = "https://helmetcamheroes.com/"
+SITEMAP_FILE = Path("sitemap.xml")
+# (page, changefreq, priority); their lastmod is the newest session's date.
+SITEMAP_PAGES = [
+    ("", "weekly", "1.0"),
+    ("sessions.html", "daily", "0.9"),
+    ("map.html", "monthly", "0.7"),
+    ("championship.html", "weekly", "0.7"),
+    ("progress.html", "weekly", "0.6"),
+]
+SITEMAP_SESSION_FREQ = "never"
+SITEMAP_SESSION_PRIORITY = "0.5"
+
+
+class Step:
+    """One node of the build graph."""
+
+    def __init__(self, name: str, inputs: Callable[[], List[Path]], outputs: Sequence[Path],
+                 action: Callable[[], str], deps: Sequence[str] = (),
+                 expires: Optional[Callable[[], Optional[str]]] = None) -> None:
+        self.name = name
+        self.inputs = inputs      # called when the step is due, after its deps have run
+        self.outputs = list(outputs)
+        self.action = action      # builds the outputs, returns the log to print
+        self.deps = list(deps)
+        self.expires = expires    # called once the step is done: when it goes stale regardless of its inputs
+
+
+def _script(name: str, *args: str) -> Callable[[], str]:
+    """Action running one of the generator scripts in its own process, so
+    steps that run side by side don't share module state."""
+    def run() -> str:
+        proc = subprocess.run([sys.executable, name, *args], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{name} exited with {proc.returncode}\n{proc.stdout}{proc.stderr}")
+        return proc.stdout
+    return run
+
+
+def _files(*paths: Path) -> List[Path]:
+    return [p for p in paths if p.is_file()]
+
+
+def pending_retry_deadline(*caches: Path) -> Optional[str]:
+    """The earliest retry_after still in the future among the remembered
+    failures of the given caches ({key: {..., "retry_after": iso}}), or None."""
+    now = datetime.now(timezone.utc)
+    deadlines = []
+    for path in caches:
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            continue
+        for entry in entries.values() if isinstance(entries, dict) else ():
+            try:
+                deadline = datetime.fromisoformat(entry["retry_after"])
+                if deadline > now:
+                    deadlines.append(deadline)
+            except (TypeError, KeyError, ValueError):
+                continue
+    return min(deadlines).isoformat(timespec="seconds") if deadlines else None
+
+
+def _expired(deadline: object) -> bool:
+    try:
+        return datetime.fromisoformat(str(deadline)) <= datetime.now(timezone.utc)
+    except (TypeError, ValueError):
+        return False
+
+
+def telemetry_logs() -> List[Path]:
+    return sorted(p for p in TELEMETRY_DIR.rglob("*") if p.suffix.lower() in LOG_SUFFIXES)
+
+
+def build_sitemap() -> str:
+    """
+    Write sitemap.xml from the session index: the top-level pages, then one
+    session.html?id= URL per session, newest first. A session's lastmod is
+    its session date.
+    """
+    sessions = json.loads(OUTPUT_FILE.read_text(encoding="utf-8")).get("sessions", [])
+    sessions = sorted((s for s in sessions if s.get("id")),
+                      key=lambda s: (s.get("session_date") or "", s["id"]), reverse=True)
+    newest = max((s.get("session_date") or "" for s in sessions), default="")
+
+    def url(loc: str, lastmod: str, changefreq: str, priority: str) -> List[str]:
+        lines = ["  <url>", f"    <loc>{escape(SITE_URL + loc)}</loc>"]
+        if lastmod:
+            lines.append(f"    <lastmod>{escape(lastmod)}</lastmod>")
+        lines += [f"    <changefreq>{changefreq}</changefreq>",
+                  f"    <priority>{priority}</priority>", "  </url>"]
+        return lines
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for page, changefreq, priority in SITEMAP_PAGES:
+        lines += url(page, newest, changefreq, priority)
+    for s in sessions:
+        lines += url(f"session.html?id={quote(str(s['id']), safe='')}", s.get("session_date") or "",
+                     SITEMAP_SESSION_FREQ, SITEMAP_SESSION_PRIORITY)
+    lines.append("</urlset>")
+
+    writes = WriteBatch()
+    writes.stage_text(SITEMAP_FILE, "\n".join(lines) + "\n")
+    written, _ = writes.flush()
+    return (f"SUCCESS: {'Wrote' if written else 'Unchanged'} {SITEMAP_FILE} "
+            f"({len(SITEMAP_PAGES)} pages, {len(sessions)} sessions).\n")
+
+
+def build_graph(jobs: int = 1) -> Dict[str, Step]:
+    steps = [
+        Step("sessions",
+             inputs=lambda: list_session_files() + _files(MANUAL_TRACKS_FILE, NAME_ALIASES_FILE,
+                                                          Path("generate_list.py"), Path("write_batch.py")),
+             outputs=[OUTPUT_FILE, TRACKS_OUTPUT_FILE, LEADERBOARDS_FILE, SHARD_DIR, COMPARE_DIR,
+                      LAP_STORE_FILE, LAP_INDEX_FILE, GEOCACHE_FILE, WEATHER_CACHE_FILE],
+             action=_script("generate_list.py", "--incremental", "--jobs", str(jobs)),
+             expires=lambda: pending_retry_deadline(GEOCACHE_FILE, WEATHER_CACHE_FILE)),
+        Step("sitemap",
+             inputs=lambda: _files(OUTPUT_FILE, Path("build.py")),
+             outputs=[SITEMAP_FILE],
+             action=build_sitemap,
+             deps=["sessions"]),
+        Step("championship",
+             inputs=lambda: _files(CHAMPIONSHIP_DATA_FILE, OUTPUT_FILE, NAME_ALIASES_FILE, Path("championship.py")),
+             outputs=[STANDINGS_FILE],
+             action=_script("championship.py"),
+             deps=["sessions"]),
+    ]
+    if TELEMETRY_DIR.is_dir():
+        # Adds "telemetry" links to session files, so it runs before "sessions".
+        steps.insert(0, Step("telemetry",
+                             inputs=lambda: telemetry_logs() + _files(Path("ingest_telemetry.py")),
+                             outputs=[ARTIFACT_DIR],
+                             action=_script("ingest_telemetry.py", "--jobs", str(jobs))))
+        steps[1].deps.append("telemetry")
+    return {step.name: step for step in steps}
+
+
+# --- Input hashing ---
+
+def load_graph_state() -> Dict[str, Dict[str, object]]:
+    """The previous run's step fingerprints, expiry deadlines and input
+    hashes, or empty ones if the state file is missing, unreadable or from
+    another version."""
+    try:
+        state = json.loads(GRAPH_STATE_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        state = {}
+    if not isinstance(state, dict) or state.get("version") != GRAPH_STATE_VERSION:
+        state = {}
+    return {"steps": state.get("steps", {}), "expires": state.get("expires", {}), "files": state.get("files", {})}
+
+
+def _file_sha1(path: Path, known: Dict[str, object], fresh: Dict[str, object]) -> str:
+    """sha1 of a file, reused from `known` while its size and mtime match."""
+    st = path.stat()
+    key = str(path)
+    cached = known.get(key)
+    if isinstance(cached, list) and cached[:2] == [st.st_size, st.st_mtime_ns]:
+        METRICS.cache("input_hash", hits=1)
+        fresh[key] = cached
+        return cached[2]
+    METRICS.cache("input_hash", misses=1)
+    digest = hashlib.sha1(path.read_bytes()).hexdigest()
+    fresh[key] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def step_fingerprint(step: Step, known: Dict[str, object], fresh: Dict[str, object]) -> str:
+    """Hash of the step's input paths and their contents."""
+    h = hashlib.sha1(step.name.encode("utf-8"))
+    for path in sorted(set(step.inputs())):
+        h.update(f"\0{path}\0{_file_sha1(path, known, fresh)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+# --- Scheduler ---
+
+def _with_deps(graph: Dict[str, Step], targets: List[str]) -> List[str]:
+    wanted: Set[str] = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo += graph[name].deps
+    return [name for name in graph if name in wanted]
+
+
+def run_build(targets: Optional[List[str]] = None, jobs: int = 1, force: bool = False,
+              dry_run: bool = False) -> bool:
+    """
+    Build `targets` (default: every step) and their dependencies. A step is
+    started once all of its deps have finished, is skipped if its
+    fingerprint and outputs are unchanged (and its expiry deadline, if any,
+    hasn't passed), and is never started after a dep failed. Returns True if
+    no step failed.
+    """
+    METRICS.stage("plan")
+    graph = build_graph(jobs)
+    unknown = [t for t in targets or [] if t not in graph]
+    if unknown:
+        raise SystemExit(f"Error: unknown step(s) {', '.join(unknown)}; choose from {', '.join(graph)}")
+    pending = _with_deps(graph, targets or list(graph))
+
+    state = load_graph_state()
+    known_files = state["files"]
+    fresh_files: Dict[str, object] = {}
+    fingerprints = dict(state["steps"])
+    deadlines = dict(state["expires"])
+    done: Set[str] = set()
+    failed: Set[str] = set()
+    built = 0
+    running: Dict[Future, tuple] = {}
+
+    METRICS.stage("build")
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for name in list(pending):
+                step = graph[name]
+                if any(d in failed for d in step.deps):
+                    print(f"[SKIP] {name}: a dependency failed")
+                    pending.remove(name)
+                    failed.add(name)
+                    continue
+                if not all(d in done for d in step.deps):
+                    continue
+                pending.remove(name)
+                fingerprint = step_fingerprint(step, known_files, fresh_files)
+                expired = _expired(deadlines.get(name))
+                up_to_date = (fingerprints.get(name) == fingerprint and not expired
+                              and all(p.exists() for p in step.outputs))
+                if up_to_date and not force:
+                    print(f"[OK] {name}: up to date")
+                    METRICS.count("steps_skipped")
+                    if step.expires is not None and name not in deadlines:
+                        deadlines[name] = step.expires()
+                    done.add(name)
+                    continue
+                if expired and fingerprints.get(name) == fingerprint:
+                    print(f"  [build] {name}: retry deadline {deadlines[name]} has passed")
+                if dry_run:
+                    print(f"  [build] {name}: would run")
+                    done.add(name)
+                    continue
+                print(f"  [build] {name}: running")
+                running[pool.submit(step.action)] = (name, fingerprint, time.perf_counter())
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, fingerprint, started = running.pop(future)
+                elapsed = time.perf_counter() - started
+                METRICS.add_time(f"step.{name}", elapsed)
+                try:
+                    log = future.result()
+                except Exception as e:
+                    print(f"[FAIL] {name} after {elapsed:.2f}s: {e}")
+                    METRICS.count("steps_failed")
+                    fingerprints.pop(name, None)
+                    failed.add(name)
+                    continue
+                for line in log.splitlines():
+                    print(f"    {line}")
+                print(f"[OK] {name}: built in {elapsed:.2f}s")
+                METRICS.count("steps_built")
+                built += 1
+                fingerprints[name] = fingerprint
+                if step.expires is not None:
+                    deadlines[name] = step.expires()
+                done.add(name)
+
+    METRICS.stage("write")
+    if not dry_run:
+        writes = WriteBatch()
+        writes.stage_json(GRAPH_STATE_FILE, {
+            "version": GRAPH_STATE_VERSION,
+            "steps": fingerprints,
+            "expires": deadlines,
+            "files": {k: v for k, v in {**known_files, **fresh_files}.items() if Path(k).exists()},
+        }, preserve_format=False, indent=None, separators=(",", ":"))
+        writes.flush()
+    METRICS.stage(None)
+    if failed:
+        print(f"ERROR: {len(failed)} step(s) failed or blocked: {', '.join(sorted(failed))}")
+        return False
+    print(f"SUCCESS: {built} step(s) built, {len(done) - built} up to date.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the generated site artifacts, skipping unchanged steps.")
+    parser.add_argument("targets", nargs="*", metavar="STEP",
+                        help="steps to build, with their dependencies (default: all)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="run up to N independent steps at once; also passed to the generators (default 1)")
+    parser.add_argument("--force", action="store_true", help="rebuild steps even if their inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="only print which steps would run")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="write a JSON run report (step timings, counters, input hash cache)")
+    parser.add_argument("--profile", nargs="?", const="build.prof", metavar="FILE",
+                        help="run under cProfile and dump the stats to FILE (default %(const)s)")
+    args = parser.parse_args()
+    if args.metrics_out:
+        METRICS.enable()
+
+    def run() -> bool:
+        return run_build(args.targets, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+
+    ok = run_profiled(run, Path(args.profile)) if args.profile else run()
+    if args.metrics_out:
+        METRICS.write_report(Path(args.metrics_out), "build.py", vars(args))
+    sys.exit(0 if ok else 1)
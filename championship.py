@@ -0,0 +1,282 @@
+"""
+Championship standings: turns championship-data.json into
+championship-standings.json, which championship.html renders as is.
+
+Each season lists its venues and drivers. A venue that names a track is
+filled in from the session index (sessions-list.json, with canonicalized
+driver and track names): each driver's best lap there within the venue's
+date window. The window is the venue's "date" (one day) or "from"/"to",
+and defaults to the season's "from"/"to" or else its calendar year. An
+optional "configuration" narrows the match to one layout:
+
+  {"label": "Plytinė", "color": "purple", "done": true,
+   "track": "Plytinės Kartodromas", "configuration": "Summer", "date": "2026-04-10"}
+
+Times typed into the season's "times" still count: they fill in drivers
+without a matching session and override the session lap where both exist
+(each override is logged, as it usually means a mis-entered session file).
+Venues without a track use the typed-in times only.
+
+Scoring matches the page: a driver's total is the sum of their best laps
+over the completed venues, a missing driver is charged the slowest time of
+that venue (DNS), and drivers who haven't completed every venue rank after
+those who have. Gaps, intervals and pace ratings are precomputed too.
+
+Every season records a hash of its inputs (its entry in the data file, the
+laps matched for it, this script). Seasons whose hash matches the previous
+output are copied over instead of recomputed.
+
+Run standalone:  python championship.py [--force] [--metrics-out FILE] [--profile [FILE]]
+Also called by:  build.py (the "championship" step)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from generate_list import (OUTPUT_FILE, _alias_keys, _norm_key, _session_track_name, format_seconds_to_time,
+                           load_name_aliases, parse_time_to_seconds)
+from metrics import METRICS, run_profiled
+from write_batch import WriteBatch
+
+CHAMPIONSHIP_DATA_FILE = Path("championship-data.json")
+STANDINGS_FILE = Path("championship-standings.json")
+STANDINGS_FORMAT = "standings-v1"
+PACE_SPAN = 94   # pace rating (%) points between the leader (100) and the slowest driver…
+PACE_FLOOR = 4   # …but never below this
+
+# (session_date, lap_ms, configuration key, session id)
+LapEntry = Tuple[str, int, str, str]
+
+
+class BestLapIndex:
+    """
+    Every session's fastest lap by (track, driver), in date order, so the
+    best lap in a date window is two bisects and a scan of that window.
+    Names are compared by their normalized key, with the reviewed driver
+    aliases applied, so "Kęstas Č" in the data file finds "Kęstas Č.".
+    """
+
+    def __init__(self, summaries: List[Dict[str, Any]], driver_aliases: Optional[Dict[str, str]] = None) -> None:
+        self.alias_keys = _alias_keys(driver_aliases) if driver_aliases else {}
+        self.laps: Dict[Tuple[str, str], List[LapEntry]] = defaultdict(list)
+        for s in summaries:
+            lap_s, date, track = s.get("fastest_lap_s"), s.get("session_date"), _session_track_name(s)
+            if lap_s is None or not date or not track:
+                continue
+            config = s["track"].get("configuration") if isinstance(s["track"], dict) else None
+            key = (_norm_key(track), self.driver_key(s.get("driver")))
+            self.laps[key].append((date, round(lap_s * 1000), _norm_key(config), s.get("id") or ""))
+        for entries in self.laps.values():
+            entries.sort()
+
+    def driver_key(self, name: Optional[str]) -> str:
+        key = _norm_key(name)
+        return self.alias_keys.get(key, key)
+
+    def best(self, track: str, driver: str, first: str, last: str,
+             configuration: Optional[str] = None) -> Optional[LapEntry]:
+        """The fastest session of `driver` at `track` dated first..last
+        (inclusive), earliest first on ties; None if there is none."""
+        entries = self.laps.get((_norm_key(track), self.driver_key(driver)))
+        if not entries:
+            return None
+        lo = bisect_left(entries, (first,))
+        hi = bisect_right(entries, (last, math.inf))
+        config = _norm_key(configuration) if configuration else None
+        window = [e for e in entries[lo:hi] if config is None or e[2] == config]
+        return min(window, key=lambda e: (e[1], e[0], e[3])) if window else None
+
+
+def load_session_index() -> List[Dict[str, Any]]:
+    try:
+        return json.loads(OUTPUT_FILE.read_text(encoding="utf-8")).get("sessions", [])
+    except FileNotFoundError:
+        print(f"[SKIP] {OUTPUT_FILE} not found: using typed-in times only")
+        return []
+
+
+def venue_window(season: Dict[str, Any], venue: Dict[str, Any]) -> Tuple[str, str]:
+    if venue.get("date"):
+        return venue["date"], venue["date"]
+    first = season.get("from") or f"{season.get('year')}-01-01"
+    last = season.get("to") or f"{season.get('year')}-12-31"
+    return venue.get("from") or first, venue.get("to") or last
+
+
+def _fmt(ms: int) -> str:
+    return format_seconds_to_time(ms / 1000) or str(ms)
+
+
+def venue_times(season: Dict[str, Any], venue: Dict[str, Any],
+                index: BestLapIndex) -> Dict[str, Dict[str, Any]]:
+    """{driver: {"ms", "source", "session"}} for one completed venue: the
+    typed-in times, plus the best matching session of every season driver."""
+    label = venue.get("label")
+    cells: Dict[str, Dict[str, Any]] = {}
+    for driver, time_str in ((season.get("times") or {}).get(label) or {}).items():
+        seconds = parse_time_to_seconds(time_str)
+        if seconds is None:
+            print(f"[SKIP] {season.get('year')} {label} / {driver}: unreadable time {time_str!r}")
+            continue
+        cells[driver] = {"ms": round(seconds * 1000), "source": "manual", "session": None}
+
+    if not venue.get("track"):
+        return cells
+    first, last = venue_window(season, venue)
+    for driver in season.get("drivers") or []:
+        entry = index.best(venue["track"], driver, first, last, venue.get("configuration"))
+        if entry is None:
+            continue
+        typed = cells.get(driver)
+        if typed is None:
+            cells[driver] = {"ms": entry[1], "source": "session", "session": entry[3]}
+        elif typed["ms"] != entry[1]:
+            print(f"  [override] {season.get('year')} {label} / {driver}: typed-in {_fmt(typed['ms'])}, "
+                  f"best session {_fmt(entry[1])} ({entry[3]})")
+            METRICS.count("overrides")
+        else:
+            typed["session"] = entry[3]
+    return cells
+
+
+def standings_rows(venues: List[Dict[str, Any]], drivers: List[str],
+                   times: List[Optional[Dict[str, Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """Ranked rows for a season; times[i] is None for venues not yet done."""
+    ranks = []
+    for cells in times:
+        order = sorted(cells.items(), key=lambda kv: kv[1]["ms"]) if cells is not None else []
+        ranks.append({driver: i + 1 for i, (driver, _) in enumerate(order)})
+
+    rows = []
+    for driver in drivers:
+        laps, partial, complete = [], 0, True
+        for cells, venue_ranks in zip(times, ranks):
+            if cells is None:
+                complete = False
+                laps.append({"pending": True})
+                continue
+            cell = cells.get(driver)
+            if cell is None:
+                penalty = max([c["ms"] for c in cells.values()] + [0])
+                partial += penalty
+                laps.append({"ms": penalty, "dns": True})
+                continue
+            partial += cell["ms"]
+            laps.append({"ms": cell["ms"], "rank": venue_ranks[driver], "source": cell["source"],
+                         "session": cell["session"]})
+        rows.append({"driver": driver, "laps": laps, "total": partial if complete else None,
+                     "partial_total": partial})
+    # Complete rows first; the sort is stable, so ties keep the data file's order.
+    rows.sort(key=lambda r: (r["total"] is None, r["partial_total"]))
+
+    if rows:
+        leader, slowest = rows[0]["partial_total"], rows[-1]["partial_total"]
+        pace_range = slowest - leader or 1
+        for i, row in enumerate(rows):
+            current = row["partial_total"]
+            row["gap"] = current - leader
+            row["interval"] = current - rows[i - 1]["partial_total"] if i else None
+            row["pace"] = max(PACE_FLOOR, math.floor(100 - (current - leader) / pace_range * PACE_SPAN + 0.5))
+    return rows
+
+
+def _script_fingerprint() -> str:
+    return hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+
+
+def load_previous_standings() -> Dict[Any, Dict[str, Any]]:
+    """Seasons of the previous STANDINGS_FILE by year, or {} if unusable."""
+    try:
+        data = json.loads(STANDINGS_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != STANDINGS_FORMAT:
+        return {}
+    return {s.get("year"): s for s in data.get("seasons", []) if isinstance(s, dict)}
+
+
+def build_standings(force: bool = False) -> bool:
+    """Write STANDINGS_FILE; returns False (after logging) if the data file
+    can't be read or the standings can't be written."""
+    METRICS.stage("scan")
+    try:
+        data = json.loads(CHAMPIONSHIP_DATA_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Error reading {CHAMPIONSHIP_DATA_FILE}: {e}")
+        return False
+    seasons = sorted((s for s in data.get("seasons", []) if isinstance(s, dict)), key=lambda s: s.get("year") or 0)
+
+    METRICS.stage("index")
+    index = BestLapIndex(load_session_index(), load_name_aliases()["drivers"])
+    previous = {} if force else load_previous_standings()
+    script = _script_fingerprint()
+
+    METRICS.stage("standings")
+    output, recomputed = [], 0
+    for season in seasons:
+        venues = season.get("venues") or []
+        drivers = season.get("drivers") or []
+        times = [venue_times(season, v, index) if v.get("done") else None for v in venues]
+        inputs = hashlib.sha1(json.dumps([STANDINGS_FORMAT, script, season, times], sort_keys=True,
+                                         ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        prev = previous.get(season.get("year"))
+        if prev is not None and prev.get("inputs") == inputs:
+            output.append(prev)
+            continue
+        recomputed += 1
+        output.append({
+            "year": season.get("year"),
+            "name": season.get("name"),
+            "status": season.get("status"),
+            "venues": venues,
+            "inputs": inputs,
+            "rows": standings_rows(venues, drivers, times),
+        })
+        from_sessions = sum(1 for cells in times if cells for c in cells.values() if c["source"] == "session")
+        typed = sum(1 for cells in times if cells for c in cells.values() if c["source"] == "manual")
+        print(f"[OK]   {season.get('year')} {season.get('name')}: {len(drivers)} driver(s), "
+              f"{len(venues)} venue(s); {from_sessions} lap(s) from sessions, {typed} typed in")
+
+    METRICS.stage("write")
+    writes = WriteBatch()
+    writes.stage_json(STANDINGS_FILE, {"format": STANDINGS_FORMAT, "seasons": output},
+                      preserve_format=False, indent=2)
+    try:
+        written, _ = writes.flush()
+    except OSError as e:
+        print(f"Error writing {STANDINGS_FILE}: {e}")
+        return False
+    METRICS.stage(None)
+    METRICS.count("seasons", len(output))
+    METRICS.count("seasons_recomputed", recomputed)
+    print(f"SUCCESS: {'Wrote' if written else 'Unchanged'} {STANDINGS_FILE}: {len(output)} season(s), "
+          f"{recomputed} recomputed, {len(output) - recomputed} unchanged.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Build {STANDINGS_FILE} from {CHAMPIONSHIP_DATA_FILE} "
+                                                 f"and the session index.")
+    parser.add_argument("--force", action="store_true", help="recompute every season, even unchanged ones")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="write a JSON run report (stage timings, counters)")
+    parser.add_argument("--profile", nargs="?", const="championship.prof", metavar="FILE",
+                        help="run under cProfile and dump the stats to FILE (default %(const)s)")
+    args = parser.parse_args()
+    if args.metrics_out:
+        METRICS.enable()
+
+    def run() -> bool:
+        return build_standings(force=args.force)
+
+    ok = run_profiled(run, Path(args.profile)) if args.profile else run()
+    if args.metrics_out:
+        METRICS.write_report(Path(args.metrics_out), "championship.py", vars(args))
+    sys.exit(0 if ok else 1)
@@ -1,25 +1,121 @@
 """
-Checks whether YouTube videos embedded in session files are publicly playable,
-using YouTube's oEmbed endpoint (no API key required).
+Checks whether YouTube videos embedded in session files are publicly playable.
+
+Two status backends:
+  oembed    YouTube's oEmbed endpoint, one request per video, no API key
+            required (the default).
+  data-api  the YouTube Data API `videos` endpoint with part=status, up to 50
+            IDs per request. A video counts as available if it is public or
+            unlisted, embeddable, and its upload hasn't failed or been
+            deleted/rejected; IDs missing from the response are unavailable.
+            Used automatically when YOUTUBE_API_KEY is set.
 
 Updates each session file with a `video_available` boolean.
 Skips files on network error so a transient failure doesn't mark videos as dead.
 
-Run standalone:  python check_videos.py
+Videos are checked by a small pool of worker threads sharing one token-bucket
+rate limiter, each thread reusing a keep-alive connection to the oEmbed host.
+Transient failures (network errors, HTTP 429/5xx) are retried with backoff.
+A failed Data API request (after retries, or a 4xx such as an exhausted
+quota) leaves every video ID of its batch unknown, like a network error.
+
+Run standalone:  python check_videos.py [--backend oembed|data-api] [--workers N]
+                                        [--rate R] [--ttl HOURS]
+                                        [--metrics-out FILE] [--profile [FILE]]
 Also called by:  .github/workflows/check-videos.yml  (daily cron)
+
+Results are cached per YouTube video ID in sessions/video-status-cache.json,
+so a video referenced by several session files is looked up once per run and
+not at all while its last check is younger than the cache TTL. Videos that
+recently turned unavailable are rechecked on a shorter interval.
+
+Set OEMBED_URL / YOUTUBE_API_URL to point the checker at a different endpoint
+(e.g. a local stub server such as http://127.0.0.1:8000/oembed).
 """
 
+import argparse
+import http.client
 import json
+import os
+import random
 import re
+import threading
 import time
-import urllib.error
-import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from urllib.parse import quote, urlsplit
 
-SESSIONS_DIR = Path("sessions")
-SKIP_FILES   = {"sessions-list.json", "tracks-list.json", "tracks-manual.json"}
-REQUEST_DELAY = 0.4   # seconds between requests — be polite to YouTube
+from generate_list import NON_SESSION_FILES, SESSIONS_DIR, VIDEO_STATUS_CACHE_FILE
+from metrics import METRICS, run_profiled
+from write_batch import WriteBatch
+
+CACHE_FILE   = VIDEO_STATUS_CACHE_FILE
+OEMBED_URL   = os.environ.get("OEMBED_URL", "https://www.youtube.com/oembed")
+DATA_API_URL = os.environ.get("YOUTUBE_API_URL", "https://www.googleapis.com/youtube/v3/videos")
+DATA_API_KEY = os.environ.get("YOUTUBE_API_KEY", "")
+DATA_API_BATCH = 50   # IDs per videos.list request — the API's maximum
+PLAYABLE_PRIVACY = {"public", "unlisted"}
+DEAD_UPLOADS     = {"deleted", "failed", "rejected"}
+REQUEST_RATE  = 2.5   # requests per second across all workers — be polite to YouTube
+RATE_BURST    = 3     # requests allowed back to back before the rate limit kicks in
+WORKERS       = 4     # concurrent checks
+MAX_ATTEMPTS  = 3     # tries per request before giving up on a transient error
+BACKOFF_BASE  = 1.0   # seconds; doubled after every failed attempt, plus jitter
 TIMEOUT       = 10    # seconds per request
+CACHE_TTL         = timedelta(hours=72)  # skip IDs checked more recently than this
+RECENT_CHANGE     = timedelta(days=7)    # a video that went unavailable within this window…
+UNAVAILABLE_TTL   = timedelta(hours=6)   # …is rechecked this often, in case it comes back
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a request may be sent."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+RATE_LIMITER = TokenBucket(REQUEST_RATE, RATE_BURST)
+STATS = Counter()   # "http_calls" — every request actually sent, retries included
+_stats_lock = threading.Lock()
+_local = threading.local()
+
+
+def _connection(url: str) -> http.client.HTTPConnection:
+    """This thread's keep-alive connection to the host of `url`."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    parts = urlsplit(url)
+    conn = conns.get((parts.scheme, parts.netloc))
+    if conn is None:
+        cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        conn = conns[(parts.scheme, parts.netloc)] = cls(parts.netloc, timeout=TIMEOUT)
+    return conn
+
+
+def _drop_connection(url: str) -> None:
+    parts = urlsplit(url)
+    conn = getattr(_local, "conns", {}).pop((parts.scheme, parts.netloc), None)
+    if conn is not None:
+        conn.close()
 
 
 def extract_youtube_id(url: str) -> str | None:
@@ -36,37 +132,153 @@ def extract_youtube_id(url: str) -> str | None:
     return None
 
 
+def _fetch(endpoint: str, url: str, path: str) -> tuple[int | None, bytes, str]:
+    """
+    GET `path` on the host of `url`, rate limited and retried with backoff.
+    Returns (status, body, "") for HTTP 200 or a 4xx other than 429, and
+    (None, b"", problem) once a network error, 429 or 5xx has persisted
+    through every attempt.
+    """
+    headers = {"User-Agent": "Mozilla/5.0", "Connection": "keep-alive"}
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        RATE_LIMITER.acquire()
+        with _stats_lock:
+            STATS["http_calls"] += 1
+        started = time.perf_counter()
+        try:
+            conn = _connection(url)
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()  # drain the body so the connection can be reused
+            status = resp.status
+            if resp.will_close:
+                _drop_connection(url)
+        except (OSError, http.client.HTTPException) as e:
+            METRICS.http(endpoint, time.perf_counter() - started, type(e).__name__)
+            _drop_connection(url)
+            problem = str(e) or type(e).__name__
+        else:
+            METRICS.http(endpoint, time.perf_counter() - started, status)
+            if status == 200 or (400 <= status < 500 and status != 429):
+                return status, body, ""
+            problem = f"HTTP {status}"
+
+        if attempt < MAX_ATTEMPTS:
+            time.sleep(BACKOFF_BASE * 2 ** (attempt - 1) + random.uniform(0, BACKOFF_BASE))
+    return None, b"", problem
+
+
 def check_oembed(video_id: str) -> bool | None:
     """
     Returns True  — video is public and embeddable
     Returns False — video is private, deleted, or embedding is blocked (HTTP 4xx)
-    Returns None  — network/timeout error; caller should skip updating the file
+    Returns None  — network/timeout error, HTTP 429 or 5xx that persisted
+                    through every retry; caller should skip updating the file
     """
-    url = (
-        "https://www.youtube.com/oembed"
-        f"?url=https://www.youtube.com/watch?v={video_id}&format=json"
-    )
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    watch_url = f"https://www.youtube.com/watch?v={video_id}"
+    path = f"{urlsplit(OEMBED_URL).path or '/'}?url={quote(watch_url, safe=':/')}&format=json"
+    status, _, problem = _fetch("oembed", OEMBED_URL, path)
+    if status is None:
+        print(f"  Network error for {video_id}: {problem} (after {MAX_ATTEMPTS} attempts)")
+        return None
+    # 401 = embedding disabled, 404 = not found / private — both unplayable
+    return status == 200
+
+
+def is_playable(status: dict) -> bool:
+    """Whether a Data API `status` part describes a video the site can embed."""
+    return (status.get("privacyStatus") in PLAYABLE_PRIVACY
+            and status.get("embeddable") is True
+            and status.get("uploadStatus") not in DEAD_UPLOADS)
+
+
+def check_data_api(video_ids: list[str]) -> dict[str, bool | None]:
+    """
+    Looks up to DATA_API_BATCH IDs with one Data API request. Returns
+    {video_id: True/False} — IDs the API doesn't return are deleted, private
+    or otherwise gone — or None for every ID if the request failed, including
+    4xx answers (bad key, exhausted quota), which say nothing about the videos.
+    """
+    path = (f"{urlsplit(DATA_API_URL).path or '/'}?part=status&id={','.join(video_ids)}"
+            f"&fields=items(id,status)&key={quote(DATA_API_KEY, safe='')}")
+    status, body, problem = _fetch("videos", DATA_API_URL, path)
+    if status == 200:
+        try:
+            items = json.loads(body).get("items", [])
+            found = {item["id"]: is_playable(item.get("status") or {}) for item in items}
+        except (ValueError, AttributeError, KeyError, TypeError) as e:
+            problem = f"unreadable response ({type(e).__name__})"
+        else:
+            return {vid: found.get(vid, False) for vid in video_ids}
+    elif status is not None:
+        try:
+            reason = json.loads(body)["error"]["errors"][0]["reason"]
+        except (ValueError, LookupError, TypeError):
+            reason = ""
+        problem = f"HTTP {status}" + (f" {reason}" if reason else "")
+    else:
+        problem += f" (after {MAX_ATTEMPTS} attempts)"
+    print(f"  Data API error for {len(video_ids)} video(s) from {video_ids[0]}: {problem}")
+    return {vid: None for vid in video_ids}
+
+
+def check_oembed_batch(video_ids: list[str]) -> dict[str, bool | None]:
+    return {vid: check_oembed(vid) for vid in video_ids}
+
+
+# backend name -> (IDs per lookup call, lookup); a lookup maps every ID it is
+# given to True / False / None (unknown).
+BACKENDS = {
+    "oembed":   (1, check_oembed_batch),
+    "data-api": (DATA_API_BATCH, check_data_api),
+}
+
+
+def default_backend() -> str:
+    return "data-api" if DATA_API_KEY else "oembed"
+
+
+def load_status_cache() -> dict:
+    """{video_id: {"available", "checked_at", "changed_at"}} from CACHE_FILE."""
     try:
-        with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
-            return resp.status == 200
-    except urllib.error.HTTPError:
-        # 401 = embedding disabled, 404 = not found / private — both unplayable
-        return False
+        data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
     except Exception as e:
-        print(f"  Network error for {video_id}: {e}")
-        return None
+        print(f"Ignoring unreadable cache {CACHE_FILE}: {e}")
+        return {}
+    return {k: v for k, v in data.items() if isinstance(v, dict)} if isinstance(data, dict) else {}
+
+
+def save_status_cache(cache: dict, writes: WriteBatch) -> None:
+    writes.stage_json(CACHE_FILE, cache, indent=2, sort_keys=True, trailing_newline=True)
+
 
+def is_fresh(entry: dict, now: datetime, ttl: timedelta) -> bool:
+    """Whether a cached status is recent enough to trust without a new lookup."""
+    try:
+        checked_at = datetime.fromisoformat(entry["checked_at"])
+        changed_at = datetime.fromisoformat(entry.get("changed_at") or entry["checked_at"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    if entry.get("available") is False and now - changed_at < RECENT_CHANGE:
+        ttl = min(ttl, UNAVAILABLE_TTL)
+    return now - checked_at < ttl
 
-def check_all_sessions() -> None:
+
+def check_all_sessions(workers: int = WORKERS, ttl: timedelta = CACHE_TTL, backend: str | None = None) -> None:
+    METRICS.stage("scan")
+    backend = backend or default_backend()
+    batch_size, lookup = BACKENDS[backend]
     session_files = sorted(
-        f for f in SESSIONS_DIR.glob("*.json") if f.name not in SKIP_FILES
+        f for f in SESSIONS_DIR.glob("*.json") if f.name not in NON_SESSION_FILES
     )
-    print(f"Checking {len(session_files)} session file(s)…\n")
+    print(f"Checking {len(session_files)} session file(s) via {backend} with {workers} worker(s)…\n")
 
     updated = 0
     skipped = 0
 
+    loaded = []
     for filepath in session_files:
         try:
             data = json.loads(filepath.read_text(encoding="utf-8"))
@@ -74,21 +286,52 @@ def check_all_sessions() -> None:
             print(f"[SKIP] {filepath.name}: cannot read — {e}")
             skipped += 1
             continue
-
         video_url = (data.get("video_url") or "").strip()
-        video_id  = extract_youtube_id(video_url)
+        loaded.append((filepath, data, extract_youtube_id(video_url)))
 
-        if not video_id:
-            new_status = False
-        else:
-            result = check_oembed(video_id)
-            if result is None:
-                print(f"[SKIP] {filepath.name}: network error — not updating")
-                skipped += 1
-                time.sleep(REQUEST_DELAY)
-                continue
-            new_status = result
-            time.sleep(REQUEST_DELAY)
+    # Each unique video ID is looked up at most once, and not at all while its
+    # cached status is fresh. Only the lookups run concurrently; the log and
+    # the file updates below stay sequential and deterministic.
+    now = datetime.now(timezone.utc)
+    cache = load_status_cache()
+    unique_ids = sorted({video_id for _, _, video_id in loaded if video_id})
+    status = {vid: cache[vid]["available"] for vid in unique_ids
+              if vid in cache and is_fresh(cache[vid], now, ttl)}
+    to_check = [vid for vid in unique_ids if vid not in status]
+    METRICS.cache("video_status", hits=len(unique_ids) - len(to_check), misses=len(to_check))
+
+    METRICS.stage("lookup")
+    batches = [to_check[i:i + batch_size] for i in range(0, len(to_check), batch_size)]
+    results: dict = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for found in pool.map(lookup, batches):
+            results.update(found)
+
+    METRICS.stage("update")
+    stamp = now.isoformat(timespec="seconds")
+    for vid in to_check:
+        result = status[vid] = results.get(vid)
+        if result is None:
+            continue  # keep whatever we knew before; don't trust a network error
+        prev = cache.get(vid, {})
+        changed_at = prev.get("changed_at") if prev.get("available") == result else stamp
+        cache[vid] = {"available": result, "checked_at": stamp, "changed_at": changed_at}
+
+    print(f"{len(unique_ids)} unique video ID(s): {len(unique_ids) - len(to_check)} cache hit(s), "
+          f"{len(to_check)} looked up, {STATS['http_calls']} HTTP call(s).\n")
+    # Session updates and the cache are staged and written together at the
+    # end: only files whose bytes change are touched, each via an atomic
+    # rename, in the file's own JSON layout.
+    writes = WriteBatch()
+    save_status_cache({vid: cache[vid] for vid in unique_ids if vid in cache}, writes)
+
+    for filepath, data, video_id in loaded:
+        result = status[video_id] if video_id else False
+        if result is None:
+            print(f"[SKIP] {filepath.name}: network error — not updating")
+            skipped += 1
+            continue
+        new_status = result
 
         current_status = data.get("video_available")
 
@@ -97,16 +340,55 @@ def check_all_sessions() -> None:
             continue
 
         data["video_available"] = new_status
-        filepath.write_text(
-            json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8"
-        )
+        writes.stage_json(filepath, data, indent=2)
         label = "available" if new_status else "UNAVAILABLE"
         print(f"[UPD]  {filepath.name}: → {label}")
         updated += 1
 
+    METRICS.stage("write")
+    try:
+        writes.flush()
+    except OSError as e:
+        print(f"Error writing files: {e}")
+    METRICS.stage(None)
+    METRICS.count("files_scanned", len(session_files))
+    METRICS.count("files_updated", updated)
+    METRICS.count("files_skipped", skipped)
+    METRICS.count("files_unchanged", len(session_files) - updated - skipped)
+    METRICS.count("video_ids", len(unique_ids))
+    METRICS.count("files_written", len(writes.written))
+
     print(f"\nDone — {updated} updated, {skipped} skipped, "
           f"{len(session_files) - updated - skipped} unchanged.")
 
 
 if __name__ == "__main__":
-    check_all_sessions()
+    parser = argparse.ArgumentParser(description="Check YouTube availability of session videos.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help="status backend (default: data-api if YOUTUBE_API_KEY is set, else oembed)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"concurrent checks (default {WORKERS})")
+    parser.add_argument("--rate", type=float, default=REQUEST_RATE,
+                        help=f"max requests per second across all workers (default {REQUEST_RATE})")
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL.total_seconds() / 3600,
+                        help="skip video IDs checked within this many hours (default %(default)g, 0 = recheck all)")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="write a JSON run report (stage timings, counters, HTTP calls, cache hit ratios)")
+    parser.add_argument("--profile", nargs="?", const="check_videos.prof", metavar="FILE",
+                        help="run under cProfile and dump the stats to FILE (default %(const)s)")
+    args = parser.parse_args()
+    if args.backend == "data-api" and not DATA_API_KEY:
+        parser.error("--backend data-api needs YOUTUBE_API_KEY")
+    RATE_LIMITER = TokenBucket(args.rate, RATE_BURST)
+    if args.metrics_out:
+        METRICS.enable()
+
+    def run() -> None:
+        check_all_sessions(workers=args.workers, ttl=timedelta(hours=args.ttl), backend=args.backend)
+
+    if args.profile:
+        run_profiled(run, Path(args.profile))
+    else:
+        run()
+    if args.metrics_out:
+        METRICS.write_report(Path(args.metrics_out), "check_videos.py", vars(args))
@@ -1,22 +1,161 @@
+import argparse
+import gzip
+import hashlib
+import heapq
 import json
+import math
+import operator
 import os
 import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
 import urllib.request
+from array import array
+from bisect import bisect_left
 from collections import Counter, defaultdict
-from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, Iterable
+
+from metrics import METRICS, run_profiled
+from write_batch import WriteBatch
+
+try:
+    import brotli  # optional: enables .br siblings in --compact mode
+except ImportError:
+    brotli = None
+
+# Fastest available JSON decoder for session files; all three accept bytes and
+# raise ValueError subclasses on bad input.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        _json_loads = None
+
+try:
+    import numpy as np  # optional: vectorizes lap analytics for long sessions
+except ImportError:
+    np = None
+
+try:
+    from watchdog.observers import Observer  # optional: inotify-style events for --watch
+except ImportError:
+    Observer = None
 
 # --- Configuration ---
 SESSIONS_DIR = Path("sessions")
 OUTPUT_FILE = SESSIONS_DIR / "sessions-list.json"
 TRACKS_OUTPUT_FILE = SESSIONS_DIR / "tracks-list.json"
 MANUAL_TRACKS_FILE = SESSIONS_DIR / "tracks-manual.json"
-NON_SESSION_FILES = ["sessions-list.json", "tracks-list.json", "tracks-manual.json"]
+WEATHER_CACHE_FILE = SESSIONS_DIR / "weather-cache.json"
+GEOCACHE_FILE = SESSIONS_DIR / "tracks-geocache.json"
+NAME_ALIASES_FILE = SESSIONS_DIR / "name-aliases.json"
+VIDEO_STATUS_CACHE_FILE = SESSIONS_DIR / "video-status-cache.json"   # written by check_videos.py
+
+# Sharded index written alongside the monolithic sessions-list.json, so pages
+# can fetch only the slice they render: one file per driver, one per track,
+# date-ordered pages of SHARD_PAGE_SIZE sessions, and a manifest of counts and
+# content hashes (append ?v=<hash> to a shard URL for cache-busting).
+SHARD_DIR = SESSIONS_DIR / "index"
+SHARD_MANIFEST_FILE = SHARD_DIR / "manifest.json"
+SHARD_PAGE_SIZE = 25
+
+# Leaderboards per (track, configuration), built during the aggregation pass:
+# the fastest sessions overall, each driver's fastest sessions and each
+# driver's PB progression, in one small file.
+LEADERBOARDS_FILE = SESSIONS_DIR / "leaderboards.json"
+LEADERBOARD_TOP_K = 10
+LEADERBOARD_DRIVER_TOP_K = 5
+
+# Session comparison bundles: one file per (track, configuration) with every
+# session's lap times (as numbers), video start offset and metadata, plus an
+# id -> bundle lookup, so comparing sessions on session.html is one cached
+# request per configuration instead of one per session.
+COMPARE_DIR = SESSIONS_DIR / "compare"
+COMPARE_LOOKUP_FILE = COMPARE_DIR / "lookup.json"
+
+# Packed lap store: every session's lap times as little-endian float64 seconds,
+# back to back, plus an index of session ids and lap offsets. lap_store.py
+# memory-maps it; browsers can fetch one session's laps with a Range request.
+LAP_STORE_FILE = SESSIONS_DIR / "laps.bin"
+LAP_INDEX_FILE = SESSIONS_DIR / "laps-index.json"
+LAP_STORE_FORMAT = "laps-v1"
+
+# Opt-in SQLite export (--sqlite) for ad-hoc queries: sessions, laps and
+# tracks tables. Later runs only rewrite the rows of changed session files.
+SQLITE_DEFAULT_FILE = Path("sessions.sqlite")
+SQLITE_SCHEMA_VERSION = 1
+
+# Opt-in compact outputs (--compact): a minified copy of sessions-list.json, a
+# columnar variant with interned track objects, and precompressed .gz/.br
+# siblings of every index file for static hosts that serve them.
+COMPACT_OUTPUT_FILE = SESSIONS_DIR / "sessions-list.min.json"
+COLUMNAR_OUTPUT_FILE = SESSIONS_DIR / "sessions-list.columnar.json"
+
+# The *.json files in SESSIONS_DIR that are not session files. Shared with
+# check_videos.py; every generated or cache file added to sessions/ goes here.
+NON_SESSION_FILES = frozenset(p.name for p in (
+    OUTPUT_FILE, TRACKS_OUTPUT_FILE, MANUAL_TRACKS_FILE, WEATHER_CACHE_FILE, GEOCACHE_FILE,
+    NAME_ALIASES_FILE, VIDEO_STATUS_CACHE_FILE, LEADERBOARDS_FILE, LAP_INDEX_FILE,
+    COMPACT_OUTPUT_FILE, COLUMNAR_OUTPUT_FILE,
+))
+
+# Per-session lap analytics (the "analytics" block of every summary).
+ANALYTICS_ROLLING_WINDOW = 3   # best average over this many consecutive laps
+ANALYTICS_BEST_N = 5           # average of the N fastest laps
+ANALYTICS_PERCENTILES = (10, 25, 75, 90)
+# NumPy only pays off once its per-call overhead is amortized; both paths give
+# bit-identical results, so this is purely a speed switch.
+ANALYTICS_NUMPY_MIN_LAPS = 64
+
+# Incremental builds (--incremental) keep a manifest of every session file's
+# size/mtime, content hash, raw names and computed summary here. Not committed.
+BUILD_CACHE_DIR = Path(".build-cache")
+BUILD_MANIFEST_FILE = BUILD_CACHE_DIR / "manifest.json"
+BUILD_MANIFEST_VERSION = 3
+
+# Session files per work unit in the scan stage (see --jobs).
+SCAN_CHUNK_SIZE = 256
+
+# --watch rebuilds once the inputs have been quiet for WATCH_SETTLE seconds, so
+# copying in a batch of files triggers one rebuild. Without the watchdog
+# package the directory is polled every WATCH_POLL_INTERVAL seconds instead.
+WATCH_SETTLE = 0.1
+WATCH_POLL_INTERVAL = 0.25
+
+# Geocoding of maps links for tracks outside STATIC_TRACKS runs as one batch
+# after aggregation, GEOCODE_WORKERS links at a time. Failures are cached too
+# and retried once GEOCODE_RETRY_AFTER has passed.
+GEOCODE_WORKERS = 4
+GEOCODE_RETRY_AFTER = timedelta(days=1)
+
+# Weather cache tuning. Coordinates are rounded before keying so tiny edits to a
+# track's pin don't invalidate its history; failed lookups (the archive lags
+# real time by a few days) are retried once WEATHER_RETRY_AFTER has passed.
+WEATHER_COORD_PRECISION = 3
+WEATHER_RETRY_AFTER = timedelta(hours=12)
+# Uncached dates at one location are fetched as date-range requests: dates
+# more than WEATHER_MAX_GAP_DAYS apart start a new request, and no request
+# spans more than WEATHER_MAX_SPAN_DAYS. OPEN_METEO_ARCHIVE_URL overrides the
+# endpoint (e.g. for a local stub).
+WEATHER_ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+WEATHER_MAX_GAP_DAYS = 180
+WEATHER_MAX_SPAN_DAYS = 366
 
 # Canonical-name maps (populated per run from all source files). They collapse
 # accidental spelling variants — trailing-period, stray dots, emoji prefixes,
-# casing — so e.g. "Ignas M" folds into "Ignas M.". Populated in
+# casing — so e.g. "Ignas M" folds into "Ignas M.", plus the reviewed typo
+# aliases in NAME_ALIASES_FILE (proposed by name_aliases.py). Populated in
 # generate_sessions_list() before any session is processed.
 DRIVER_CANON: Dict[str, str] = {}
 TRACK_CANON: Dict[str, str] = {}
@@ -30,15 +169,52 @@ def _norm_key(name: Optional[str]) -> str:
     return re.sub(r"[^0-9a-zÀ-ɏ]+", "", str(name).lower())
 
 
-def build_canonical_map(names: List[Optional[str]]) -> Dict[str, str]:
+def load_name_aliases() -> Dict[str, Any]:
+    """NAME_ALIASES_FILE as {"drivers": {variant: name}, "tracks": {...},
+    "rejected": {"drivers": [[a, b], ...], "tracks": [...]}}; empty if the
+    file is missing or unreadable."""
+    aliases: Dict[str, Any] = {"drivers": {}, "tracks": {}, "rejected": {"drivers": [], "tracks": []}}
+    try:
+        data = json.loads(NAME_ALIASES_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return aliases
+    if isinstance(data, dict):
+        for kind in ("drivers", "tracks"):
+            if isinstance(data.get(kind), dict):
+                aliases[kind].update(data[kind])
+            if isinstance(data.get("rejected"), dict) and isinstance(data["rejected"].get(kind), list):
+                aliases["rejected"][kind] = data["rejected"][kind]
+    return aliases
+
+
+def _alias_keys(aliases: Dict[str, str]) -> Dict[str, str]:
+    """Alias entries as normalized key -> normalized key, with chains
+    (a -> b -> c) followed to their end; a cycle stops where it closes."""
+    links = {_norm_key(variant): _norm_key(name) for variant, name in aliases.items()}
+    resolved: Dict[str, str] = {}
+    for key in links:
+        target, seen = key, {key}
+        while target in links and links[target] not in seen:
+            target = links[target]
+            seen.add(target)
+        if target != key:
+            resolved[key] = target
+    return resolved
+
+
+def build_canonical_map(names: List[Optional[str]], aliases: Optional[Dict[str, str]] = None) -> Dict[str, str]:
     """Group raw names by their normalized key and map every variant to the
     most common spelling (ties broken toward the longer string, which keeps the
     more complete form such as the one with a trailing period). Names that
-    normalize differently are never merged, so distinct people/tracks are safe."""
+    normalize differently are never merged, so distinct people/tracks are safe,
+    unless `aliases` (variant -> name, from NAME_ALIASES_FILE) joins their
+    groups; the most common spelling of the joined group then wins."""
+    alias_keys = _alias_keys(aliases) if aliases else {}
     groups: Dict[str, Counter] = defaultdict(Counter)
     for n in names:
         if n:
-            groups[_norm_key(n)][n] += 1
+            key = _norm_key(n)
+            groups[alias_keys.get(key, key)][n] += 1
     canon: Dict[str, str] = {}
     for counter in groups.values():
         best = max(counter.items(), key=lambda kv: (kv[1], len(kv[0])))[0]
@@ -240,11 +416,14 @@ def resolve_coordinates_from_maps_link(maps_link: Optional[str]) -> Optional[Dic
     """
     if not maps_link:
         return None
+    started = time.perf_counter()
     try:
         req = urllib.request.Request(maps_link, method="HEAD", headers={"User-Agent": "Mozilla/5.0"})
         with urllib.request.urlopen(req, timeout=8) as resp:
             final_url = resp.geturl()
+        METRICS.http("maps", time.perf_counter() - started, resp.status)
     except Exception as e:
+        METRICS.http("maps", time.perf_counter() - started, getattr(e, "code", None) or type(e).__name__)
         print(f"  [geocode] failed to resolve {maps_link}: {e}")
         return None
 
@@ -257,40 +436,282 @@ def resolve_coordinates_from_maps_link(maps_link: Optional[str]) -> Optional[Dic
     return None
 
 
+# Persistent geocoding cache (sessions/tracks-geocache.json), keyed by maps
+# link: {"lat", "lng"} for resolved links, {"failed_at", "retry_after"} for
+# links that couldn't be resolved.
+GEOCACHE: Dict[str, Dict[str, Any]] = {}
+
+
+def load_geocache() -> None:
+    GEOCACHE.clear()
+    if not GEOCACHE_FILE.exists():
+        return
+    try:
+        data = json.loads(GEOCACHE_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"  [geocode] ignoring unreadable cache {GEOCACHE_FILE}: {e}")
+        return
+    if isinstance(data, dict):
+        GEOCACHE.update({k: v for k, v in data.items() if isinstance(v, dict)})
+
+
+def cached_coordinates(maps_link: Optional[str]) -> Optional[Dict[str, float]]:
+    """Coordinates for a maps link if the geocache has resolved it."""
+    entry = GEOCACHE.get(maps_link or "")
+    if entry and entry.get("lat") is not None and entry.get("lng") is not None:
+        return {"lat": entry["lat"], "lng": entry["lng"]}
+    return None
+
+
+def _needs_geocoding(maps_link: str, now: datetime) -> bool:
+    entry = GEOCACHE.get(maps_link)
+    if entry is None:
+        return True
+    if cached_coordinates(maps_link):
+        return False
+    try:
+        return datetime.fromisoformat(entry.get("retry_after", "")) <= now
+    except (TypeError, ValueError):
+        return True
+
+
+def geocode_batch(maps_links: Iterable[str]) -> None:
+    """
+    Batch geocoding stage: resolve every link that has no usable geocache
+    entry (never seen, or a failure whose retry_after has passed) on a pool of
+    GEOCODE_WORKERS threads and record the outcome in GEOCACHE.
+    """
+    now = datetime.now(timezone.utc)
+    todo = sorted(link for link in set(maps_links) if link and _needs_geocoding(link, now))
+    if not todo:
+        return
+    print(f"  [geocode] resolving {len(todo)} maps link(s) with {GEOCODE_WORKERS} worker(s)…")
+    with ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as pool:
+        results = list(pool.map(resolve_coordinates_from_maps_link, todo))
+    stamp = now.isoformat(timespec="seconds")
+    for link, resolved in zip(todo, results):
+        if resolved:
+            GEOCACHE[link] = resolved
+            print(f"  [geocode] {link} -> ({resolved['lat']}, {resolved['lng']})")
+        else:
+            GEOCACHE[link] = {
+                "failed_at": stamp,
+                "retry_after": (now + GEOCODE_RETRY_AFTER).isoformat(timespec="seconds"),
+            }
+
+
+def save_geocache(writes: WriteBatch) -> None:
+    writes.stage_json(GEOCACHE_FILE, GEOCACHE, indent=2)
+
+
 # --- Weather Fetch ---
 
-def fetch_weather(lat: float, lng: float, date: str) -> Optional[Dict]:
+def fetch_weather_range(lat: float, lng: float, start_date: str, end_date: str) -> Optional[Dict[str, Dict]]:
     """
-    Fetch historical daily weather from Open-Meteo for a given location and date.
-    Returns a dict with temp_max, temp_min, wind_speed_max, precipitation, weather_code
-    or None if the fetch fails.
+    Fetch historical daily weather from Open-Meteo for a location over an
+    inclusive date range in one request. Returns {date: {temp_max, temp_min,
+    wind_kmh, rain_mm, wmo_code}} for every day the archive has data for, or
+    None if the fetch fails.
     Free API, no key required.
     """
     url = (
-        f"https://archive-api.open-meteo.com/v1/archive"
+        f"{WEATHER_ARCHIVE_URL}"
         f"?latitude={lat}&longitude={lng}"
-        f"&start_date={date}&end_date={date}"
+        f"&start_date={start_date}&end_date={end_date}"
         f"&daily=temperature_2m_max,temperature_2m_min,wind_speed_10m_max,"
         f"precipitation_sum,weather_code"
         f"&wind_speed_unit=kmh&timezone=auto"
     )
+    WEATHER_STATS["requests"] += 1
+    started = time.perf_counter()
     try:
-        with urllib.request.urlopen(url, timeout=8) as resp:
-            data = json.loads(resp.read().decode())
+        try:
+            with urllib.request.urlopen(url, timeout=8) as resp:
+                body = resp.read()
+            METRICS.http("open-meteo", time.perf_counter() - started, resp.status)
+        except Exception as e:
+            METRICS.http("open-meteo", time.perf_counter() - started, getattr(e, "code", None) or type(e).__name__)
+            raise
+        data = json.loads(body.decode())
         daily = data.get("daily", {})
-        if not daily.get("time"):
-            return None
-        return {
-            "temp_max": daily["temperature_2m_max"][0],
-            "temp_min": daily["temperature_2m_min"][0],
-            "wind_kmh": daily["wind_speed_10m_max"][0],
-            "rain_mm": daily["precipitation_sum"][0],
-            "wmo_code": daily["weather_code"][0],
-        }
+        days: Dict[str, Dict] = {}
+        for i, day in enumerate(daily.get("time") or []):
+            w = {
+                "temp_max": daily["temperature_2m_max"][i],
+                "temp_min": daily["temperature_2m_min"][i],
+                "wind_kmh": daily["wind_speed_10m_max"][i],
+                "rain_mm": daily["precipitation_sum"][i],
+                "wmo_code": daily["weather_code"][i],
+            }
+            # Days the archive hasn't filled in yet come back as nulls.
+            if w["temp_max"] is not None and w["wmo_code"] is not None:
+                days[day] = w
+        return days
     except Exception as e:
-        print(f"  [weather] fetch failed for {date} at ({lat},{lng}): {e}")
+        print(f"  [weather] fetch failed for {start_date}..{end_date} at ({lat},{lng}): {e}")
+        return None
+
+
+def fetch_weather(lat: float, lng: float, date: str) -> Optional[Dict]:
+    """
+    Fetch historical daily weather from Open-Meteo for a given location and date.
+    Returns a dict with temp_max, temp_min, wind_speed_max, precipitation, weather_code
+    or None if the fetch fails.
+    """
+    days = fetch_weather_range(lat, lng, date, date)
+    return days.get(date) if days else None
+
+
+# Persistent weather cache (sessions/weather-cache.json), keyed by
+# "<lat>,<lng>|<date>". Historical weather never changes, so a hit skips the
+# HTTP call entirely; failures are stored with a retry_after timestamp instead.
+# Loaded in generate_sessions_list() and written back at the end of the run,
+# dropping entries that no session looked up this time.
+WEATHER_CACHE: Dict[str, Dict[str, Any]] = {}
+WEATHER_USED_KEYS: set = set()
+WEATHER_PREFETCHED_KEYS: set = set()
+WEATHER_STATS: Counter = Counter()
+
+
+def weather_cache_key(lat: float, lng: float, date: str) -> str:
+    return f"{round(lat, WEATHER_COORD_PRECISION)},{round(lng, WEATHER_COORD_PRECISION)}|{date}"
+
+
+def load_weather_cache() -> None:
+    """Reset the per-run weather state and load the on-disk cache, if any."""
+    WEATHER_CACHE.clear()
+    WEATHER_USED_KEYS.clear()
+    WEATHER_PREFETCHED_KEYS.clear()
+    WEATHER_STATS.clear()
+    if not WEATHER_CACHE_FILE.exists():
+        return
+    try:
+        data = json.loads(WEATHER_CACHE_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"  [weather] ignoring unreadable cache {WEATHER_CACHE_FILE}: {e}")
+        return
+    if isinstance(data, dict):
+        WEATHER_CACHE.update({k: v for k, v in data.items() if isinstance(v, dict)})
+
+
+def _weather_cache_state(key: str, now: datetime) -> str:
+    """"hit", "negative" (remembered failure still within its retry window)
+    or "miss" for a cache key."""
+    entry = WEATHER_CACHE.get(key)
+    if entry is None:
+        return "miss"
+    if entry.get("weather"):
+        return "hit"
+    try:
+        retry_after = datetime.fromisoformat(entry.get("retry_after", ""))
+    except (TypeError, ValueError):
+        return "miss"
+    return "negative" if retry_after > now else "miss"
+
+
+def _store_weather(key: str, w: Optional[Dict], now: datetime) -> None:
+    if w:
+        WEATHER_CACHE[key] = {"weather": w, "fetched_at": now.isoformat(timespec="seconds")}
+    else:
+        WEATHER_STATS["failures"] += 1
+        WEATHER_CACHE[key] = {
+            "weather": None,
+            "retry_after": (now + WEATHER_RETRY_AFTER).isoformat(timespec="seconds"),
+        }
+
+
+def _date_spans(dates: List[str]) -> List[Tuple[str, str]]:
+    """Split sorted ISO dates into (start, end) spans: a new span starts when
+    the gap to the previous date exceeds WEATHER_MAX_GAP_DAYS or the span
+    would grow past WEATHER_MAX_SPAN_DAYS."""
+    spans: List[Tuple[str, str]] = []
+    start = prev = None
+    for d in sorted(set(dates)):
+        day = datetime.strptime(d, "%Y-%m-%d")
+        if start is None or (day - prev).days > WEATHER_MAX_GAP_DAYS or (day - start).days >= WEATHER_MAX_SPAN_DAYS:
+            if start is not None:
+                spans.append((start.strftime("%Y-%m-%d"), prev.strftime("%Y-%m-%d")))
+            start = day
+        prev = day
+    if start is not None:
+        spans.append((start.strftime("%Y-%m-%d"), prev.strftime("%Y-%m-%d")))
+    return spans
+
+
+def prefetch_weather(locations: Iterable[Tuple[float, float, str]]) -> None:
+    """
+    Weather prefetch stage: group the uncached (lat, lng, date) lookups by
+    location and fetch each location's dates as a few date-range requests
+    (see _date_spans) instead of one request per session. Every requested
+    date is stored in the cache — days missing from the response as failures
+    — so the per-session lookups that follow are all cache hits.
+    """
+    now = datetime.now(timezone.utc)
+    by_location: Dict[Tuple[float, float], Dict[str, str]] = defaultdict(dict)
+    for lat, lng, date in locations:
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            continue  # malformed dates are left to the per-session lookup
+        key = weather_cache_key(lat, lng, date)
+        if _weather_cache_state(key, now) == "miss":
+            by_location[(lat, lng)][date] = key
+
+    for (lat, lng), wanted in by_location.items():
+        for start, end in _date_spans(list(wanted)):
+            print(f"  [weather] fetching {start}..{end} at ({lat},{lng})…")
+            days = fetch_weather_range(lat, lng, start, end) or {}
+            for date, key in wanted.items():
+                if start <= date <= end and key not in WEATHER_PREFETCHED_KEYS:
+                    WEATHER_PREFETCHED_KEYS.add(key)
+                    WEATHER_STATS["misses"] += 1
+                    _store_weather(key, days.get(date), now)
+
+
+def cached_fetch_weather(lat: float, lng: float, date: str) -> Optional[Dict]:
+    """
+    fetch_weather() behind the persistent cache. Returns the cached result when
+    there is one (including a remembered failure whose retry_after is still in
+    the future) and only goes to the network otherwise. After
+    prefetch_weather() has run for the same lookups this never hits the
+    network.
+    """
+    key = weather_cache_key(lat, lng, date)
+    WEATHER_USED_KEYS.add(key)
+    now = datetime.now(timezone.utc)
+
+    state = _weather_cache_state(key, now)
+    if key in WEATHER_PREFETCHED_KEYS:
+        return WEATHER_CACHE[key].get("weather")
+    if state == "hit":
+        WEATHER_STATS["hits"] += 1
+        return WEATHER_CACHE[key]["weather"]
+    if state == "negative":
+        WEATHER_STATS["negative_hits"] += 1
         return None
 
+    WEATHER_STATS["misses"] += 1
+    print(f"  [weather] fetching for {date} at ({lat},{lng})…")
+    w = fetch_weather(lat, lng, date)
+    _store_weather(key, w, now)
+    return w
+
+
+def save_weather_cache(writes: WriteBatch) -> None:
+    """Evict entries no session asked for this run, stage the cache for
+    writing and print the hit/miss summary."""
+    evicted = [k for k in WEATHER_CACHE if k not in WEATHER_USED_KEYS]
+    for k in evicted:
+        del WEATHER_CACHE[k]
+    writes.stage_json(WEATHER_CACHE_FILE, WEATHER_CACHE, indent=2, sort_keys=True)
+    print(f"  [weather] cache: {WEATHER_STATS['hits']} hit(s), "
+          f"{WEATHER_STATS['negative_hits']} remembered failure(s), "
+          f"{WEATHER_STATS['misses']} miss(es) ({WEATHER_STATS['failures']} failed) "
+          f"fetched in {WEATHER_STATS['requests']} request(s), "
+          f"{len(evicted)} evicted, {len(WEATHER_CACHE)} stored.")
+    METRICS.cache("weather", hits=WEATHER_STATS["hits"] + WEATHER_STATS["negative_hits"],
+                  misses=WEATHER_STATS["misses"])
+
 
 WMO_DESCRIPTIONS = {
     0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
@@ -311,21 +732,41 @@ def wmo_to_description(code: Optional[int]) -> str:
 
 # --- Helper Functions ---
 
+# Lap-time strings repeat heavily (millisecond resolution over a narrow
+# range), so parsed values are memoized; the memo is dropped when it grows
+# past PARSED_TIMES_MAX entries.
+PARSED_TIMES_MAX = 1 << 17
+_PARSED_TIMES: Dict[str, Optional[float]] = {}
+
+
 def parse_time_to_seconds(time_str: Optional[Any]) -> Optional[float]:
     """
     Converts a time string (MM:SS.mmm) or float to a total number of seconds.
     """
+    if type(time_str) is str:
+        try:
+            return _PARSED_TIMES[time_str]
+        except KeyError:
+            pass
+        if len(_PARSED_TIMES) >= PARSED_TIMES_MAX:
+            _PARSED_TIMES.clear()
+        seconds = _PARSED_TIMES[time_str] = _parse_time_str(time_str)
+        return seconds
+
     if not time_str:
         return None
         
     if isinstance(time_str, (int, float)):
         return float(time_str)
-        
-    if isinstance(time_str, str) and time_str.strip() == "":
+
+    return _parse_time_str(str(time_str))
+
+def _parse_time_str(time_str: str) -> Optional[float]:
+    if time_str.strip() == "":
         return None
         
     try:
-        parts = str(time_str).split(':')
+        parts = time_str.split(':')
         if len(parts) == 2:
             minutes = float(parts[0])
             seconds = float(parts[1])
@@ -342,9 +783,14 @@ def format_seconds_to_time(seconds: Optional[float]) -> Optional[str]:
     """
     if seconds is None:
         return None
-    
-    td = timedelta(seconds=seconds)
-    total_seconds = td.total_seconds()
+
+    if 0 <= seconds < 1e9:
+        # Same microsecond rounding as timedelta(seconds=...).total_seconds()
+        # (round-half-even on the fractional part), without the object.
+        whole = int(seconds)
+        total_seconds = (whole * 1_000_000 + round((seconds - whole) * 1e6)) / 1_000_000
+    else:
+        total_seconds = timedelta(seconds=seconds).total_seconds()
     
     minutes = int(total_seconds // 60)
     remaining_seconds = total_seconds % 60
@@ -352,32 +798,332 @@ def format_seconds_to_time(seconds: Optional[float]) -> Optional[str]:
     return f"{minutes:02d}:{remaining_seconds:06.3f}"
 
 
-def process_session_file(filepath: Path) -> Optional[Dict[str, Any]]:
+# --- Lap Analytics ---
+
+def consistency_rating(std_dev: Optional[float]) -> Optional[str]:
+    """Same thresholds as getConsistencyRating() in js/session.js."""
+    if std_dev is None:
+        return None
+    if std_dev < 0.5:
+        return "Excellent"
+    if std_dev < 0.9:
+        return "Good"
+    if std_dev < 1.4:
+        return "Fair"
+    return "Traffic Affected"
+
+
+def _lap_aggregates_py(ms: List[int]) -> Dict[str, Any]:
+    srt = sorted(ms)
+    window = ANALYTICS_ROLLING_WINDOW
+    rolling = None
+    if len(ms) >= window:
+        acc = rolling = sum(ms[:window])
+        for old, new in zip(ms, ms[window:]):
+            acc += new - old
+            if acc < rolling:
+                rolling = acc
+
+    # Traffic filter from calculateConsistency(): laps under 300s, and no more
+    # than 3% slower than their median.
+    kept_i: List[int] = []
+    kept_t: List[int] = []
+    clean = [t for t in ms if t < 300_000]
+    if len(clean) >= 3:
+        c_srt = srt if len(clean) == len(ms) else sorted(clean)
+        mid = len(c_srt) // 2
+        twice_median = 2 * c_srt[mid] if len(c_srt) % 2 else c_srt[mid - 1] + c_srt[mid]
+        for i, t in enumerate(ms):
+            if t < 300_000 and 200 * t <= 103 * twice_median:
+                kept_i.append(i)
+                kept_t.append(t)
+    return {
+        "sorted": srt,
+        "rolling_min_sum": rolling,
+        "kept_n": len(kept_t),
+        "kept_sum": sum(kept_t),
+        "kept_sq_sum": sum([t * t for t in kept_t]),
+        "kept_x_sum": sum(kept_i),
+        "kept_xx_sum": sum([i * i for i in kept_i]),
+        "kept_xy_sum": sum(map(operator.mul, kept_i, kept_t)),
+    }
+
+
+def _lap_aggregates_np(ms: List[int]) -> Dict[str, Any]:
+    arr = np.asarray(ms, dtype=np.int64)
+    window = ANALYTICS_ROLLING_WINDOW
+    rolling = None
+    if len(arr) >= window:
+        csum = np.concatenate(([0], np.cumsum(arr)))
+        rolling = int((csum[window:] - csum[:-window]).min())
+
+    idx = np.nonzero(arr < 300_000)[0]
+    kept_idx = idx[:0]
+    if len(idx) >= 3:
+        c_srt = np.sort(arr[idx])
+        mid = len(c_srt) // 2
+        twice_median = int(2 * c_srt[mid] if len(c_srt) % 2 else c_srt[mid - 1] + c_srt[mid])
+        kept_idx = idx[200 * arr[idx] <= 103 * twice_median]
+    kept = arr[kept_idx]
+    return {
+        "sorted": np.sort(arr).tolist(),
+        "rolling_min_sum": rolling,
+        "kept_n": int(len(kept)),
+        "kept_sum": int(kept.sum()),
+        "kept_sq_sum": int((kept * kept).sum()),
+        "kept_x_sum": int(kept_idx.sum()),
+        "kept_xx_sum": int((kept_idx * kept_idx).sum()),
+        "kept_xy_sum": int((kept_idx * kept).sum()),
+    }
+
+
+def compute_lap_analytics(lap_times_s: List[float]) -> Dict[str, Any]:
     """
-    Reads a session file and calculates summary metrics.
+    Analytics block for one session's valid laps (in lap order): median,
+    percentiles, traffic-filtered standard deviation and consistency rating
+    (as on the session page), best rolling-window average, best-N average and
+    a stint-degradation slope (least-squares seconds per lap over the
+    traffic-filtered laps). Values that need more laps than the session has
+    are None.
+
+    Laps are converted to integer milliseconds and all sums are taken over
+    integers, so the NumPy and pure-Python paths produce identical floats.
+    """
+    ms = [round(t * 1000) for t in lap_times_s]
+    n = len(ms)
+    use_np = np is not None and n >= ANALYTICS_NUMPY_MIN_LAPS
+    agg = _lap_aggregates_np(ms) if use_np else _lap_aggregates_py(ms)
+    srt = agg["sorted"]
+
+    def pct(p: int) -> Optional[float]:
+        if not n:
+            return None
+        lo, rem = divmod((n - 1) * p, 100)
+        value = srt[lo] if rem == 0 else srt[lo] + (srt[lo + 1] - srt[lo]) * rem / 100
+        return round(value / 1000, 3)
+
+    std_dev = slope = None
+    k = agg["kept_n"]
+    if k >= 2:
+        variance = (k * agg["kept_sq_sum"] - agg["kept_sum"] ** 2) / (k * k)
+        std_dev = round(math.sqrt(max(variance, 0)) / 1000, 3)
+    if k >= 3:
+        denom = k * agg["kept_xx_sum"] - agg["kept_x_sum"] ** 2
+        if denom:
+            slope = round((k * agg["kept_xy_sum"] - agg["kept_x_sum"] * agg["kept_sum"]) / denom / 1000, 4)
+
+    best_n = ANALYTICS_BEST_N
+    rolling = agg["rolling_min_sum"]
+    analytics = {
+        "median_s": pct(50),
+        "stddev_s": std_dev,
+        "consistency": consistency_rating(std_dev),
+        "best_rolling_s": round(rolling / ANALYTICS_ROLLING_WINDOW / 1000, 3) if rolling is not None else None,
+        "rolling_window": ANALYTICS_ROLLING_WINDOW,
+        "best_n_avg_s": round(sum(srt[:best_n]) / best_n / 1000, 3) if n >= best_n else None,
+        "best_n": best_n,
+        "degradation_s_per_lap": slope,
+    }
+    for p in ANALYTICS_PERCENTILES:
+        analytics[f"p{p}_s"] = pct(p)
+    return analytics
+
+
+def parse_session_bytes(filepath: Path, raw: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Decodes the raw contents of a session file. Returns None (after logging)
+    if it isn't valid UTF-8 JSON or isn't a JSON object.
     """
     try:
-        text = filepath.read_text(encoding='utf-8')
-        session_data = json.loads(text)
-    except (json.JSONDecodeError, OSError) as e:
+        if _json_loads is not None:
+            session_data = _json_loads(raw)
+        else:
+            session_data = json.loads(raw.decode('utf-8'))
+    except ValueError as e:
         print(f"Error reading {filepath}: {e}")
         return None
+    if not isinstance(session_data, dict):
+        print(f"Error reading {filepath}: expected a JSON object")
+        return None
+    return session_data
 
-    session_id = session_data.get("session_id")
-    laps = session_data.get("laps", [])
-    
-    if not session_id:
+
+def load_session_file(filepath: Path) -> Optional[Dict[str, Any]]:
+    """
+    Reads and parses a single session file. Returns None (after logging) if
+    the file can't be read or isn't a JSON object.
+    """
+    try:
+        raw = filepath.read_bytes()
+    except OSError as e:
+        print(f"Error reading {filepath}: {e}")
         return None
+    return parse_session_bytes(filepath, raw)
+
+
+def list_session_files() -> List[Path]:
+    """Every session source file in SESSIONS_DIR, sorted by name so the output
+    order doesn't depend on the filesystem."""
+    return sorted((f for f in SESSIONS_DIR.glob("*.json") if f.name not in NON_SESSION_FILES),
+                  key=lambda f: f.name)
+
+
+def process_session_file(filepath: Path) -> Optional[Dict[str, Any]]:
+    """
+    Reads a session file and calculates summary metrics.
+    """
+    session_data = load_session_file(filepath)
+    if session_data is None:
+        return None
+    return summarize_session(session_data)
+
+
+def raw_session_names(session_data: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """The driver and track name exactly as typed in a session record."""
+    td = session_data.get("track")
+    return session_data.get("driver"), (td.get("name") if isinstance(td, dict) else td)
+
+
+def weather_location(summary: Dict[str, Any]) -> Optional[Tuple[float, float, str]]:
+    """(lat, lng, date) to look weather up for — only for outdoor tracks with
+    a valid date."""
+    track_data = summary.get("track")
+    track_name = track_data.get("name") if isinstance(track_data, dict) else str(track_data)
+    track_name = TRACK_CANON.get(track_name, track_name)
+    static_info = STATIC_TRACKS.get(track_name, {})
+    session_date = summary.get("session_date")
+    if not (static_info.get("outdoor") and session_date):
+        return None
+    return static_info["lat"], static_info["lng"], session_date
+
+
+def session_weather(summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Weather block for a summary — only for outdoor tracks with a valid date."""
+    location = weather_location(summary)
+    if location is None:
+        return None
+    w = cached_fetch_weather(*location)
+    if not w:
+        return None
+    return {
+        "temp_max": w["temp_max"],
+        "temp_min": w["temp_min"],
+        "wind_kmh": w["wind_kmh"],
+        "rain_mm": w["rain_mm"],
+        "condition": wmo_to_description(w["wmo_code"]),
+    }
 
-    # Calculate Valid Lap Times in seconds
-    valid_lap_times_seconds: List[float] = []
-    for lap_entry in laps:
-        time_val = lap_entry.get("time")
-        seconds = parse_time_to_seconds(time_val)
-        if seconds is not None and seconds > 0:
-            valid_lap_times_seconds.append(seconds)
 
-    total_valid_laps = len(valid_lap_times_seconds)
+# --- Session Records ---
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class Track:
+    """
+    One distinct track block as typed in session files: a dict (name,
+    configuration, maps_link, ...) or a bare name. Track.of() interns them,
+    so every session at the same track shares one instance and one `data`
+    object.
+    """
+    __slots__ = ("name", "configuration", "maps_link", "data")
+
+    _interned: Dict[Any, "Track"] = {}
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+        if isinstance(data, dict):
+            self.name = data.get("name")
+            self.configuration = data.get("configuration")
+            self.maps_link = data.get("maps_link")
+        else:
+            self.name = str(data)
+            self.configuration = self.maps_link = None
+
+    @classmethod
+    def of(cls, data: Any) -> "Track":
+        try:
+            key = tuple(data.items()) if isinstance(data, dict) else data
+            track = cls._interned.get(key)
+        except TypeError:  # unhashable values (nested lists/dicts): don't intern
+            return cls(data)
+        if track is None:
+            if isinstance(data, dict):
+                data = {_intern(k): _intern(v) for k, v in data.items()}
+            track = cls._interned[key] = cls(_intern(data))
+        return track
+
+
+class Session:
+    """
+    Typed form of one session file. Driver, kart and date strings are
+    interned, the track is a shared Track, and the valid lap times (seconds,
+    in lap order) are parsed once into a contiguous array('d') —
+    np.frombuffer(session.lap_times) is a zero-copy NumPy view of them.
+    """
+    __slots__ = ("id", "driver", "track", "session_date", "kart", "has_video", "lap_times")
+
+    def __init__(self, session_id: str, driver: Optional[str], track: Track,
+                 session_date: Optional[str], kart: Any, has_video: bool,
+                 lap_times: "array[float]") -> None:
+        self.id = session_id
+        self.driver = driver
+        self.track = track
+        self.session_date = session_date
+        self.kart = kart
+        self.has_video = has_video
+        self.lap_times = lap_times
+
+    @classmethod
+    def from_json(cls, session_data: Dict[str, Any]) -> Optional["Session"]:
+        """Build a Session from a parsed session file, or None if it has no
+        session_id."""
+        session_id = session_data.get("session_id")
+        if not session_id:
+            return None
+
+        # Valid lap times in seconds
+        lap_times = array("d")
+        append = lap_times.append
+        for lap_entry in session_data.get("laps", []):
+            if not isinstance(lap_entry, dict):
+                continue
+            seconds = parse_time_to_seconds(lap_entry.get("time"))
+            if seconds is not None and seconds > 0:
+                append(seconds)
+
+        return cls(
+            session_id,
+            _intern(session_data.get("driver")),
+            Track.of(session_data.get("track", {})),
+            _intern(session_data.get("session_date")),
+            _intern(session_data.get("kart")),
+            bool(session_data.get("video_url", "").strip()),
+            lap_times,
+        )
+
+
+def summarize_session(session_data: Dict[str, Any], with_weather: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Calculates summary metrics for an already-parsed session record. With
+    with_weather=False the "weather" field is left as None so the caller can
+    attach it later via session_weather() (used by the incremental cache, which
+    stores summaries without the weather that may still be filled in).
+    """
+    session = Session.from_json(session_data)
+    if session is None:
+        return None
+    summary = session_summary(session)
+    if with_weather:
+        summary["weather"] = session_weather(summary)
+    return summary
+
+
+def session_summary(session: Session) -> Dict[str, Any]:
+    """The sessions-list.json entry for a Session (weather not attached)."""
+    lap_times = session.lap_times
+    total_valid_laps = len(lap_times)
     
     # Pre-compute metrics
     fastest_lap_s: Optional[float] = None
@@ -385,48 +1131,30 @@ def process_session_file(filepath: Path) -> Optional[Dict[str, Any]]:
     average_lap_s: Optional[float] = None
     average_lap_str: Optional[str] = None
 
-    if valid_lap_times_seconds:
-        fastest_lap_s = min(valid_lap_times_seconds)
-        average_lap_s = sum(valid_lap_times_seconds) / total_valid_laps
+    if lap_times:
+        fastest_lap_s = min(lap_times)
+        average_lap_s = sum(lap_times) / total_valid_laps
         
         fastest_lap_str = format_seconds_to_time(fastest_lap_s)
         average_lap_str = format_seconds_to_time(average_lap_s)
 
     # Compile the Summary Data — canonicalize driver/track names so spelling
     # slips don't fragment the aggregates.
-    driver_name = session_data.get("driver")
-    driver_name = DRIVER_CANON.get(driver_name, driver_name)
+    driver_name = DRIVER_CANON.get(session.driver, session.driver)
 
-    track_data = session_data.get("track", {})
-    raw_track_name = track_data.get("name") if isinstance(track_data, dict) else str(track_data)
-    track_name = TRACK_CANON.get(raw_track_name, raw_track_name)
+    track_data = session.track.data
+    track_name = TRACK_CANON.get(session.track.name, session.track.name)
     if isinstance(track_data, dict) and track_data.get("name") != track_name:
         track_data = {**track_data, "name": track_name}
-    static_info = STATIC_TRACKS.get(track_name, {})
-    session_date = session_data.get("session_date")
-
-    # Fetch weather only for outdoor tracks with a valid date
-    weather = None
-    if static_info.get("outdoor") and session_date:
-        print(f"  [weather] fetching for {track_name} on {session_date}…")
-        w = fetch_weather(static_info["lat"], static_info["lng"], session_date)
-        if w:
-            weather = {
-                "temp_max": w["temp_max"],
-                "temp_min": w["temp_min"],
-                "wind_kmh": w["wind_kmh"],
-                "rain_mm": w["rain_mm"],
-                "condition": wmo_to_description(w["wmo_code"]),
-            }
 
-    summary = {
-        "id": session_id,
+    return {
+        "id": session.id,
         "driver": driver_name,
         "track": track_data,
-        "session_date": session_date,
-        "kart": session_data.get("kart"),
-        "has_video": bool(session_data.get("video_url", "").strip()),
-        "weather": weather,
+        "session_date": session.session_date,
+        "kart": session.kart,
+        "has_video": session.has_video,
+        "weather": None,
 
         # Display strings
         "fastest_lap": fastest_lap_str,
@@ -435,40 +1163,780 @@ def process_session_file(filepath: Path) -> Optional[Dict[str, Any]]:
         # Numeric derived metrics
         "fastest_lap_s": fastest_lap_s,
         "average_lap_s": average_lap_s,
-        "laps_count": total_valid_laps
+        "laps_count": total_valid_laps,
+        "analytics": compute_lap_analytics(lap_times),
     }
-    
-    return summary
 
-def generate_sessions_list() -> None:
-    """Main function to scan sessions directory and generate the index."""
-    if not SESSIONS_DIR.is_dir():
-        print(f"Error: Directory '{SESSIONS_DIR}' not found.")
-        return
+# --- Session Scan (full or incremental) ---
 
-    # Pre-scan all source files to learn the canonical spelling of every driver
-    # and track name (majority vote), so the processing pass can fold variants.
-    raw_drivers: List[Optional[str]] = []
-    raw_tracks: List[Optional[str]] = []
-    for filepath in SESSIONS_DIR.glob("*.json"):
-        if filepath.name in NON_SESSION_FILES:
-            continue
+def _generator_fingerprint() -> str:
+    """Hash of this script's source: any code change invalidates cached summaries."""
+    return hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+
+
+def load_build_manifest() -> Dict[str, Any]:
+    """The previous incremental build's manifest, or {} if it is missing,
+    unreadable, or was written by a different version of this script."""
+    try:
+        manifest = json.loads(BUILD_MANIFEST_FILE.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return {}
+    if (not isinstance(manifest, dict)
+            or manifest.get("version") != BUILD_MANIFEST_VERSION
+            or manifest.get("generator") != _generator_fingerprint()):
+        return {}
+    return manifest
+
+
+def save_build_manifest(entries: Dict[str, Dict[str, Any]], writes: WriteBatch) -> None:
+    manifest = {
+        "version": BUILD_MANIFEST_VERSION,
+        "generator": _generator_fingerprint(),
+        "files": entries,
+    }
+    writes.stage_json(BUILD_MANIFEST_FILE, manifest, preserve_format=False, indent=None, separators=(",", ":"))
+
+
+def _no_clock() -> float:
+    return 0.0
+
+
+def _scan_session_chunk(chunk: List[Tuple[str, Optional[str]]], incremental: bool,
+                        timed: bool = False) -> Tuple[List[Tuple[str, Optional[Dict[str, Any]]]], Dict[str, float]]:
+    """
+    Work unit of the scan stage; runs in a pool worker under --jobs. Reads,
+    decodes and summarizes each file of `chunk`, given as (file name, sha1
+    recorded in the previous manifest or None). Summaries are computed with
+    raw names — canonical names are applied by the parent once every file's
+    names are known. Returns (file name, manifest entry) pairs in chunk
+    order — the entry is None for unreadable files and carries
+    "unchanged": True when the content hash matched the manifest — and, if
+    `timed`, the seconds spent reading, decoding and summarizing.
+    """
+    DRIVER_CANON.clear()
+    TRACK_CANON.clear()
+    clock = time.perf_counter if timed else _no_clock
+    timings: Dict[str, float] = {"read": 0.0, "decode": 0.0, "summarize": 0.0}
+    results: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+    for name, prev_sha1 in chunk:
+        filepath = SESSIONS_DIR / name
+        entry: Dict[str, Any] = {}
+        started = clock()
         try:
-            d = json.loads(filepath.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
+            if incremental:
+                st = filepath.stat()
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            raw = filepath.read_bytes()
+        except OSError as e:
+            print(f"Error reading {filepath}: {e}")
+            results.append((name, None))
             continue
-        raw_drivers.append(d.get("driver"))
-        td = d.get("track")
-        raw_tracks.append(td.get("name") if isinstance(td, dict) else td)
-    DRIVER_CANON.clear(); DRIVER_CANON.update(build_canonical_map(raw_drivers))
-    TRACK_CANON.clear(); TRACK_CANON.update(build_canonical_map(raw_tracks))
+        if incremental:
+            entry["sha1"] = hashlib.sha1(raw).hexdigest()
+            if entry["sha1"] == prev_sha1:
+                results.append((name, {**entry, "unchanged": True}))
+                continue
+        read = clock()
+        session_data = parse_session_bytes(filepath, raw)
+        decoded = clock()
+        timings["read"] += read - started
+        timings["decode"] += decoded - read
+        if session_data is None:
+            results.append((name, None))
+            continue
+        entry["names"] = list(raw_session_names(session_data))
+        entry["summary"] = summarize_session(session_data, with_weather=False)
+        entry["compare"] = comparison_record(session_data)
+        timings["summarize"] += clock() - decoded
+        results.append((name, entry))
+    return results, timings
+
+
+def apply_canonical_names(summary: Dict[str, Any], raw_names: List[Optional[str]]) -> None:
+    """Fold a summary's driver and track name through DRIVER_CANON/TRACK_CANON,
+    starting from the names as typed in its source file (so re-applying
+    after the maps change is safe)."""
+    raw_driver, raw_track = raw_names
+    summary["driver"] = DRIVER_CANON.get(raw_driver, raw_driver)
+    track_data = summary.get("track")
+    if isinstance(track_data, dict):
+        track_name = TRACK_CANON.get(raw_track, raw_track)
+        if track_data.get("name") != track_name:
+            summary["track"] = {**track_data, "name": track_name}
+
+
+def build_session_summaries(writes: WriteBatch, incremental: bool = False,
+                            jobs: int = 1) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Scan, canonicalize and summarize every session file. Populates
+    DRIVER_CANON/TRACK_CANON and returns one summary per valid session in
+    file-name order, with "weather" not yet attached, and the matching
+    comparison records (see comparison_record). The incremental manifest is
+    staged on `writes`.
+
+    Files are scanned in chunks of SCAN_CHUNK_SIZE; with jobs > 1 the chunks
+    are fanned out to a process pool and their results consumed in chunk
+    order, so the output is identical to a serial run.
+
+    In incremental mode a file whose size+mtime or content hash matches the
+    build manifest reuses its cached raw names and summary without being
+    parsed; added or changed files are parsed and summarized, removed files
+    drop out. Canonical names are re-applied to every summary from its raw
+    names, so a change in how names fold never needs a re-parse.
+    """
+    METRICS.stage("scan")
+    manifest = load_build_manifest() if incremental else {}
+    previous: Dict[str, Dict[str, Any]] = manifest.get("files", {})
+
+    session_files = list_session_files()
+    reused: Dict[str, Dict[str, Any]] = {}
+    pending: List[Tuple[str, Optional[str]]] = []
+    for filepath in session_files:
+        prev = previous.get(filepath.name)
+        if prev:
+            try:
+                st = filepath.stat()
+            except OSError as e:
+                print(f"Error reading {filepath}: {e}")
+                continue
+            if prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns:
+                reused[filepath.name] = prev
+                continue
+        pending.append((filepath.name, prev.get("sha1") if prev else None))
+
+    METRICS.stage("process")
+    chunks = [pending[i:i + SCAN_CHUNK_SIZE] for i in range(0, len(pending), SCAN_CHUNK_SIZE)]
+    if jobs > 1 and len(chunks) > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        chunk_outputs = pool.map(_scan_session_chunk, chunks, repeat(incremental), repeat(METRICS.enabled))
+    else:
+        pool = None
+        chunk_outputs = (_scan_session_chunk(chunk, incremental, METRICS.enabled) for chunk in chunks)
+    scanned: Dict[str, Optional[Dict[str, Any]]] = {}
+    try:
+        for chunk_results, timings in chunk_outputs:
+            scanned.update(chunk_results)
+            for step, seconds in timings.items():
+                METRICS.add_time(f"process.{step}", seconds)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    processed = 0
+    for filepath in session_files:
+        name = filepath.name
+        if name in reused:
+            entries[name] = reused[name]
+        elif scanned.get(name) is not None:
+            entry = scanned[name]
+            if entry.pop("unchanged", False):
+                entries[name] = {**previous[name], **entry}
+            else:
+                entries[name] = entry
+                processed += 1
+
+    METRICS.count("files_scanned", len(session_files))
+    METRICS.count("files_reused", len(entries) - processed)
+    METRICS.count("files_processed", processed)
+    METRICS.count("files_failed", sum(1 for name, _ in pending if scanned.get(name) is None))
+    if incremental:
+        METRICS.cache("build_manifest", hits=len(entries) - processed, misses=processed)
+
+    METRICS.stage("canonicalize")
+    # Learn the canonical spelling of every driver and track name (majority
+    # vote) from all files, so the summaries can fold variants.
+    raw_drivers = [e["names"][0] for e in entries.values()]
+    raw_tracks = [e["names"][1] for e in entries.values()]
+    aliases = load_name_aliases()
+    DRIVER_CANON.clear(); DRIVER_CANON.update(build_canonical_map(raw_drivers, aliases["drivers"]))
+    TRACK_CANON.clear(); TRACK_CANON.update(build_canonical_map(raw_tracks, aliases["tracks"]))
     folded = {k: v for k, v in {**DRIVER_CANON, **TRACK_CANON}.items() if k != v}
     if folded:
         print(f"  [canonical] folded {len(folded)} name variant(s): " +
               ", ".join(f"{k!r}->{v!r}" for k, v in folded.items()))
 
-    # Cache of previously-resolved coordinates (keyed by track name) so tracks
-    # outside STATIC_TRACKS only get geocoded once, not on every run.
+    if incremental:
+        removed = len(set(previous) - set(entries))
+        print(f"  [incremental] {processed} file(s) (re)processed, "
+              f"{len(entries) - processed} reused, {removed} removed.")
+
+    summaries: List[Dict[str, Any]] = []
+    records: List[Dict[str, Any]] = []
+    for entry in entries.values():
+        if entry["summary"]:
+            apply_canonical_names(entry["summary"], entry["names"])
+            summaries.append(entry["summary"])
+            records.append(entry["compare"])
+
+    if incremental:
+        save_build_manifest(entries, writes)
+    return summaries, records
+
+
+# --- Sharded Index ---
+
+def _slug(name: str) -> str:
+    """File-name-safe ASCII slug: "Kęstas Č." -> "kestas-c"."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "unnamed"
+
+
+def _session_track_name(summary: Dict[str, Any]) -> Optional[str]:
+    track_data = summary.get("track")
+    if not track_data:
+        return None
+    return track_data.get("name") if isinstance(track_data, dict) else str(track_data)
+
+
+def build_sharded_index(summaries: List[Dict[str, Any]], writes: WriteBatch) -> None:
+    """
+    Stage the sharded index under SHARD_DIR: drivers/<slug>.json and
+    tracks/<slug>.json (every session of that driver/track, newest first),
+    pages/<n>.json (all sessions newest first, SHARD_PAGE_SIZE per page) and
+    manifest.json listing each shard's file, session count and content hash.
+    Shard files left over from a previous run are deleted.
+    """
+    def newest_first(s: Dict[str, Any]):
+        return (s.get("session_date") or "", s.get("id") or "")
+
+    ordered = sorted(summaries, key=newest_first, reverse=True)
+    shard_format = {"preserve_format": False, "indent": None, "separators": (",", ":")}
+    staged: List[Path] = []
+
+    def stage_shard(relpath: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        path = SHARD_DIR / relpath
+        writes.stage_json(path, payload, **shard_format)
+        staged.append(path)
+        digest = hashlib.sha1(writes.staged(path)).hexdigest()[:12]
+        return {"file": relpath, "count": len(payload["sessions"]), "hash": digest}
+
+    def group_by(key_fn, kind: str, label: str) -> Dict[str, Any]:
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for s in ordered:
+            key = key_fn(s)
+            if key:
+                groups[key].append(s)
+        shards: Dict[str, Any] = {}
+        used_slugs: Dict[str, str] = {}
+        for name in sorted(groups):
+            slug = _slug(name)
+            if slug in used_slugs:
+                slug = f"{slug}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:6]}"
+            used_slugs[slug] = name
+            shards[name] = stage_shard(f"{kind}/{slug}.json", {label: name, "sessions": groups[name]})
+        return shards
+
+    drivers = group_by(lambda s: s.get("driver"), "drivers", "driver")
+    tracks = group_by(_session_track_name, "tracks", "track")
+
+    page_count = max(1, -(-len(ordered) // SHARD_PAGE_SIZE))
+    pages = []
+    for n in range(page_count):
+        chunk = ordered[n * SHARD_PAGE_SIZE:(n + 1) * SHARD_PAGE_SIZE]
+        info = stage_shard(f"pages/{n + 1}.json", {"page": n + 1, "pages": page_count, "sessions": chunk})
+        dates = [s["session_date"] for s in chunk if s.get("session_date")]
+        info["newest"] = dates[0] if dates else None
+        info["oldest"] = dates[-1] if dates else None
+        pages.append(info)
+
+    writes.stage_json(SHARD_MANIFEST_FILE, {
+        "total_sessions": len(ordered),
+        "page_size": SHARD_PAGE_SIZE,
+        "pages": pages,
+        "drivers": drivers,
+        "tracks": tracks,
+    }, preserve_format=False, indent=2)
+
+    # Drop shards for drivers/tracks/pages that no longer exist.
+    keep = set(staged)
+    for kind in ("drivers", "tracks", "pages"):
+        for old in (SHARD_DIR / kind).glob("*.json"):
+            if old not in keep:
+                writes.stage_delete(old)
+
+
+# --- Leaderboards ---
+
+class _Worst:
+    """Heap entry ordered so the root of a heapq heap is the largest key."""
+    __slots__ = ("key", "entry")
+
+    def __init__(self, key: Tuple, entry: Dict[str, Any]) -> None:
+        self.key = key
+        self.entry = entry
+
+    def __lt__(self, other: "_Worst") -> bool:
+        return self.key > other.key
+
+
+class TopK:
+    """The k entries with the smallest keys seen so far, in a bounded heap
+    whose root is the current worst entry — O(log k) per push, O(k) memory."""
+    __slots__ = ("k", "heap")
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.heap: List[_Worst] = []
+
+    def push(self, key: Tuple, entry: Dict[str, Any]) -> None:
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, _Worst(key, entry))
+        elif key < self.heap[0].key:
+            heapq.heapreplace(self.heap, _Worst(key, entry))
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        return [w.entry for w in sorted(self.heap, key=lambda w: w.key)]
+
+
+class PBProgression:
+    """
+    A driver's personal-best progression as a running minimum over time: the
+    sessions, in (date, id) order, that beat every earlier one. Kept
+    incrementally, so sessions can arrive in any order.
+    """
+    __slots__ = ("points",)
+
+    def __init__(self) -> None:
+        self.points: List[Tuple[str, str, float]] = []  # (date, id, lap_s), laps strictly decreasing
+
+    def add(self, date: str, session_id: str, lap_s: float) -> None:
+        points = self.points
+        pos = bisect_left(points, (date, session_id))
+        if pos and points[pos - 1][2] <= lap_s:
+            return  # an earlier session was at least as fast
+        end = pos
+        while end < len(points) and points[end][2] >= lap_s:
+            end += 1  # later sessions this one makes redundant
+        points[pos:end] = [(date, session_id, lap_s)]
+
+
+class Leaderboards:
+    """Per-(track, configuration) leaderboards, fed one summary at a time."""
+
+    def __init__(self, top_k: int = LEADERBOARD_TOP_K, driver_top_k: int = LEADERBOARD_DRIVER_TOP_K) -> None:
+        self.top_k = top_k
+        self.driver_top_k = driver_top_k
+        self.boards: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def add(self, summary: Dict[str, Any]) -> None:
+        lap_s = summary.get("fastest_lap_s")
+        track_data = summary.get("track")
+        if lap_s is None or not track_data:
+            return
+        if isinstance(track_data, dict):
+            track, config = track_data.get("name"), track_data.get("configuration")
+        else:
+            track, config = str(track_data), None
+        if not track:
+            return
+        board = self.boards.get((track, config or ""))
+        if board is None:
+            board = self.boards[(track, config or "")] = {"sessions": 0, "top": TopK(self.top_k), "drivers": {}}
+        board["sessions"] += 1
+
+        driver = summary.get("driver") or "Unknown"
+        date = summary.get("session_date") or ""
+        session_id = summary.get("id") or ""
+        key = (lap_s, date, session_id)  # ties go to whoever set the time first
+        entry = {"id": session_id, "lap_s": lap_s, "lap": summary.get("fastest_lap"),
+                 "date": summary.get("session_date")}
+        board["top"].push(key, {"driver": driver, **entry})
+
+        mine = board["drivers"].get(driver)
+        if mine is None:
+            mine = board["drivers"][driver] = (TopK(self.driver_top_k), PBProgression())
+        mine[0].push(key, entry)
+        if date:
+            mine[1].add(date, session_id, lap_s)
+
+    def to_json(self) -> Dict[str, Any]:
+        boards = []
+        for (track, config), board in sorted(self.boards.items()):
+            drivers = {}
+            for driver, (best, progression) in sorted(board["drivers"].items()):
+                drivers[driver] = {
+                    "best": best.ranked(),
+                    "progression": [{"date": d, "id": i, "lap_s": t} for d, i, t in progression.points],
+                }
+            boards.append({
+                "track": track,
+                "configuration": config or None,
+                "sessions": board["sessions"],
+                "top": board["top"].ranked(),
+                "drivers": drivers,
+            })
+        return {"top_k": self.top_k, "driver_top_k": self.driver_top_k, "boards": boards}
+
+
+# --- Comparison Bundles ---
+
+# Time strings that parse to the same number here and in session.js's
+# parseTime; anything else is passed through as the original string.
+_PLAIN_TIME = re.compile(r"\s*(?:[0-9]+\s*:\s*)?[0-9]+(?:\.[0-9]+)?\s*")
+
+
+def _bundle_time(value: Any) -> Any:
+    """A lap or video-start time for a bundle: seconds if it's a plain time
+    string or a number, otherwise the value as it appears in the file."""
+    if isinstance(value, str) and _PLAIN_TIME.fullmatch(value):
+        return parse_time_to_seconds(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None  # not representable in JSON
+    return value
+
+
+def comparison_record(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The per-file part of a session's comparison bundle entry: every lap's
+    time (valid or not, so lap indexes line up with the session file), the
+    lap numbers when they aren't simply 1..n, and the video URL and start
+    offset. An entry that isn't an object keeps its slot, with a None time
+    and lap number. Driver, date, kart and track come from the summary.
+    """
+    laps = [lap_entry if isinstance(lap_entry, dict) else {} for lap_entry in session_data.get("laps", [])]
+    record: Dict[str, Any] = {"laps": [_bundle_time(lap_entry.get("time")) for lap_entry in laps]}
+    numbers = [lap_entry.get("lap") for lap_entry in laps]
+    if numbers != list(range(1, len(numbers) + 1)):
+        record["lap_numbers"] = numbers
+    video_url = session_data.get("video_url")
+    if video_url:
+        record["video_url"] = video_url
+    video_start = session_data.get("video_start_time")
+    if video_start is not None:
+        record["video_start"] = _bundle_time(video_start)
+    return record
+
+
+def build_comparison_bundles(summaries: List[Dict[str, Any]], records: List[Dict[str, Any]],
+                             writes: WriteBatch) -> int:
+    """
+    Stage one bundle per (track, configuration) under COMPARE_DIR, with its
+    sessions keyed by id in (date, id) order and driver names stored once,
+    and COMPARE_LOOKUP_FILE mapping every session id to its bundle (file and
+    content hash, for ?v=<hash>). A bundle's bytes only change when one of
+    its sessions does, so the others stay untouched on disk and in browser
+    caches. Stale bundles are deleted. Returns the number of bundles.
+    """
+    groups: Dict[Tuple[str, str], List[Tuple[Dict[str, Any], Dict[str, Any]]]] = defaultdict(list)
+    for summary, record in zip(summaries, records):
+        track_data = summary.get("track")
+        if isinstance(track_data, dict) and track_data.get("name"):
+            groups[(track_data["name"], track_data.get("configuration") or "")].append((summary, record))
+
+    bundle_format = {"preserve_format": False, "indent": None, "separators": (",", ":")}
+    bundles: List[Dict[str, Any]] = []
+    lookup: Dict[str, int] = {}
+    used_slugs = set()
+    for (track, config), members in sorted(groups.items()):
+        slug = _slug(f"{track} {config}")
+        if slug in used_slugs:
+            slug = f"{slug}-{hashlib.sha1(f'{track}|{config}'.encode('utf-8')).hexdigest()[:6]}"
+        used_slugs.add(slug)
+
+        members.sort(key=lambda m: (m[0].get("session_date") or "", m[0].get("id") or ""))
+        drivers: Dict[Optional[str], int] = {}
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for summary, record in members:
+            driver = summary.get("driver")
+            if driver not in drivers:
+                drivers[driver] = len(drivers)
+            sessions[summary["id"]] = {"driver": drivers[driver], "date": summary.get("session_date"),
+                                       "kart": summary.get("kart"), **record}
+
+        path = COMPARE_DIR / f"{slug}.json"
+        writes.stage_json(path, {"track": track, "configuration": config or None,
+                                 "drivers": list(drivers), "sessions": sessions}, **bundle_format)
+        for session_id in sessions:
+            lookup[session_id] = len(bundles)
+        bundles.append({"file": path.name, "hash": hashlib.sha1(writes.staged(path)).hexdigest()[:12],
+                        "track": track, "configuration": config or None, "sessions": len(sessions)})
+
+    writes.stage_json(COMPARE_LOOKUP_FILE, {"bundles": bundles, "sessions": lookup}, **bundle_format)
+    keep = {COMPARE_DIR / b["file"] for b in bundles} | {COMPARE_LOOKUP_FILE}
+    for old in COMPARE_DIR.glob("*.json"):
+        if old not in keep:
+            writes.stage_delete(old)
+    return len(bundles)
+
+
+# --- Lap Store ---
+
+def build_lap_store(summaries: List[Dict[str, Any]], records: List[Dict[str, Any]],
+                    writes: WriteBatch) -> int:
+    """
+    Stage LAP_STORE_FILE and LAP_INDEX_FILE from the comparison records:
+    each session's lap times in file order, as little-endian float64, with
+    NaN for a lap whose time isn't a number or whose entry isn't an object
+    (so lap indexes match the session file). The index lists session ids in the same order and
+    len(ids) + 1 lap offsets; session i's laps are offsets[i]..offsets[i+1]-1.
+    Returns the number of laps stored.
+    """
+    laps = array("d")
+    ids: List[Any] = []
+    offsets = [0]
+    for summary, record in zip(summaries, records):
+        try:
+            laps.fromlist(record["laps"])  # all numbers: the common case
+        except TypeError:
+            laps.extend(t if isinstance(t, (int, float)) else math.nan for t in record["laps"])
+        ids.append(summary["id"])
+        offsets.append(len(laps))
+    if sys.byteorder != "little":
+        laps.byteswap()
+    payload = laps.tobytes()
+    writes.stage_bytes(LAP_STORE_FILE, payload)
+    writes.stage_json(LAP_INDEX_FILE, {
+        "format": LAP_STORE_FORMAT,
+        "dtype": "<f8",
+        "file": LAP_STORE_FILE.name,
+        "hash": hashlib.sha1(payload).hexdigest()[:12],
+        "ids": ids,
+        "offsets": offsets,
+    }, preserve_format=False, indent=None, separators=(",", ":"))
+    return len(laps)
+
+
+# --- SQLite Export ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE sessions (
+    file          TEXT PRIMARY KEY,   -- source file name in sessions/
+    size          INTEGER NOT NULL,
+    mtime_ns      INTEGER NOT NULL,
+    sha1          TEXT NOT NULL,
+    id            TEXT NOT NULL,
+    driver        TEXT,               -- canonical spelling
+    driver_raw    TEXT,               -- as typed in the file
+    track         TEXT,
+    track_raw     TEXT,
+    configuration TEXT,
+    session_date  TEXT,
+    kart          TEXT,
+    has_video     INTEGER NOT NULL,
+    laps_count    INTEGER NOT NULL,   -- valid laps
+    fastest_lap_s REAL,
+    average_lap_s REAL
+);
+CREATE TABLE laps (
+    file       TEXT NOT NULL,
+    idx        INTEGER NOT NULL,      -- position in the file's laps array
+    session_id TEXT NOT NULL,
+    lap        INTEGER,
+    time       TEXT,
+    seconds    REAL,                  -- NULL if the time isn't a valid lap
+    PRIMARY KEY (file, idx)
+) WITHOUT ROWID;
+CREATE TABLE tracks (
+    name       TEXT PRIMARY KEY,
+    id         TEXT,
+    lat        REAL,
+    lng        REAL,
+    maps_link  TEXT,
+    configs    TEXT,                  -- JSON array
+    sessions   INTEGER,
+    best_lap   TEXT,
+    best_driver TEXT
+);
+CREATE INDEX sessions_id ON sessions (id);
+CREATE INDEX sessions_driver ON sessions (driver);
+CREATE INDEX sessions_track ON sessions (track, configuration);
+CREATE INDEX sessions_date ON sessions (session_date);
+CREATE INDEX laps_session ON laps (session_id);
+"""
+
+
+def _open_sqlite(db_path: Path) -> sqlite3.Connection:
+    """Open (creating or, on a schema version change, rebuilding) the export
+    database."""
+    conn = sqlite3.connect(db_path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SQLITE_SCHEMA_VERSION:
+        with conn:
+            for table in ("sessions", "laps", "tracks"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SQLITE_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+    return conn
+
+
+def _sqlite_rows(filepath: Path, st: os.stat_result, raw: bytes) -> Optional[Tuple[Tuple, List[Tuple]]]:
+    """The sessions row (raw names in both name columns for now) and laps
+    rows for one session file, or None if it isn't a valid session."""
+    session_data = parse_session_bytes(filepath, raw)
+    session = Session.from_json(session_data) if session_data is not None else None
+    if session is None:
+        return None
+    lap_times = session.lap_times
+    laps = []
+    for idx, lap_entry in enumerate(session_data.get("laps", [])):
+        if not isinstance(lap_entry, dict):
+            continue
+        time_val = lap_entry.get("time")
+        seconds = parse_time_to_seconds(time_val)
+        laps.append((filepath.name, idx, session.id, lap_entry.get("lap"),
+                     None if time_val is None else str(time_val),
+                     seconds if seconds is not None and seconds > 0 else None))
+    kart = session.kart
+    row = (filepath.name, st.st_size, st.st_mtime_ns, hashlib.sha1(raw).hexdigest(), session.id,
+           session.driver, session.driver, session.track.name, session.track.name,
+           session.track.configuration, session.session_date,
+           None if kart is None else str(kart), int(session.has_video), len(lap_times),
+           min(lap_times) if lap_times else None,
+           sum(lap_times) / len(lap_times) if lap_times else None)
+    return row, laps
+
+
+def export_sqlite(db_path: Path, tracks: List[Dict[str, Any]]) -> None:
+    """
+    Sync the SQLite export with SESSIONS_DIR in one transaction. Session files
+    whose size+mtime (or, failing that, content hash) match their row are
+    skipped; changed and new files have their session and lap rows replaced,
+    and rows of removed files (or of files that no longer parse) are deleted. Canonical driver/track names are
+    then re-applied to every row from DRIVER_CANON/TRACK_CANON, and the
+    tracks table is rewritten from `tracks` (the tracks-list.json entries).
+    """
+    conn = _open_sqlite(db_path)
+    try:
+        known = {file: (size, mtime_ns, sha1) for file, size, mtime_ns, sha1
+                 in conn.execute("SELECT file, size, mtime_ns, sha1 FROM sessions")}
+        session_rows: List[Tuple] = []
+        lap_rows: List[Tuple] = []
+        touched: List[Tuple] = []
+        invalid: List[Tuple] = []
+        seen = set()
+        for filepath in list_session_files():
+            seen.add(filepath.name)
+            try:
+                st = filepath.stat()
+                prev = known.get(filepath.name)
+                if prev and prev[:2] == (st.st_size, st.st_mtime_ns):
+                    continue
+                raw = filepath.read_bytes()
+            except OSError as e:
+                print(f"Error reading {filepath}: {e}")
+                continue
+            if prev and prev[2] == hashlib.sha1(raw).hexdigest():
+                touched.append((st.st_size, st.st_mtime_ns, filepath.name))
+                continue
+            rows = _sqlite_rows(filepath, st, raw)
+            if rows is None:
+                if prev:  # no longer a valid session: drop its stale rows
+                    invalid.append((filepath.name,))
+                continue
+            session_rows.append(rows[0])
+            lap_rows.extend(rows[1])
+        removed = [(name,) for name in known if name not in seen] + invalid
+        replaced = [(row[0],) for row in session_rows] + removed
+
+        with conn:
+            conn.executemany("DELETE FROM laps WHERE file = ?", replaced)
+            conn.executemany("DELETE FROM sessions WHERE file = ?", replaced)
+            conn.executemany(f"INSERT INTO sessions VALUES ({', '.join('?' * 16)})", session_rows)
+            conn.executemany("INSERT INTO laps VALUES (?, ?, ?, ?, ?, ?)", lap_rows)
+            conn.executemany("UPDATE sessions SET size = ?, mtime_ns = ? WHERE file = ?", touched)
+            conn.executemany("UPDATE sessions SET driver = ? WHERE driver_raw = ? AND driver IS NOT ?",
+                             [(canon, raw, canon) for raw, canon in DRIVER_CANON.items()])
+            conn.executemany("UPDATE sessions SET track = ? WHERE track_raw = ? AND track IS NOT ?",
+                             [(canon, raw, canon) for raw, canon in TRACK_CANON.items()])
+            conn.execute("DELETE FROM tracks")
+            conn.executemany("INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (t["name"], t["id"], t["lat"], t["lng"], t["mapsLink"],
+                 json.dumps(t["configs"], ensure_ascii=False), t["sessions"], t["bestLap"], t["bestDriver"])
+                for t in tracks])
+        total = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    finally:
+        conn.close()
+    METRICS.count("sqlite_upserted", len(session_rows))
+    METRICS.count("sqlite_deleted", len(removed))
+    print(f"SUCCESS: SQLite export {db_path}: {len(session_rows)} session(s) upserted "
+          f"({len(lap_rows)} laps), {len(removed)} removed, {total - len(session_rows)} unchanged.")
+
+
+# --- Compact Outputs ---
+
+def to_columnar(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Column-oriented form of the session summaries: one array per field, with
+    each distinct track object stored once in "tracks" and referenced by its
+    index from the "track" column. Row i is rebuilt as
+    {field: columns[field][i]} with columns["track"][i] looked up in "tracks".
+    """
+    fields: List[str] = []
+    for s in summaries:
+        for key in s:
+            if key not in fields:
+                fields.append(key)
+
+    tracks: List[Any] = []
+    track_index: Dict[str, int] = {}
+    columns: Dict[str, List[Any]] = {f: [] for f in fields}
+    for s in summaries:
+        for f in fields:
+            value = s.get(f)
+            if f == "track":
+                key = json.dumps(value, sort_keys=True, ensure_ascii=False)
+                if key not in track_index:
+                    track_index[key] = len(tracks)
+                    tracks.append(value)
+                value = track_index[key]
+            columns[f].append(value)
+
+    return {"format": "columnar-v1", "count": len(summaries), "tracks": tracks, "columns": columns}
+
+
+def stage_precompressed(path: Path, writes: WriteBatch) -> None:
+    """Stage .gz (and, with the brotli module installed, .br) siblings of a
+    staged file. gzip's header mtime is pinned so unchanged input gives
+    byte-identical output and no rewrite."""
+    payload = writes.staged(path)
+    writes.stage_encoded(path.with_name(path.name + ".gz"), payload,
+                         lambda data: gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        writes.stage_encoded(path.with_name(path.name + ".br"), payload,
+                             lambda data: brotli.compress(data, quality=11))
+
+
+def build_compact_outputs(final_output: Dict[str, Any], writes: WriteBatch) -> None:
+    minified = {"preserve_format": False, "indent": None, "separators": (",", ":")}
+    writes.stage_json(COMPACT_OUTPUT_FILE, final_output, **minified)
+    writes.stage_json(COLUMNAR_OUTPUT_FILE, to_columnar(final_output["sessions"]), **minified)
+    for path in (OUTPUT_FILE, TRACKS_OUTPUT_FILE, COMPACT_OUTPUT_FILE, COLUMNAR_OUTPUT_FILE):
+        stage_precompressed(path, writes)
+
+
+def generate_sessions_list(incremental: bool = False, compact: bool = False, jobs: int = 1,
+                           sqlite_path: Optional[Path] = None,
+                           memo: Optional[Dict[Path, Tuple[str, bytes]]] = None) -> bool:
+    """Main function to scan sessions directory and generate the index.
+    `memo` is kept across the rebuilds of --watch (see WriteBatch). Returns
+    False (after logging) if a stage failed and the outputs weren't updated."""
+    if not SESSIONS_DIR.is_dir():
+        print(f"Error: Directory '{SESSIONS_DIR}' not found.")
+        return False
+
+    # Every output of this run is staged here and written in one flush at the
+    # end; files whose bytes didn't change are left alone.
+    writes = WriteBatch(memo)
+    # Interned tracks hold on to this run's track blocks; under --watch they
+    # would otherwise pile up across rebuilds.
+    Track._interned.clear()
+
+    # Parse every session file once (or, incrementally, only the ones that
+    # changed); all later stages work on the resulting summaries.
+    try:
+        session_summaries, compare_records = build_session_summaries(writes, incremental, jobs)
+    except OSError as e:
+        print(f"Error scanning directory: {e}")
+        return False
+
+    METRICS.stage("weather")
+    load_weather_cache()
+    load_geocache()
+    prefetch_weather(loc for loc in map(weather_location, session_summaries) if loc)
+
+    METRICS.stage("aggregate")
+    # Coordinates from the previous tracks-list.json (keyed by track name), a
+    # fallback for tracks whose maps link isn't in the geocache.
     resolved_coords_cache: Dict[str, Dict[str, float]] = {}
     if TRACKS_OUTPUT_FILE.exists():
         try:
@@ -492,78 +1960,66 @@ def generate_sessions_list() -> None:
 
     all_sessions_summary: List[Dict[str, Any]] = []
     tracks_aggregation: Dict[str, Any] = {}
+    leaderboards = Leaderboards()
 
-    # Use pathlib to glob json files
     try:
-        for filepath in SESSIONS_DIR.glob("*.json"):
-            if filepath.name in NON_SESSION_FILES:
+        for summary in session_summaries:
+            summary["weather"] = session_weather(summary)
+            all_sessions_summary.append(summary)
+            leaderboards.add(summary)
+
+            # --- Track Aggregation ---
+            track_data = summary.get("track")
+            if not track_data:
                 continue
 
-            summary = process_session_file(filepath)
-            if summary:
-                all_sessions_summary.append(summary)
+            track_name = track_data.get("name") if isinstance(track_data, dict) else str(track_data)
 
-                # --- Track Aggregation ---
-                track_data = summary.get("track")
-                if not track_data:
-                    continue
+            if track_name not in tracks_aggregation:
+                static_info = STATIC_TRACKS.get(track_name, {})
+                manual_info = manual_tracks.get(track_name, {})
+                maps_link = (
+                    static_info.get("mapsLink")
+                    or manual_info.get("mapsLink")
+                    or (track_data.get("maps_link") if isinstance(track_data, dict) else "")
+                    or ""
+                )
 
-                track_name = track_data.get("name") if isinstance(track_data, dict) else str(track_data)
-
-                if track_name not in tracks_aggregation:
-                    static_info = STATIC_TRACKS.get(track_name, {})
-                    manual_info = manual_tracks.get(track_name, {})
-                    maps_link = (
-                        static_info.get("mapsLink")
-                        or manual_info.get("mapsLink")
-                        or (track_data.get("maps_link") if isinstance(track_data, dict) else "")
-                        or ""
-                    )
-
-                    if static_info:
-                        lat, lng = static_info["lat"], static_info["lng"]
-                    elif track_name in resolved_coords_cache:
-                        lat, lng = resolved_coords_cache[track_name]["lat"], resolved_coords_cache[track_name]["lng"]
-                    else:
-                        print(f"  [geocode] resolving coordinates for new track {track_name!r}…")
-                        resolved = resolve_coordinates_from_maps_link(maps_link)
-                        if resolved:
-                            lat, lng = resolved["lat"], resolved["lng"]
-                            print(f"  [geocode] -> ({lat}, {lng})")
-                        else:
-                            lat, lng = 0, 0
-
-                    tracks_aggregation[track_name] = {
-                        "id": static_info.get("id") or manual_info.get("id") or track_name.lower().replace(" ", "_"),
-                        "name": track_name,
-                        "lat": lat,
-                        "lng": lng,
-                        "mapsLink": maps_link,
-                        "color": static_info.get("color") or manual_info.get("color") or "#aaaaaa",
-                        "note": static_info.get("note") or manual_info.get("note") or "Generated circuit",
-                        "configs": set(),
-                        "sessions": 0,
-                        "bestLap": None,
-                        "bestLap_s": float('inf'),
-                        "bestDriver": None
-                    }
-                
-                t_agg = tracks_aggregation[track_name]
-                t_agg["sessions"] += 1
+                known = static_info or cached_coordinates(maps_link) or resolved_coords_cache.get(track_name)
+                # Unknown coordinates stay None until the batch geocoding stage.
+                lat, lng = (known["lat"], known["lng"]) if known else (None, None)
+
+                tracks_aggregation[track_name] = {
+                    "id": static_info.get("id") or manual_info.get("id") or track_name.lower().replace(" ", "_"),
+                    "name": track_name,
+                    "lat": lat,
+                    "lng": lng,
+                    "mapsLink": maps_link,
+                    "color": static_info.get("color") or manual_info.get("color") or "#aaaaaa",
+                    "note": static_info.get("note") or manual_info.get("note") or "Generated circuit",
+                    "configs": set(),
+                    "sessions": 0,
+                    "bestLap": None,
+                    "bestLap_s": float('inf'),
+                    "bestDriver": None
+                }
+            
+            t_agg = tracks_aggregation[track_name]
+            t_agg["sessions"] += 1
+            
+            config_name = track_data.get("configuration") if isinstance(track_data, dict) else None
+            if config_name:
+                t_agg["configs"].add(config_name)
                 
-                config_name = track_data.get("configuration") if isinstance(track_data, dict) else None
-                if config_name:
-                    t_agg["configs"].add(config_name)
-                    
-                fastest_lap_s = summary.get("fastest_lap_s")
-                if fastest_lap_s is not None and fastest_lap_s < t_agg["bestLap_s"]:
-                    t_agg["bestLap_s"] = fastest_lap_s
-                    t_agg["bestLap"] = summary.get("fastest_lap")
-                    t_agg["bestDriver"] = summary.get("driver")
+            fastest_lap_s = summary.get("fastest_lap_s")
+            if fastest_lap_s is not None and fastest_lap_s < t_agg["bestLap_s"]:
+                t_agg["bestLap_s"] = fastest_lap_s
+                t_agg["bestLap"] = summary.get("fastest_lap")
+                t_agg["bestDriver"] = summary.get("driver")
 
     except Exception as e:
         print(f"Error scanning directory: {e}")
-        return
+        return False
 
     # Register manually-added tracks that have no sessions yet, so they can
     # show up on the map ahead of the first logged session.
@@ -572,16 +2028,8 @@ def generate_sessions_list() -> None:
             continue
 
         maps_link = info.get("mapsLink") or ""
-        if name in resolved_coords_cache:
-            lat, lng = resolved_coords_cache[name]["lat"], resolved_coords_cache[name]["lng"]
-        else:
-            print(f"  [geocode] resolving coordinates for new track {name!r}…")
-            resolved = resolve_coordinates_from_maps_link(maps_link)
-            if resolved:
-                lat, lng = resolved["lat"], resolved["lng"]
-                print(f"  [geocode] -> ({lat}, {lng})")
-            else:
-                lat, lng = 0, 0
+        known = cached_coordinates(maps_link) or resolved_coords_cache.get(name)
+        lat, lng = (known["lat"], known["lng"]) if known else (None, None)
 
         tracks_aggregation[name] = {
             "id": info.get("id", name.lower().replace(" ", "_")),
@@ -598,6 +2046,17 @@ def generate_sessions_list() -> None:
             "bestDriver": None
         }
 
+    # --- Batch Geocoding ---
+    METRICS.stage("geocode")
+    # Resolve all still-unknown tracks in one concurrent pass; tracks whose
+    # link can't be resolved land at (0, 0) as before.
+    pending = [t for t in tracks_aggregation.values() if t["lat"] is None]
+    METRICS.cache("track_coords", hits=len(tracks_aggregation) - len(pending), misses=len(pending))
+    geocode_batch(t["mapsLink"] for t in pending)
+    for t in pending:
+        coords = cached_coordinates(t["mapsLink"]) or {"lat": 0, "lng": 0}
+        t["lat"], t["lng"] = coords["lat"], coords["lng"]
+
     # Convert sets to lists and remove internal sorting keys
     final_tracks_list = []
     for t_val in tracks_aggregation.values():
@@ -609,17 +2068,171 @@ def generate_sessions_list() -> None:
         "sessions": all_sessions_summary
     }
 
+    METRICS.stage("serialize")
+    writes.stage_json(OUTPUT_FILE, final_output, preserve_format=False, indent=4)
+    writes.stage_json(TRACKS_OUTPUT_FILE, final_tracks_list, preserve_format=False, indent=4)
+    build_sharded_index(all_sessions_summary, writes)
+    writes.stage_json(LEADERBOARDS_FILE, leaderboards.to_json(),
+                      preserve_format=False, indent=None, separators=(",", ":"))
+    bundle_count = build_comparison_bundles(all_sessions_summary, compare_records, writes)
+    lap_count = build_lap_store(all_sessions_summary, compare_records, writes)
+    if compact:
+        build_compact_outputs(final_output, writes)
+    save_weather_cache(writes)
+    save_geocache(writes)
+
+    METRICS.stage("write")
     try:
-        with OUTPUT_FILE.open('w', encoding='utf-8') as outfile:
-            json.dump(final_output, outfile, indent=4, ensure_ascii=False)
-        print(f"SUCCESS: Created {OUTPUT_FILE} with {len(all_sessions_summary)} sessions.")
-        
-        with TRACKS_OUTPUT_FILE.open('w', encoding='utf-8') as outfile:
-            json.dump(final_tracks_list, outfile, indent=4, ensure_ascii=False)
-        print(f"SUCCESS: Created {TRACKS_OUTPUT_FILE} with {len(final_tracks_list)} tracks.")
-        
+        written, unchanged = writes.flush()
     except OSError as e:
         print(f"Error writing output file: {e}")
+        return False
+    METRICS.stage(None)
+    METRICS.count("sessions", len(all_sessions_summary))
+    METRICS.count("tracks", len(final_tracks_list))
+    METRICS.count("outputs_written", len(written))
+    METRICS.count("outputs_unchanged", len(unchanged))
+    METRICS.count("outputs_deleted", len(writes.deleted))
+
+    for path, what in ((OUTPUT_FILE, f"{len(all_sessions_summary)} sessions"),
+                       (TRACKS_OUTPUT_FILE, f"{len(final_tracks_list)} tracks")):
+        verb = "Created" if path in written else "Unchanged"
+        print(f"SUCCESS: {verb} {path} with {what}.")
+    shards = [p for p in written if SHARD_DIR in p.parents]
+    print(f"SUCCESS: Sharded index in {SHARD_DIR}: {len(shards)} shard file(s) written, "
+          f"{sum(1 for p in writes.deleted if SHARD_DIR in p.parents)} removed.")
+    print(f"SUCCESS: Leaderboards for {len(leaderboards.boards)} track configuration(s) in "
+          f"{LEADERBOARDS_FILE} ({LEADERBOARDS_FILE.stat().st_size:,} B).")
+    rebuilt = sum(1 for p in written if p.parent == COMPARE_DIR and p != COMPARE_LOOKUP_FILE)
+    print(f"SUCCESS: Comparison bundles in {COMPARE_DIR}: {bundle_count} bundle(s), {rebuilt} rewritten.")
+    print(f"SUCCESS: {'Wrote' if LAP_STORE_FILE in written else 'Unchanged'} lap store {LAP_STORE_FILE} "
+          f"({lap_count:,} laps, {LAP_STORE_FILE.stat().st_size:,} B).")
+    if compact:
+        sizes = [OUTPUT_FILE, COMPACT_OUTPUT_FILE, COLUMNAR_OUTPUT_FILE,
+                 COLUMNAR_OUTPUT_FILE.with_name(COLUMNAR_OUTPUT_FILE.name + ".gz")]
+        print("SUCCESS: Compact outputs: " + ", ".join(f"{p.name} {p.stat().st_size:,} B" for p in sizes)
+              + ("" if brotli else " (install brotli for .br siblings)"))
+    if sqlite_path:
+        METRICS.stage("sqlite")
+        try:
+            export_sqlite(sqlite_path, final_tracks_list)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error writing SQLite export {sqlite_path}: {e}")
+            return False
+        finally:
+            METRICS.stage(None)
+    return True
+
+# --- Watch Mode ---
+
+def watched_inputs() -> Dict[str, Tuple[int, int]]:
+    """(size, mtime) of every file a rebuild reads from SESSIONS_DIR: the
+    session files, tracks-manual.json and name-aliases.json. The generator's
+    own outputs are left out, so writing them doesn't trigger a rebuild."""
+    inputs = {MANUAL_TRACKS_FILE.name, NAME_ALIASES_FILE.name}
+    snapshot: Dict[str, Tuple[int, int]] = {}
+    with os.scandir(SESSIONS_DIR) as entries:
+        for entry in entries:
+            name = entry.name
+            if name in inputs or (name.endswith(".json") and name not in NON_SESSION_FILES):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                snapshot[name] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+class _WatchHandler:
+    """watchdog event handler: flags that something in SESSIONS_DIR changed."""
+
+    def __init__(self, event) -> None:
+        self.event = event
+
+    def dispatch(self, _event) -> None:
+        self.event.set()
+
+
+def watch_sessions(compact: bool = False, jobs: int = 1, sqlite_path: Optional[Path] = None) -> None:
+    """
+    Rebuild whenever a session file, tracks-manual.json or name-aliases.json
+    is added, changed or removed, until interrupted. Every rebuild is
+    incremental, so only changed files are re-parsed. Serialized outputs are
+    kept in memory between rebuilds (the WriteBatch memo), so unchanged
+    files are neither re-encoded nor rewritten.
+    """
+    memo: Dict[Path, Tuple[str, bytes]] = {}
+    changed = threading.Event()
+    observer = None
+    if Observer is not None:
+        observer = Observer()
+        observer.schedule(_WatchHandler(changed), str(SESSIONS_DIR), recursive=False)
+        observer.start()
+
+    snapshot = watched_inputs()
+    generate_sessions_list(incremental=True, compact=compact, jobs=jobs, sqlite_path=sqlite_path, memo=memo)
+    how = "watchdog events" if observer is not None else f"polling every {WATCH_POLL_INTERVAL}s"
+    print(f"  [watch] watching {SESSIONS_DIR} ({how}); press Ctrl+C to stop.")
+    try:
+        while True:
+            if observer is not None:
+                changed.wait()
+            else:
+                time.sleep(WATCH_POLL_INTERVAL)
+            # Let a burst of writes finish before rebuilding.
+            while True:
+                changed.clear()
+                time.sleep(WATCH_SETTLE)
+                if not changed.is_set():
+                    break
+            current = watched_inputs()
+            if current == snapshot:
+                continue
+            touched = sorted(n for n in current.keys() | snapshot.keys() if current.get(n) != snapshot.get(n))
+            snapshot = current
+            print(f"  [watch] {len(touched)} file(s) changed: {', '.join(touched[:5])}"
+                  + (" …" if len(touched) > 5 else ""))
+            started = time.perf_counter()
+            generate_sessions_list(incremental=True, compact=compact, jobs=jobs, sqlite_path=sqlite_path, memo=memo)
+            print(f"  [watch] rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("  [watch] stopped.")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
 
 if __name__ == "__main__":
-    generate_sessions_list()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate sessions-list.json and tracks-list.json from sessions/*.json.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only re-process session files changed since the last incremental run "
+                             f"(manifest kept in {BUILD_MANIFEST_FILE})")
+    parser.add_argument("--compact", action="store_true",
+                        help="also write minified and columnar sessions lists plus .gz/.br siblings")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="parse and summarize session files on N worker processes (default 1)")
+    parser.add_argument("--sqlite", nargs="?", const=str(SQLITE_DEFAULT_FILE), metavar="FILE",
+                        help="also sync a SQLite database of sessions, laps and tracks (default %(const)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild (incrementally) whenever sessions/ changes")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="write a JSON run report (stage timings, counters, HTTP calls, cache hit ratios)")
+    parser.add_argument("--profile", nargs="?", const="generate_list.prof", metavar="FILE",
+                        help="run under cProfile and dump the stats to FILE (default %(const)s)")
+    args = parser.parse_args()
+    if args.metrics_out:
+        METRICS.enable()
+
+    def run() -> bool:
+        sqlite_path = Path(args.sqlite) if args.sqlite else None
+        if args.watch:
+            watch_sessions(compact=args.compact, jobs=args.jobs, sqlite_path=sqlite_path)
+            return True
+        return generate_sessions_list(incremental=args.incremental, compact=args.compact, jobs=args.jobs,
+                                      sqlite_path=sqlite_path)
+
+    ok = run_profiled(run, Path(args.profile)) if args.profile else run()
+    if args.metrics_out:
+        METRICS.write_report(Path(args.metrics_out), "generate_list.py", vars(args))
+    # Nonzero on failure, so build.py doesn't record a failed run as built.
+    sys.exit(0 if ok else 1)
\ No newline at end of file
@@ -0,0 +1,603 @@
+"""
+Offline GPS telemetry ingestion: turns logged GPX / NMEA / CSV files into
+compact per-session telemetry artifacts with lap splits and brake zones.
+
+It does what brake.html's GPS import does (parseGPX/parseNMEA/parseCSV, then
+detectGPS), but for whole directories at once and without a browser tab.
+Each log is read line by line (GPX via iterparse) into flat columns. Speed,
+distance and deceleration are then computed with NumPy over whole arrays:
+  - resample to RESAMPLE_HZ and smooth the speed over ±SMOOTH_SAMPLES samples
+  - find brake zones: runs that reach BRAKE_ENTRY_DECEL and last while the
+    deceleration stays above BRAKE_HOLD_RATIO of that. A run is kept if it
+    sheds BRAKE_MIN_DROP_KMH, is sustained, and doesn't rebound like a kerb
+    strike. brake.html's defaults are used throughout.
+  - split laps by sliding the session's recorded lap times along the track
+    to the offset where every lap boundary falls on the same spot, which is
+    where the start/finish line is
+
+A log is matched to its session by file name: telemetry/<session id>.gpx
+belongs to sessions/<session id>.json. The artifact is written to
+sessions/telemetry/<session id>.json, and the session file gets a
+"telemetry" link ({"file", "hash"}). Logs whose content hash matches their
+artifact are skipped unless --force is given. With --jobs N, logs are
+processed on N worker processes.
+
+Run standalone:  python ingest_telemetry.py [PATH ...] [--jobs N] [--force]
+                                            [--metrics-out FILE] [--profile [FILE]]
+PATH is a log file or a directory of logs (default: telemetry/).
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - required, reported in main()
+    np = None
+
+from generate_list import SESSIONS_DIR, parse_time_to_seconds
+from metrics import METRICS, run_profiled
+from write_batch import WriteBatch
+
+TELEMETRY_DIR = Path("telemetry")
+ARTIFACT_DIR = SESSIONS_DIR / "telemetry"
+ARTIFACT_VERSION = 1
+LOG_SUFFIXES = {".gpx", ".nmea", ".nma", ".csv", ".txt", ".log"}
+
+RESAMPLE_HZ = 10             # uniform rate for derivatives and the stored series
+SMOOTH_SAMPLES = 3           # moving-average half-window (~0.3 s each side at 10 Hz)
+BRAKE_ENTRY_DECEL = 3.0      # m/s² — a zone starts here (brake.html "threshold")
+BRAKE_HOLD_RATIO = 0.4       # …and continues while decel stays above this share of it
+BRAKE_MIN_DROP_KMH = 12      # speed that must actually be shed (brake.html "min speed drop")
+BRAKE_MIN_DURATION = 0.25    # seconds; shorter runs are blips
+BRAKE_REBOUND_SAMPLES = 6    # window after a zone for the kerb-rebound test
+BRAKE_MERGE_GAP = 0.3        # seconds; zones closer than this are merged
+LAP_ALIGN_MAX_RMS_M = 25.0   # lap boundaries scattered wider than this aren't trusted
+EARTH_RADIUS_M = 6371000.0
+MIN_POINTS = 5
+
+
+# --- Parsing (streamed into columns) ---
+
+class Columns:
+    """Parallel array('d') columns of one log: time (s), speed (m/s), lat, lon.
+    Missing values are NaN."""
+    __slots__ = ("t", "v", "lat", "lon")
+
+    def __init__(self) -> None:
+        self.t, self.v, self.lat, self.lon = array("d"), array("d"), array("d"), array("d")
+
+    def append(self, t: float, v: float, lat: float, lon: float) -> None:
+        self.t.append(t)
+        self.v.append(v)
+        self.lat.append(lat)
+        self.lon.append(lon)
+
+    def arrays(self) -> Tuple["np.ndarray", ...]:
+        return tuple(np.frombuffer(col, dtype=np.float64) for col in (self.t, self.v, self.lat, self.lon))
+
+
+def _float(value: Optional[str]) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except ValueError:
+        return math.nan
+
+
+def _timestamp(value: str) -> float:
+    """ISO 8601 timestamp -> epoch seconds (naive times are taken as UTC)."""
+    try:
+        moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def haversine(lat1: "np.ndarray", lon1: "np.ndarray", lat2: "np.ndarray", lon2: "np.ndarray") -> "np.ndarray":
+    """Great-circle distance in metres, elementwise."""
+    la1, lo1, la2, lo2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((la2 - la1) / 2) ** 2 + np.cos(la1) * np.cos(la2) * np.sin((lo2 - lo1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def _derived_speed(t: "np.ndarray", lat: "np.ndarray", lon: "np.ndarray") -> "np.ndarray":
+    """Speed from consecutive positions (0 for the first point)."""
+    v = np.zeros(len(t))
+    if len(t) > 1:
+        v[1:] = haversine(lat[:-1], lon[:-1], lat[1:], lon[1:]) / np.maximum(0.001, np.diff(t))
+    return v
+
+
+def parse_gpx(path: Path) -> Columns:
+    """<trkpt lat lon> with <time> and optional <speed> (m/s)."""
+    cols = Columns()
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag.rsplit("}", 1)[-1] != "trkpt":
+            continue
+        t = speed = math.nan
+        for child in elem.iter():
+            tag = child.tag.rsplit("}", 1)[-1]
+            if tag == "time" and child.text:
+                t = _timestamp(child.text)
+            elif tag == "speed":
+                speed = _float(child.text)
+        if not math.isnan(t):
+            cols.append(t, speed, _float(elem.get("lat")), _float(elem.get("lon")))
+        elem.clear()
+    return cols
+
+
+def _nmea_degrees(value: str, hemisphere: str) -> float:
+    """ddmm.mmmm / dddmm.mmmm -> signed decimal degrees."""
+    num = _float(value) if value else math.nan
+    if math.isnan(num):
+        return num
+    degrees = math.floor(num / 100)
+    decimal = degrees + (num - degrees * 100) / 60
+    return -decimal if hemisphere in ("S", "W") else decimal
+
+
+def _hms(value: str) -> float:
+    value = value.strip()
+    if len(value) < 6:
+        return math.nan
+    try:
+        return int(value[:2]) * 3600 + int(value[2:4]) * 60 + float(value[4:])
+    except ValueError:
+        return math.nan
+
+
+def parse_nmea(path: Path) -> Columns:
+    """$xxRMC sentences: time of day, position and speed in knots. Void
+    fixes (status V) are skipped."""
+    cols = Columns()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("$"):
+                continue
+            fields = line.split("*", 1)[0].split(",")
+            if fields[0][3:] != "RMC" or len(fields) < 8 or fields[2] == "V":
+                continue
+            t, knots = _hms(fields[1]), _float(fields[7])
+            if math.isnan(t) or math.isnan(knots):
+                continue
+            cols.append(t, knots * 0.514444, _nmea_degrees(fields[3], fields[4]), _nmea_degrees(fields[5], fields[6]))
+    # Time of day -> seconds since the first fix, across midnight.
+    if len(cols.t):
+        t = np.frombuffer(cols.t, dtype=np.float64)
+        t -= t[0]
+        t[t < 0] += 86400
+    return cols
+
+
+def _find_column(header: List[str], names: Iterable[str]) -> int:
+    names = list(names)
+    for i, column in enumerate(header):
+        if any(name in column for name in names):
+            return i
+    return -1
+
+
+def parse_csv(path: Path) -> Columns:
+    """Header-named columns, matched like brake.html: a time column (seconds,
+    epoch seconds or ISO timestamps; 0.1 s per row if absent), a speed column
+    (m/s, or km/h / mph by header) and optional lat/lon."""
+    cols = Columns()
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        lines = (line for line in f if line.strip())
+        first = next(lines, None)
+        if first is None:
+            return cols
+        header = [h.strip().lower() for h in re.split(r"[,;\t]", first.rstrip("\r\n"))]
+        ti = _find_column(header, ("time", "timestamp", "seconds", "sec", "elapsed"))
+        si = _find_column(header, ("speed", "velocity", "gps_speed", "spd", "kph", "km/h", "mph", "m/s"))
+        lai, loi = _find_column(header, ("lat",)), _find_column(header, ("lon", "lng"))
+        scale = 1.0
+        if si >= 0 and re.search(r"k(m/h|ph)", header[si]):
+            scale = 1 / 3.6
+        elif si >= 0 and "mph" in header[si]:
+            scale = 0.44704
+        width = max(ti, si, lai, loi) + 1
+        for row, line in enumerate(lines, 1):
+            cells = re.split(r"[,;\t]", line.rstrip("\r\n"))
+            if len(cells) < width:
+                cells += [""] * (width - len(cells))
+            if ti >= 0:
+                t = _float(cells[ti])
+                if math.isnan(t):
+                    t = _timestamp(cells[ti])
+            else:
+                t = row * 0.1
+            cols.append(t, _float(cells[si]) * scale if si >= 0 else math.nan,
+                        _float(cells[lai]) if lai >= 0 else math.nan,
+                        _float(cells[loi]) if loi >= 0 else math.nan)
+    if ti >= 0 and len(cols.t):
+        # Absolute epoch times -> seconds since the first one.
+        t = np.frombuffer(cols.t, dtype=np.float64)
+        epoch = np.flatnonzero(t > 1e6)
+        if len(epoch):
+            t[epoch[0]:] -= t[epoch[0]]
+    return cols
+
+
+def parse_log(path: Path) -> Tuple[str, Columns]:
+    """Pick the parser by extension, then by content; returns (format, columns)."""
+    suffix = path.suffix.lower()
+    with open(path, "rb") as f:
+        head = f.read(4096).decode("utf-8", "replace")
+    if suffix == ".gpx" or re.search(r"<gpx", head, re.I):
+        return "gpx", parse_gpx(path)
+    if suffix in (".nmea", ".nma") or re.match(r"\s*\$G[PNLA]", head):
+        return "nmea", parse_nmea(path)
+    return "csv", parse_csv(path)
+
+
+# --- Processing (vectorized) ---
+
+def clean_track(cols: Columns) -> Optional[Dict[str, "np.ndarray"]]:
+    """Sorted, de-duplicated samples with a speed for every point (derived
+    from positions where the log has none), times starting at 0; None if
+    fewer than MIN_POINTS remain."""
+    t, v, lat, lon = cols.arrays()
+    keep = np.isfinite(t)
+    t, v, lat, lon = t[keep], v[keep], lat[keep], lon[keep]
+    order = np.argsort(t, kind="stable")
+    t, first = np.unique(t[order], return_index=True)
+    v, lat, lon = v[order][first], lat[order][first], lon[order][first]
+    missing = ~np.isfinite(v)
+    if missing.any() and np.isfinite(lat).all() and np.isfinite(lon).all():
+        v = np.where(missing, _derived_speed(t, lat, lon), v)
+    keep = np.isfinite(v)
+    t, v, lat, lon = t[keep], v[keep], lat[keep], lon[keep]
+    if len(t) < MIN_POINTS:
+        return None
+    return {"t": t - t[0], "v": v, "lat": lat, "lon": lon}
+
+
+def _moving_mean(x: "np.ndarray", half: int) -> "np.ndarray":
+    """Mean over [k - half, k + half], clipped at the ends (like brake.html)."""
+    window = np.ones(2 * half + 1)
+    # Direct window sums rather than a running cumsum, whose rounding error
+    # grows over a long session and would shift threshold crossings.
+    return np.convolve(x, window, mode="same") / np.convolve(np.ones(len(x)), window, mode="same")
+
+
+def detect_brake_zones(sv: "np.ndarray", step: float, entry: float = BRAKE_ENTRY_DECEL,
+                       min_drop_kmh: float = BRAKE_MIN_DROP_KMH) -> Dict[str, "np.ndarray"]:
+    """
+    Brake zones in a uniformly sampled, smoothed speed trace `sv` (m/s),
+    as arrays of start/end sample indexes, peak deceleration (m/s²) and
+    speed lost (m/s). Same rules as brake.html's detectGPS, on whole arrays.
+    """
+    n = len(sv)
+    dec = -np.diff(sv) / step                    # dec[j] is the decel into sample j + 1
+    hold = dec >= entry * BRAKE_HOLD_RATIO
+    edges = np.diff(np.concatenate(([0], hold.astype(np.int8), [0])))
+    run_start, run_end = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    # A zone starts at the first sample of a hold run that reaches the entry
+    # threshold and lasts to the end of that run.
+    entries = np.flatnonzero(dec >= entry)
+    if not len(entries):
+        empty = np.empty(0, dtype=np.int64)
+        return {"i0": empty, "i1": empty, "peak": np.empty(0), "lost": np.empty(0)}
+    pos = np.searchsorted(entries, run_start)
+    first = entries[np.minimum(pos, len(entries) - 1)]
+    valid = (pos < len(entries)) & (first <= run_end)
+    i0, i1 = first[valid], run_end[valid] + 1
+
+    bounds = np.column_stack((i0, i1 + 1)).ravel()
+    v_min = np.minimum.reduceat(np.append(sv, 0.0), bounds)[::2]
+    lost = sv[i0] - v_min
+    c = np.concatenate(([0.0], np.cumsum(sv)))
+    after_end = np.minimum(n - 1, i1 + BRAKE_REBOUND_SAMPLES)
+    after = (c[after_end + 1] - c[i1]) / (after_end - i1 + 1)
+    peak = np.maximum.reduceat(np.append(dec, 0.0), np.column_stack((i0, i1)).ravel())[::2]
+
+    keep = ((lost >= min_drop_kmh / 3.6)        # real speed shed, not noise
+            & (after - v_min <= 0.5 * lost)     # speed stays down (kerbs rebound)
+            & ((i1 - i0) * step >= BRAKE_MIN_DURATION))
+    i0, i1, peak, lost = i0[keep], i1[keep], peak[keep], lost[keep]
+
+    # Merge zones that start within BRAKE_MERGE_GAP of the previous one's end.
+    if len(i0) > 1:
+        new_group = np.concatenate(([True], (i0[1:] - np.maximum.accumulate(i1)[:-1]) * step > BRAKE_MERGE_GAP))
+        starts = np.flatnonzero(new_group)
+        i0, i1 = i0[starts], np.maximum.reduceat(i1, starts)
+        peak, lost = np.maximum.reduceat(peak, starts), np.maximum.reduceat(lost, starts)
+    return {"i0": i0, "i1": i1, "peak": peak, "lost": lost}
+
+
+def align_laps(x: "np.ndarray", y: "np.ndarray", lap_times: List[float], step: float) -> Optional[Tuple[int, "np.ndarray", float]]:
+    """
+    Place the recorded lap times on the trace: every offset on the sample
+    grid is tried at once, and the one whose lap boundaries are most tightly
+    clustered in space (x, y in metres) wins. Returns (offset in samples,
+    boundary sample indexes relative to it, RMS scatter in metres) or None
+    if the laps don't fit or don't line up.
+    """
+    bounds = np.rint(np.concatenate(([0.0], np.cumsum(lap_times))) / step).astype(np.int64)
+    offsets = np.arange(len(x) - bounds[-1])
+    if len(offsets) == 0 or len(bounds) < 3:
+        return None
+    idx = offsets[:, None] + bounds[None, :]
+    px, py = x[idx], y[idx]
+    scatter = ((px - px.mean(axis=1, keepdims=True)) ** 2 + (py - py.mean(axis=1, keepdims=True)) ** 2).mean(axis=1)
+    best = int(np.argmin(scatter))
+    rms = float(math.sqrt(scatter[best]))
+    if rms > LAP_ALIGN_MAX_RMS_M:
+        return None
+    return best, bounds, rms
+
+
+def session_lap_times(session_data: Dict[str, Any]) -> List[float]:
+    """The longest run of consecutive valid lap times in a session file."""
+    best: List[float] = []
+    run: List[float] = []
+    for lap_entry in session_data.get("laps", []):
+        seconds = parse_time_to_seconds(lap_entry.get("time")) if isinstance(lap_entry, dict) else None
+        if seconds is not None and 0 < seconds < 600:
+            run.append(seconds)
+            if len(run) > len(best):
+                best = list(run)
+        else:
+            run = []
+    return best
+
+
+def _rounded(values: "np.ndarray", digits: int) -> List[Optional[float]]:
+    rounded = np.round(values, digits)
+    return [None if math.isnan(r) else r for r in rounded.tolist()]
+
+
+def build_artifact(track: Dict[str, "np.ndarray"], lap_times: List[float]) -> Dict[str, Any]:
+    """The telemetry artifact for one cleaned track (see module docstring)."""
+    step = 1.0 / RESAMPLE_HZ
+    t = track["t"]
+    n = max(2, int(round(t[-1] / step)) + 1)
+    grid = np.arange(n) * step
+    v = np.interp(grid, t, track["v"])
+    sv = _moving_mean(v, SMOOTH_SAMPLES)
+
+    # Distance integrates the speed: summing hops between noisy fixes at
+    # 10-25 Hz overstates it badly, and derived speeds are those hops anyway.
+    dist = np.concatenate(([0.0], np.cumsum((track["v"][1:] + track["v"][:-1]) / 2 * np.diff(t))))
+    distance = np.interp(grid, t, dist)
+    has_pos = bool(np.isfinite(track["lat"]).all() and np.isfinite(track["lon"]).all())
+    if has_pos:
+        lat, lon = np.interp(grid, t, track["lat"]), np.interp(grid, t, track["lon"])
+
+    zones = detect_brake_zones(sv, step)
+    zone_lap = np.full(len(zones["i0"]), -1)
+    laps: List[Dict[str, Any]] = []
+    alignment = None
+    if has_pos and lap_times:
+        mid_lat = math.radians(float(lat.mean()))
+        x = np.radians(lon) * EARTH_RADIUS_M * math.cos(mid_lat)
+        y = np.radians(lat) * EARTH_RADIUS_M
+        alignment = align_laps(x, y, lap_times, step)
+    if alignment is not None:
+        offset, bounds, rms = alignment
+        edges = offset + bounds
+        zone_lap = np.searchsorted(edges, zones["i0"], side="right") - 1
+        zone_lap[zone_lap >= len(lap_times)] = -1
+        for k in range(len(lap_times)):
+            a, b = edges[k], edges[k + 1]
+            laps.append({
+                "lap": k + 1,
+                "start_s": round(a * step, 2),
+                "end_s": round(b * step, 2),
+                "distance_m": round(float(distance[b] - distance[a]), 1),
+                "vmax_kmh": round(float(v[a:b + 1].max()) * 3.6, 1),
+                "vmin_kmh": round(float(v[a:b + 1].min()) * 3.6, 1),
+                "brake_zones": int(np.count_nonzero(zone_lap == k)),
+            })
+
+    brake_zones = []
+    for j in range(len(zones["i0"])):
+        a, b = int(zones["i0"][j]), int(zones["i1"][j])
+        zone: Dict[str, Any] = {
+            "start_s": round(a * step, 2),
+            "end_s": round(b * step, 2),
+            "entry_kmh": round(float(sv[a]) * 3.6, 1),
+            "lost_kmh": round(float(zones["lost"][j]) * 3.6, 1),
+            "peak_decel": round(float(zones["peak"][j]), 2),
+        }
+        if zone_lap[j] >= 0:
+            lap_start = alignment[0] + alignment[1][zone_lap[j]]
+            zone["lap"] = int(zone_lap[j]) + 1
+            zone["at_m"] = round(float(distance[a] - distance[lap_start]), 1)
+        brake_zones.append(zone)
+
+    series: Dict[str, Any] = {
+        "speed_kmh": _rounded(v * 3.6, 1),
+        "distance_m": _rounded(distance, 1),
+    }
+    if has_pos:
+        series["lat"] = _rounded(lat, 6)
+        series["lon"] = _rounded(lon, 6)
+    return {
+        "rate_hz": RESAMPLE_HZ,
+        "samples": n,
+        "duration_s": round(float(grid[-1]), 2),
+        "distance_m": round(float(distance[-1]), 1),
+        "vmax_kmh": round(float(v.max()) * 3.6, 1),
+        "lap_offset_s": round(alignment[0] * step, 2) if alignment else None,
+        "lap_alignment_rms_m": round(alignment[2], 2) if alignment else None,
+        "laps": laps,
+        "brake_zones": brake_zones,
+        "series": series,
+    }
+
+
+# --- Driver ---
+
+def _file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ingest_log(path: Path, known_sha1: Optional[str]) -> Tuple[str, Optional[Dict[str, Any]], Dict[str, float]]:
+    """
+    Work unit; runs in a pool worker under --jobs. Returns (status, artifact,
+    timings): status is "unchanged" when the log's hash is `known_sha1`,
+    "failed" (artifact None) when it can't be read or has no speed data,
+    else "processed".
+    """
+    timings = {"parse": 0.0, "compute": 0.0}
+    sha1 = _file_sha1(path)
+    if sha1 == known_sha1:
+        return "unchanged", None, timings
+    session_file = SESSIONS_DIR / f"{path.stem}.json"
+    started = time.perf_counter()
+    try:
+        session_data = json.loads(session_file.read_text(encoding="utf-8"))
+        fmt, cols = parse_log(path)
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"Error reading {path}: {e}")
+        return "failed", None, timings
+    parsed = time.perf_counter()
+    track = clean_track(cols)
+    if track is None:
+        print(f"[SKIP] {path.name}: no usable speed data")
+        return "failed", None, timings
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "session_id": path.stem,
+        "source": path.name,
+        "source_sha1": sha1,
+        "format": fmt,
+        "points": int(len(track["t"])),
+        **build_artifact(track, session_lap_times(session_data)),
+    }
+    timings["parse"] = parsed - started
+    timings["compute"] = time.perf_counter() - parsed
+    return "processed", artifact, timings
+
+
+def find_logs(paths: List[Path]) -> List[Path]:
+    """Log files under `paths` (files or directories) that belong to an
+    existing session file, sorted by name."""
+    logs = []
+    for root in paths:
+        candidates = sorted(root.iterdir()) if root.is_dir() else [root]
+        for path in candidates:
+            if not path.is_file() or path.suffix.lower() not in LOG_SUFFIXES:
+                continue
+            if not (SESSIONS_DIR / f"{path.stem}.json").is_file():
+                print(f"[SKIP] {path.name}: no session file {SESSIONS_DIR / (path.stem + '.json')}")
+                continue
+            logs.append(path)
+    return logs
+
+
+def known_source_hash(session_id: str) -> Optional[str]:
+    """The source hash recorded in an up-to-date artifact, if there is one."""
+    try:
+        artifact = json.loads((ARTIFACT_DIR / f"{session_id}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get("version") != ARTIFACT_VERSION:
+        return None
+    return artifact.get("source_sha1")
+
+
+def ingest_all(paths: List[Path], jobs: int = 1, force: bool = False) -> bool:
+    """Ingest every log under `paths`. Returns False if the artifacts or
+    session links couldn't be written; logs that fail to parse are reported
+    and counted, but don't fail the run."""
+    METRICS.stage("scan")
+    logs = find_logs(paths)
+    known = [None if force else known_source_hash(path.stem) for path in logs]
+    print(f"Ingesting {len(logs)} telemetry log(s) with {jobs} worker(s)…")
+
+    METRICS.stage("process")
+    if jobs > 1 and len(logs) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(ingest_log, logs, known))
+    else:
+        results = [ingest_log(path, sha1) for path, sha1 in zip(logs, known)]
+
+    METRICS.stage("write")
+    writes = WriteBatch()
+    counts = {"processed": 0, "unchanged": 0, "failed": 0}
+    for path, (status, artifact, timings) in zip(logs, results):
+        counts[status] += 1
+        for step, seconds in timings.items():
+            METRICS.add_time(f"process.{step}", seconds)
+        artifact_path = ARTIFACT_DIR / f"{path.stem}.json"
+        if status == "failed":
+            continue
+        if artifact is not None:
+            writes.stage_json(artifact_path, artifact, preserve_format=False, indent=None, separators=(",", ":"))
+            payload = writes.staged(artifact_path)
+            METRICS.count("brake_zones", len(artifact["brake_zones"]))
+            print(f"[OK]   {path.name}: {artifact['points']} pts ({artifact['format']}), "
+                  f"{artifact['duration_s']:.0f}s, {len(artifact['laps'])} lap(s), "
+                  f"{len(artifact['brake_zones'])} brake zone(s)")
+        else:
+            payload = artifact_path.read_bytes()
+        # Link the artifact from the session file (hash for ?v= cache-busting);
+        # also restores a link that went missing while the log didn't change.
+        link = {"file": f"{ARTIFACT_DIR.name}/{artifact_path.name}", "hash": hashlib.sha1(payload).hexdigest()[:12]}
+        session_file = SESSIONS_DIR / f"{path.stem}.json"
+        session_data = json.loads(session_file.read_text(encoding="utf-8"))
+        if session_data.get("telemetry") != link:
+            session_data["telemetry"] = link
+            writes.stage_json(session_file, session_data, indent=2)
+    try:
+        writes.flush()
+    except OSError as e:
+        print(f"Error writing files: {e}")
+        return False
+    finally:
+        METRICS.stage(None)
+    METRICS.count("logs_scanned", len(logs))
+    for status, n in counts.items():
+        METRICS.count(f"logs_{status}", n)
+    METRICS.count("files_written", len(writes.written))
+    print(f"SUCCESS: {counts['processed']} processed, {counts['unchanged']} unchanged, "
+          f"{counts['failed']} failed; {len(writes.written)} file(s) written.")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Turn GPX/NMEA/CSV telemetry logs into per-session artifacts.")
+    parser.add_argument("paths", nargs="*", type=Path, default=[TELEMETRY_DIR],
+                        help=f"log files or directories of logs (default {TELEMETRY_DIR}/)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (default 1)")
+    parser.add_argument("--force", action="store_true", help="reprocess logs whose artifact is up to date")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="write a JSON run report (stage timings, counters)")
+    parser.add_argument("--profile", nargs="?", const="ingest_telemetry.prof", metavar="FILE",
+                        help="run under cProfile and dump the stats to FILE (default %(const)s)")
+    args = parser.parse_args()
+    if np is None:
+        sys.exit("Error: ingest_telemetry.py needs numpy (pip install numpy).")
+    if args.metrics_out:
+        METRICS.enable()
+
+    def run() -> bool:
+        return ingest_all(args.paths, jobs=max(1, args.jobs), force=args.force)
+
+    ok = run_profiled(run, Path(args.profile)) if args.profile else run()
+    if args.metrics_out:
+        METRICS.write_report(Path(args.metrics_out), "ingest_telemetry.py",
+                             {**vars(args), "paths": [str(p) for p in args.paths]})
+    sys.exit(0 if ok else 1)
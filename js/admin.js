@@ -736,6 +736,11 @@ function renderVenues() {
       <button type="button" class="row-btn" title="Move up" onclick="moveVenue(${i}, -1)" ${i === 0 ? 'disabled' : ''}>▲</button>
       <button type="button" class="row-btn" title="Move down" onclick="moveVenue(${i}, 1)" ${i === venues.length - 1 ? 'disabled' : ''}>▼</button>
       <button type="button" class="row-btn row-del" title="Remove venue" onclick="removeVenue(${i})">✕</button>
+      <div class="venue-link">
+        <input type="text" value="${escHtml(v.track || '')}" placeholder="Track (fills laps from sessions)" list="track-options" autocomplete="off" onchange="setVenueLink(${i}, 'track', this.value)">
+        <input type="text" value="${escHtml(v.configuration || '')}" placeholder="Any configuration" list="config-options" autocomplete="off" onchange="setVenueLink(${i}, 'configuration', this.value)">
+        <input type="date" value="${escHtml(v.date || '')}" title="Race day; blank for the whole season" onchange="setVenueLink(${i}, 'date', this.value)">
+      </div>
     </div>
   `).join('');
 }
@@ -766,6 +771,17 @@ function renameVenue(i, newLabelRaw) {
 function setVenueColor(i, val) { currentSeason.venues[i].color = val; }
 function setVenueDone(i, val) { currentSeason.venues[i].done = val; }
 
+// Links a venue to the session index: championship.py fills in each driver's
+// best session lap at `track` (and `configuration`) on `date`. Blank removes
+// the key, so unlinked venues keep using the typed-in times only.
+function setVenueLink(i, key, val) {
+  const venue = currentSeason.venues[i];
+  const trimmed = val.trim();
+  if (trimmed) venue[key] = trimmed;
+  else delete venue[key];
+  if (key === 'track') renderTimesTable();
+}
+
 function moveVenue(i, dir) {
   const arr = currentSeason.venues;
   const j = i + dir;
@@ -872,7 +888,7 @@ function renderTimesTable() {
       ${drivers.map((d, di) => `
         <tr>
           <td>${escHtml(d)}</td>
-          ${venues.map((v, vi) => `<td><input type="text" placeholder="00:00.000" value="${escHtml(times[v.label]?.[d] || '')}" onchange="setTime(${vi}, ${di}, this.value)"></td>`).join('')}
+          ${venues.map((v, vi) => `<td><input type="text" placeholder="${v.track ? 'session best' : '00:00.000'}" value="${escHtml(times[v.label]?.[d] || '')}" onchange="setTime(${vi}, ${di}, this.value)"></td>`).join('')}
         </tr>
       `).join('')}
     </tbody>
@@ -1784,7 +1784,7 @@ function handleTooltipInteraction(clientX, clientY) {
                 ${driverLabel}
                 <span class="tooltip-lap">Lap ${point.lapNumber}</span>
               </div>
-              <div class="tooltip-time">${point.lap.time}</div>
+              <div class="tooltip-time">${typeof point.lap.time === 'number' ? formatTime(point.lap.time) : point.lap.time}</div>
               ${point.lap.best ? '<div class="tooltip-best">★ Best Lap</div>' : ''}
               <div class="tooltip-delta">Delta: ${deltaStr}</div>
               <div class="tooltip-footer">
@@ -1847,6 +1847,76 @@ function hideTooltip() {
 }
 // ===== SESSION COMPARISON =====
 
+// Per track-configuration comparison bundles written by generate_list.py:
+// lookup.json maps session ids to bundles; each bundle holds the lap times,
+// video offsets and metadata of every session at that configuration.
+const COMPARE_DIR = 'sessions/compare';
+let compareLookupPromise = null;
+const compareBundlePromises = {};
+
+function loadCompareLookup() {
+  if (!compareLookupPromise) {
+    compareLookupPromise = fetch(`${COMPARE_DIR}/lookup.json`, { cache: 'no-cache' })
+      .then(r => r.ok ? r.json() : null)
+      .catch(() => null);
+  }
+  return compareLookupPromise;
+}
+
+function loadCompareBundle(bundle) {
+  // The ?v=<hash> URL changes whenever the bundle does, so the normal HTTP
+  // cache can serve repeat comparisons.
+  const url = `${COMPARE_DIR}/${bundle.file}?v=${bundle.hash}`;
+  if (!compareBundlePromises[url]) {
+    compareBundlePromises[url] = fetch(url)
+      .then(r => r.ok ? r.json() : Promise.reject(`Bundle ${bundle.file} not found`));
+  }
+  return compareBundlePromises[url];
+}
+
+/**
+* Rebuild a session record from its bundle entry, in the shape of a session file
+*/
+function sessionFromBundle(bundle, id) {
+  const entry = bundle.sessions[id];
+  if (!entry) return null;
+  return {
+    id,
+    driver: bundle.drivers[entry.driver],
+    session_date: entry.date,
+    kart: entry.kart,
+    track: { name: bundle.track, configuration: bundle.configuration },
+    video_url: entry.video_url || '',
+    video_start_time: entry.video_start ?? '0:00',
+    laps: entry.laps.map((time, i) => ({
+      lap: entry.lap_numbers ? entry.lap_numbers[i] : i + 1,
+      time
+    }))
+  };
+}
+
+function fetchSessionFile(id) {
+  return fetch(`sessions/${id}.json`, { cache: 'no-cache' })
+    .then(r => r.ok ? r.json() : Promise.reject(`Session ${id} not found`))
+    .then(data => ({ ...data, id: data.id || id }))
+    .catch(err => ({ error: err }));
+}
+
+/**
+* Fetch comparison sessions: one request per bundle, falling back to the
+* session file for ids that aren't in a bundle
+*/
+async function fetchComparisonSessions(ids) {
+  const lookup = await loadCompareLookup();
+  return Promise.all(ids.map(id => {
+    const index = lookup ? lookup.sessions[id] : undefined;
+    if (index === undefined) return fetchSessionFile(id);
+    return loadCompareBundle(lookup.bundles[index])
+      .then(bundle => sessionFromBundle(bundle, id) || fetchSessionFile(id))
+      .catch(() => fetchSessionFile(id));
+  }));
+}
+
 /**
 * Compare sessions
 */
@@ -1883,19 +1953,12 @@ async function compareSession() {
   }
 
   // Fetch all comparison sessions
-  const fetchPromises = sessionIds.map(id =>
-    fetch(`sessions/${id}.json`, { cache: 'no-cache' })
-      .then(r => r.ok ? r.json() : Promise.reject(`Session ${id} not found`))
-      .catch(err => ({ error: err }))
-  );
-
-  const results = await Promise.all(fetchPromises);
+  const results = await fetchComparisonSessions(sessionIds);
   const successfulSessions = results.filter(r => !r.error);
   const errorSessions = results.filter(r => r.error);
 
   // Process successful sessions
   successfulSessions.forEach(sessionData => {
-    sessionData.id = sessionData.id || sessionIds[successfulSessions.indexOf(sessionData)];
     const compareLaps = validateLapData(sessionData.laps);
     const compareTimes = compareLaps.map(l => parseTime(l.time));
     const compareFastest = compareTimes.length > 0 ? Math.min(...compareTimes) : 0;
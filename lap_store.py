@@ -0,0 +1,135 @@
+"""
+Reader for the packed lap store written by generate_list.py.
+
+sessions/laps.bin holds the lap times of every session as little-endian
+float64 seconds, back to back. A lap whose time isn't a number (or whose
+entry isn't an object) is NaN, so lap indexes match the session file. sessions/laps-index.json lists the
+sessions in file order:
+
+  {"format": "laps-v1", "dtype": "<f8", "file": "laps.bin", "hash": "<sha1[:12]>",
+   "ids": ["<session id>", ...], "offsets": [0, 14, 31, ...]}
+
+Session i's laps are elements offsets[i] .. offsets[i+1] - 1, i.e. bytes
+offsets[i] * 8 .. offsets[i+1] * 8 - 1. The browser can fetch one session
+with `Range: bytes=<first>-<last>` on laps.bin?v=<hash> and read the
+response as a Float64Array.
+
+LapStore maps laps.bin read-only, so opening it only parses the index, and
+laps(id) returns a zero-copy NumPy view into the mapping. No lap is read
+from disk until it is used. Without NumPy, laps(id) returns a memoryview of
+doubles instead.
+
+Run standalone:  python lap_store.py [SESSION_ID ...]
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from generate_list import LAP_INDEX_FILE, LAP_STORE_FORMAT
+
+LAP_BYTES = 8
+
+
+class LapStore:
+    """Memory-mapped view of laps.bin, addressed by session id."""
+
+    def __init__(self, index_file: Path = LAP_INDEX_FILE) -> None:
+        index = json.loads(Path(index_file).read_text(encoding="utf-8"))
+        if index.get("format") != LAP_STORE_FORMAT:
+            raise ValueError(f"{index_file}: unsupported lap store format {index.get('format')!r}")
+        self.ids: List[str] = index["ids"]
+        self.offsets: List[int] = index["offsets"]
+        self.hash: Optional[str] = index.get("hash")
+        self.path = Path(index_file).with_name(index["file"])
+        # A session id that appears twice (copied files) resolves to the first.
+        self.positions: Dict[str, int] = {}
+        for i, session_id in enumerate(self.ids):
+            self.positions.setdefault(session_id, i)
+
+        self._file = open(self.path, "rb")
+        size = self.path.stat().st_size
+        if size != self.offsets[-1] * LAP_BYTES:
+            self._file.close()
+            raise ValueError(f"{self.path}: {size} B, index expects {self.offsets[-1] * LAP_BYTES} B (stale store?)")
+        # mmap can't map an empty file.
+        self._map: Any = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if np is not None:
+            self.all_laps = np.frombuffer(self._map, dtype="<f8")
+        else:
+            self.all_laps = memoryview(self._map).cast("d") if sys.byteorder == "little" else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.positions
+
+    def laps(self, session_id: str) -> Any:
+        """Lap times of a session in seconds (NaN for unparsable laps), as a
+        read-only view into the mapped file. KeyError for unknown ids."""
+        i = self.positions[session_id]
+        first, last = self.offsets[i], self.offsets[i + 1]
+        if self.all_laps is None:
+            # Big-endian host without NumPy: decode a copy instead.
+            return struct.unpack(f"<{last - first}d", self._map[first * LAP_BYTES:last * LAP_BYTES])
+        return self.all_laps[first:last]
+
+    def byte_range(self, session_id: str) -> Optional[Tuple[int, int]]:
+        """(first, last) byte offsets of a session's laps for an HTTP Range
+        header, or None if it has no laps."""
+        i = self.positions[session_id]
+        first, last = self.offsets[i], self.offsets[i + 1]
+        return (first * LAP_BYTES, last * LAP_BYTES - 1) if last > first else None
+
+    def close(self) -> None:
+        """Unmap the file. Views handed out earlier keep the mapping alive,
+        in which case it is released when the last of them is gone."""
+        self.all_laps = None
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+        self._file.close()
+
+    def __enter__(self) -> "LapStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=f"Print lap times from the packed lap store ({LAP_INDEX_FILE}).")
+    parser.add_argument("ids", nargs="*", metavar="SESSION_ID", help="sessions to print (default: a summary)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with LapStore() as store:
+        opened = time.perf_counter() - started
+        for session_id in args.ids:
+            try:
+                laps = store.laps(session_id)
+            except KeyError:
+                print(f"[SKIP] {session_id}: not in {LAP_INDEX_FILE}")
+                continue
+            print(f"{session_id}: {len(laps)} lap(s) at bytes {store.byte_range(session_id)}: "
+                  + ", ".join(f"{t:.3f}" for t in laps))
+        if not args.ids:
+            print(f"SUCCESS: {store.path} holds {store.offsets[-1]:,} laps of {len(store):,} sessions "
+                  f"(hash {store.hash}); opened in {opened * 1000:.1f} ms.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Run instrumentation shared by the generator scripts (generate_list.py,
+check_videos.py).
+
+METRICS collects stage timings, counters, per-endpoint HTTP call counts with
+latency histograms, and cache hit ratios. It is written out as a JSON run
+report by --metrics-out. Until enable() is called every recording method
+returns immediately, so the hooks left in the scripts cost a method call and
+nothing more.
+
+Stages form a sequential clock: stage("x") ends the running stage and starts
+"x", so a script marks its stages with one call each instead of wrapping
+blocks.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from write_batch import atomic_write_bytes
+
+# Upper bounds (ms) of the HTTP latency histogram buckets; slower calls land
+# in the final "+inf" bucket.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PROFILE_TOP = 25  # functions listed in the --profile console summary
+
+
+class RunMetrics:
+    """Collects one run's measurements; thread-safe for the HTTP/counter calls."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.started_at: Optional[datetime] = None
+        self.started = 0.0
+        self.stages: Dict[str, float] = {}
+        self.current: Optional[str] = None
+        self.stage_started = 0.0
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.counters: Counter = Counter()
+        self.http_calls: Dict[str, Dict[str, Any]] = {}
+        self.caches: Dict[str, Counter] = defaultdict(Counter)
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+
+    def stage(self, name: Optional[str]) -> None:
+        """End the running stage and start `name` (None just ends it)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.current is not None:
+            self.stages[self.current] = self.stages.get(self.current, 0.0) + now - self.stage_started
+        self.current, self.stage_started = name, now
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Accumulate time for a sub-step measured by the caller (e.g. per-file
+        read/decode inside a stage, possibly summed across worker processes)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.timers[name] += seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += n
+
+    def cache(self, name: str, hits: int = 0, misses: int = 0) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.caches[name]["hits"] += hits
+            self.caches[name]["misses"] += misses
+
+    def http(self, endpoint: str, seconds: float, status: Any) -> None:
+        """Record one HTTP call: its latency and its outcome (an HTTP status
+        code, or a short error label when no response came back)."""
+        if not self.enabled:
+            return
+        ms = seconds * 1000
+        bucket = next((f"<={b}" for b in LATENCY_BUCKETS_MS if ms <= b), "+inf")
+        with self.lock:
+            entry = self.http_calls.get(endpoint)
+            if entry is None:
+                entry = self.http_calls[endpoint] = {
+                    "calls": 0, "total_s": 0.0, "max_s": 0.0,
+                    "status": Counter(), "histogram_ms": Counter(),
+                }
+            entry["calls"] += 1
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+            entry["status"][str(status)] += 1
+            entry["histogram_ms"][bucket] += 1
+
+    def report(self, script: str, args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.stage(None)
+        http = {}
+        for endpoint, e in sorted(self.http_calls.items()):
+            http[endpoint] = {
+                "calls": e["calls"],
+                "total_s": round(e["total_s"], 4),
+                "mean_ms": round(e["total_s"] * 1000 / e["calls"], 2),
+                "max_ms": round(e["max_s"] * 1000, 2),
+                "status": dict(sorted(e["status"].items())),
+                "histogram_ms": {b: e["histogram_ms"].get(b, 0)
+                                 for b in [f"<={b}" for b in LATENCY_BUCKETS_MS] + ["+inf"]},
+            }
+        caches = {}
+        for name, c in sorted(self.caches.items()):
+            lookups = c["hits"] + c["misses"]
+            caches[name] = {"hits": c["hits"], "misses": c["misses"],
+                            "hit_ratio": round(c["hits"] / lookups, 4) if lookups else None}
+        return {
+            "script": script,
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "duration_s": round(time.perf_counter() - self.started, 4),
+            "args": args or {},
+            "stages_s": {k: round(v, 4) for k, v in self.stages.items()},
+            "timers_s": {k: round(v, 4) for k, v in sorted(self.timers.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "http": http,
+            "caches": caches,
+        }
+
+    def write_report(self, path: Path, script: str, args: Optional[Dict[str, Any]] = None) -> None:
+        report = self.report(script, args)
+        atomic_write_bytes(Path(path), (json.dumps(report, indent=2) + "\n").encode("utf-8"))
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in report["stages_s"].items())
+        print(f"SUCCESS: Wrote run report {path} ({report['duration_s']:.2f}s: {stages})")
+
+
+METRICS = RunMetrics()
+
+
+def run_profiled(fn: Callable[[], Any], out_path: Path) -> Any:
+    """Run fn() under cProfile, dump the stats to `out_path` (for pstats or
+    snakeviz) and print the top functions by cumulative time."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        profiler.dump_stats(str(out_path))
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(buf.getvalue())
+        print(f"SUCCESS: Wrote profile {out_path}")
@@ -0,0 +1,219 @@
+"""
+Near-duplicate finder for driver and track names.
+
+generate_list.py already folds spellings that normalize to the same key
+("Ignas M" -> "Ignas M."). This script finds the ones that don't, such as
+typos like "Povilsa L." for "Povilas L.", and proposes them as aliases in
+sessions/name-aliases.json. Nothing is merged until a proposal is in that
+file, so every merge goes through review (a git diff). The generator applies
+the file on every run.
+
+Candidates come from a symmetric-deletion index over the normalized keys.
+Every key is indexed under itself and each string obtained by deleting up to
+max_edits(key) characters. Two keys within that edit distance always share
+one of these variants, so candidate pairs come from the index buckets rather
+than from comparing every pair of names. Each pair is then checked with a
+bounded optimal-string-alignment distance, where a swap of adjacent
+characters counts as one edit. Pairs that differ in a whole initial or number
+token ("Ignas M." / "Ignas K.", "Track 2" / "Track 3") are never proposed.
+
+Alias file layout:
+  {
+    "drivers":  {"Povilsa L.": "Povilas L."},   # variant -> name it joins
+    "tracks":   {},
+    "rejected": {"drivers": [["Ignas M.", "Ignas K."]], "tracks": []}
+  }
+
+To turn down a proposal, move its pair to "rejected" instead of deleting it,
+so later runs don't propose it again.
+
+Run standalone:  python name_aliases.py [--write]
+"""
+
+import argparse
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from generate_list import (NAME_ALIASES_FILE, _norm_key, build_canonical_map, list_session_files,
+                           load_name_aliases, load_session_file, raw_session_names)
+from write_batch import WriteBatch
+
+KINDS = ("drivers", "tracks")
+
+
+def max_edits(key: str) -> int:
+    """Edits allowed between two keys, by the length of the shorter one: short
+    names are too close to each other for any fuzziness."""
+    if len(key) < 5:
+        return 0
+    return 1 if len(key) < 10 else 2
+
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions), or limit + 1 as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and before[j - 2] + 1 < d:
+                d = before[j - 2] + 1
+            cur[j] = d
+            row_min = min(row_min, d)
+        if row_min > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return prev[-1]
+
+
+def _deletions(key: str, depth: int) -> Set[str]:
+    """`key` and every string made by deleting up to `depth` characters from it."""
+    variants = {key}
+    frontier = {key}
+    for _ in range(depth):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+class NearDuplicateIndex:
+    """Symmetric-deletion index over normalized keys (see module docstring)."""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[str, List[str]] = defaultdict(list)
+
+    def add(self, key: str) -> None:
+        for variant in _deletions(key, max_edits(key)):
+            self.buckets[variant].append(key)
+
+    def pairs(self) -> Iterable[Tuple[str, str, int]]:
+        """Every pair of indexed keys within max_edits() of each other, as
+        (key, key, distance), each pair once."""
+        seen: Set[Tuple[str, str]] = set()
+        for variant, keys in self.buckets.items():
+            if len(keys) < 2:
+                continue
+            for a, b in combinations(keys, 2):
+                limit = max_edits(min(a, b, key=len))
+                # A pair only counts in a bucket both keys reach within the limit.
+                if len(a) - len(variant) > limit or len(b) - len(variant) > limit:
+                    continue
+                pair = (a, b) if a < b else (b, a)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                distance = osa_distance(a, b, limit)
+                if distance <= limit:
+                    yield a, b, distance
+
+
+def _tokens(name: str) -> List[str]:
+    return [_norm_key(t) for t in name.split() if _norm_key(t)]
+
+
+def distinct_by_token(a: str, b: str) -> bool:
+    """True if the two names differ in an initial or a number: a token of at
+    most two characters, or a numeric token. "Ignas M." / "Ignas K." name
+    different people, so no edit distance makes them aliases."""
+    ta, tb = _tokens(a), _tokens(b)
+    if len(ta) != len(tb):
+        return False
+    return any(x != y and (min(len(x), len(y)) <= 2 or x.isdigit() or y.isdigit())
+               for x, y in zip(ta, tb))
+
+
+def find_aliases(names: List[Optional[str]], rejected: Iterable[Iterable[str]] = ()) -> List[Tuple[str, str, int]]:
+    """
+    Propose (variant, target, distance) aliases among raw `names`, one entry
+    per name occurrence. Exact-key variants are folded first, as the generator
+    does. Each variant group is then paired with its near duplicates, and the
+    less common spelling is proposed as an alias of the more common one.
+    A name is proposed as a variant at most once, and never when it is
+    already another proposal's target. Pairs listed in `rejected` are skipped.
+    """
+    canon = build_canonical_map(names)
+    counts = Counter(canon[n] for n in names if n)
+    by_key = {_norm_key(name): name for name in counts}
+    skip = {frozenset(pair) for pair in rejected}
+
+    index = NearDuplicateIndex()
+    for key in by_key:
+        index.add(key)
+
+    candidates = []
+    for a, b, distance in index.pairs():
+        name_a, name_b = by_key[a], by_key[b]
+        if frozenset((name_a, name_b)) in skip or distinct_by_token(name_a, name_b):
+            continue
+        # The more common spelling wins; ties go to the longer, then the first.
+        variant, target = sorted((name_a, name_b), key=lambda n: (counts[n], len(n), n))
+        candidates.append((distance, -counts[target], variant, target))
+
+    proposals: List[Tuple[str, str, int]] = []
+    variants: Set[str] = set()
+    targets: Set[str] = set()
+    for distance, _, variant, target in sorted(candidates):
+        if variant in variants or variant in targets or target in variants:
+            continue
+        variants.add(variant)
+        targets.add(target)
+        proposals.append((variant, target, distance))
+    return proposals
+
+
+def scan_names() -> Dict[str, List[Optional[str]]]:
+    """Raw driver and track names of every session file."""
+    names: Dict[str, List[Optional[str]]] = {kind: [] for kind in KINDS}
+    for filepath in list_session_files():
+        session_data = load_session_file(filepath)
+        if session_data is None:
+            continue
+        driver, track = raw_session_names(session_data)
+        names["drivers"].append(driver)
+        names["tracks"].append(track)
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=f"Propose driver/track name aliases for {NAME_ALIASES_FILE}.")
+    parser.add_argument("--write", action="store_true",
+                        help=f"add the new proposals to {NAME_ALIASES_FILE} (existing entries are kept)")
+    args = parser.parse_args()
+
+    aliases = load_name_aliases()
+    names = scan_names()
+    changed = False
+    for kind in KINDS:
+        started = time.perf_counter()
+        proposals = find_aliases(names[kind], aliases["rejected"][kind])
+        elapsed = time.perf_counter() - started
+        distinct = len({n for n in names[kind] if n})
+        new = [(v, t, d) for v, t, d in proposals if v not in aliases[kind]]
+        print(f"  [aliases] {kind}: {distinct} distinct name(s), {len(proposals)} near-duplicate(s), "
+              f"{len(new)} new, in {elapsed:.2f}s")
+        for variant, target, distance in new:
+            print(f"    {variant!r} -> {target!r} (distance {distance})")
+            aliases[kind][variant] = target
+            changed = True
+
+    if not args.write:
+        if changed:
+            print(f"Run with --write to add these to {NAME_ALIASES_FILE} for review.")
+        return
+    writes = WriteBatch()
+    writes.stage_json(NAME_ALIASES_FILE, aliases, indent=2, trailing_newline=True)
+    written, _ = writes.flush()
+    print(f"SUCCESS: {'Updated' if written else 'Unchanged'} {NAME_ALIASES_FILE}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Local preview server for the static site, a drop-in for
+`python -m http.server` that behaves like a real static host:
+
+  - strong ETags (content hashes) and Last-Modified on every file, answering
+    If-None-Match / If-Modified-Since with 304 Not Modified. The pages fetch
+    their JSON with cache: 'no-cache', so a reload of unchanged data costs
+    a round trip instead of a full download.
+  - precompressed siblings: if the client accepts br or gzip and
+    <file>.br / <file>.gz exists and is at least as new as <file>
+    (generate_list.py --compact writes them), the sibling is sent with
+    Content-Encoding and Vary: Accept-Encoding.
+  - single byte-range requests (Range / If-Range) with 206 and 416 answers.
+
+ETags are cached by (size, mtime), so a file is only hashed again after it
+changes. Run it next to `generate_list.py --watch` to preview edits as they
+are rebuilt.
+
+Run standalone:  python serve.py [--port 8000] [--bind 127.0.0.1] [--directory .]
+"""
+
+import argparse
+import email.utils
+import hashlib
+import os
+import re
+import shutil
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 8000
+CACHE_CONTROL = "no-cache"      # always revalidate: the point is to see fresh builds
+# Content-Encoding -> sibling suffix, in order of preference.
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+_ETAGS: Dict[str, Tuple[int, int, str]] = {}
+_ETAGS_LOCK = Lock()
+
+
+def file_etag(path: str, st: os.stat_result) -> str:
+    """Strong ETag of a file: a hash of its bytes, reused until size or mtime change."""
+    with _ETAGS_LOCK:
+        cached = _ETAGS.get(path)
+    if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+        return cached[2]
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(partial(f.read, 1 << 20), b""):
+            h.update(block)
+    etag = f'"{h.hexdigest()[:20]}"'
+    with _ETAGS_LOCK:
+        _ETAGS[path] = (st.st_size, st.st_mtime_ns, etag)
+    return etag
+
+
+def accepted_encodings(header: str) -> List[str]:
+    """Content codings the Accept-Encoding header allows (q > 0)."""
+    accepted = []
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte offsets of a single "bytes=" range, clamped to the
+    file, or (size, size) if the range starts at or past the end of the
+    file. Returns None for headers that should be ignored (other units,
+    multiple ranges, bad syntax, last < first), which means serving the
+    whole file.
+    """
+    m = _RANGE.match(header.strip())
+    if not m or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.group(1), m.group(2)
+    if first == "":                       # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return (size, size)
+        return (max(0, size - length), size - 1)
+    start = int(first)
+    if last != "" and int(last) < start:  # invalid, not unsatisfiable (RFC 7233 2.1)
+        return None
+    if start >= size:
+        return (size, size)
+    return (start, size - 1 if last == "" else min(int(last), size - 1))
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with validators, precompressed siblings and ranges."""
+
+    _remaining: Optional[int] = None   # bytes of the current range still to send
+
+    def send_head(self):
+        self._remaining = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                return super().send_head()      # redirect or directory listing
+            path = index
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        # Pick the best precompressed sibling the client accepts.
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        has_sibling = False
+        encoding, body_path, body_st = None, path, st
+        for coding, suffix in ENCODINGS:
+            try:
+                sibling_st = os.stat(path + suffix)
+            except OSError:
+                continue
+            has_sibling = True
+            if encoding is None and coding in accepted and sibling_st.st_mtime_ns >= st.st_mtime_ns:
+                encoding, body_path, body_st = coding, path + suffix, sibling_st
+
+        etag = file_etag(body_path, body_st)
+        headers = [("ETag", etag),
+                   ("Last-Modified", email.utils.formatdate(st.st_mtime, usegmt=True)),
+                   ("Cache-Control", CACHE_CONTROL),
+                   ("Accept-Ranges", "bytes")]
+        if has_sibling:
+            headers.append(("Vary", "Accept-Encoding"))
+
+        if self._not_modified(etag, st):
+            self._start(HTTPStatus.NOT_MODIFIED, headers, 0)
+            return None
+
+        size = body_st.st_size
+        first, last = 0, size - 1
+        status = HTTPStatus.OK
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if byte_range and (if_range is None or if_range.strip() == etag):
+            parsed = parse_range(byte_range, size)
+            if parsed == (size, size):
+                self._start(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                            headers + [("Content-Range", f"bytes */{size}")], 0)
+                return None
+            if parsed is not None:
+                first, last = parsed
+                status = HTTPStatus.PARTIAL_CONTENT
+                headers.append(("Content-Range", f"bytes {first}-{last}/{size}"))
+
+        try:
+            f = open(body_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        f.seek(first)
+        headers.append(("Content-Type", self.guess_type(path)))
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+        self._start(status, headers, last - first + 1)
+        self._remaining = last - first + 1
+        return f
+
+    def copyfile(self, source, outputfile) -> None:
+        remaining = self._remaining
+        if remaining is None:
+            shutil.copyfileobj(source, outputfile)
+            return
+        while remaining > 0:
+            block = source.read(min(remaining, 1 << 16))
+            if not block:
+                break
+            outputfile.write(block)
+            remaining -= len(block)
+        self._remaining = None
+
+    def _not_modified(self, etag: str, st: os.stat_result) -> bool:
+        """If-None-Match (weak comparison) wins over If-Modified-Since."""
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            tags = [t.strip() for t in inm.split(",")]
+            return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                since = email.utils.parsedate_to_datetime(ims)
+            except (TypeError, ValueError):
+                return False
+            return since is not None and int(st.st_mtime) <= since.timestamp()
+        return False
+
+    def _start(self, status: int, headers: List[Tuple[str, str]], length: int) -> None:
+        self.send_response_only(status)
+        self.send_header("Server", self.version_string())
+        self.send_header("Date", self.date_time_string())
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+        self.log_request(status, length)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the site locally with ETags, 304s, .gz/.br siblings and ranges.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port (default %(default)s)")
+    parser.add_argument("--bind", default="127.0.0.1", help="address to bind (default %(default)s)")
+    parser.add_argument("--directory", type=Path, default=Path("."), help="site root (default: current directory)")
+    args = parser.parse_args()
+
+    handler = partial(PreviewHandler, directory=str(args.directory))
+    with ThreadingHTTPServer((args.bind, args.port), handler) as httpd:
+        print(f"Serving {args.directory.resolve()} on http://{args.bind}:{args.port}/ (Ctrl+C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main()
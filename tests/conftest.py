@@ -0,0 +1,67 @@
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# The scripts are flat top-level modules; make them importable from tests/.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class StubServer:
+    """
+    Local HTTP server for tests. Every GET is answered by
+    `handler(path, query) -> (status, body)`, with the query as a flat dict,
+    and recorded in `requests` as (time.monotonic(), path, query).
+    """
+
+    def __init__(self, handler: Callable[[str, Dict[str, str]], Tuple[int, bytes]]) -> None:
+        self.handler = handler
+        self.requests: List[Tuple[float, str, Dict[str, str]]] = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                with stub.lock:
+                    stub.requests.append((time.monotonic(), parts.path, query))
+                status, body = stub.handler(parts.path, query)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Factory: stub_server(handler) starts a StubServer, stopped after the test."""
+    servers: List[StubServer] = []
+
+    def start(handler: Callable[[str, Dict[str, str]], Tuple[int, bytes]]) -> StubServer:
+        servers.append(StubServer(handler))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
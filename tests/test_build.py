@@ -0,0 +1,94 @@
+"""build.py: steps with a retry deadline go stale once it passes."""
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+import build
+
+
+def iso(delta):
+    return (datetime.now(timezone.utc) + delta).isoformat(timespec="seconds")
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    """A one-step graph whose step records its runs and reports `deadline`."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build, "GRAPH_STATE_FILE", tmp_path / "build-graph.json")
+    Path("input.json").write_text("{}", encoding="utf-8")
+    Path("output.json").write_text("{}", encoding="utf-8")
+    runs = []
+    deadline = {"value": None}
+
+    def make_graph(jobs=1):
+        return {"sessions": build.Step("sessions", inputs=lambda: [Path("input.json")],
+                                       outputs=[Path("output.json")], action=lambda: runs.append(1) or "",
+                                       expires=lambda: deadline["value"])}
+    monkeypatch.setattr(build, "build_graph", make_graph)
+    return runs, deadline
+
+
+def test_unchanged_step_without_deadline_is_skipped(graph):
+    runs, _ = graph
+    assert build.run_build() and build.run_build()
+    assert len(runs) == 1
+
+
+def test_step_reruns_once_its_retry_deadline_has_passed(graph, monkeypatch):
+    runs, deadline = graph
+    deadline["value"] = iso(timedelta(hours=12))
+    build.run_build()
+    build.run_build()
+    assert len(runs) == 1  # deadline still ahead
+
+    state = json.loads(build.GRAPH_STATE_FILE.read_text(encoding="utf-8"))
+    state["expires"]["sessions"] = iso(-timedelta(seconds=1))
+    build.GRAPH_STATE_FILE.write_text(json.dumps(state), encoding="utf-8")
+    deadline["value"] = None  # the retry succeeded
+    build.run_build()
+    assert len(runs) == 2
+    build.run_build()
+    assert len(runs) == 2
+
+
+def test_pending_retry_deadline_is_the_earliest_future_retry_after(tmp_path):
+    weather, geocache = tmp_path / "weather-cache.json", tmp_path / "tracks-geocache.json"
+    soon, later = iso(timedelta(hours=2)), iso(timedelta(days=3))
+    weather.write_text(json.dumps({
+        "a": {"weather": None, "retry_after": later},
+        "b": {"weather": {"temp_max": 20}, "fetched_at": iso(-timedelta(days=1))},
+        "c": {"weather": None, "retry_after": iso(-timedelta(hours=1))},  # already due: not pending
+    }), encoding="utf-8")
+    geocache.write_text(json.dumps({"link": {"failed_at": iso(timedelta(0)), "retry_after": soon}}),
+                        encoding="utf-8")
+    assert build.pending_retry_deadline(weather, geocache) == soon
+    assert build.pending_retry_deadline(weather) == later
+    assert build.pending_retry_deadline(tmp_path / "missing.json") is None
+
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("script, setup", [
+    ("generate_list.py", lambda: None),                                              # no sessions/ directory
+    ("championship.py", lambda: Path("championship-data.json").write_text("{oops", encoding="utf-8")),
+])
+def test_failed_generator_is_not_recorded_as_built(tmp_path, monkeypatch, script, setup):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build, "GRAPH_STATE_FILE", tmp_path / "build-graph.json")
+    setup()
+    Path("input.json").write_text("{}", encoding="utf-8")
+    downstream = []
+    steps = [build.Step("generate", inputs=lambda: [Path("input.json")], outputs=[Path("input.json")],
+                        action=build._script(str(REPO / script))),
+             build.Step("downstream", inputs=lambda: [Path("input.json")], outputs=[],
+                        action=lambda: downstream.append(1) or "", deps=["generate"])]
+    monkeypatch.setattr(build, "build_graph", lambda jobs=1: {s.name: s for s in steps})
+
+    assert build.run_build() is False
+    assert downstream == []
+    state = json.loads(build.GRAPH_STATE_FILE.read_text(encoding="utf-8"))
+    assert "generate" not in state["steps"]
@@ -0,0 +1,151 @@
+"""championship.py: best-lap lookup, venue times, scoring and season reuse."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import championship
+from championship import BestLapIndex, standings_rows, venue_times
+
+
+def summary(session_id, driver, date, lap_s, track="Plytinės Kartodromas", configuration="Summer"):
+    return {"id": session_id, "driver": driver, "session_date": date, "fastest_lap_s": lap_s,
+            "track": {"name": track, "configuration": configuration}}
+
+
+SUMMARIES = [
+    summary("a1", "Ignas M.", "2026-04-09", 43.9),
+    summary("a2", "Ignas M.", "2026-04-10", 45.2),
+    summary("a3", "Ignas M.", "2026-04-10", 44.8),
+    summary("a4", "Ignas M.", "2026-04-11", 44.1),
+    summary("a5", "Ignas M.", "2026-04-10", 41.0, configuration="Winter"),
+    summary("b1", "Povilas Lukoševičius", "2026-04-10", 44.5),
+    summary("c1", "Ernest S.", "2026-04-10", 44.8),
+    summary("c2", "Ernest S.", "2026-04-10", 44.8),
+]
+
+
+@pytest.mark.parametrize("first, last, expected", [
+    ("2026-04-10", "2026-04-10", ("2026-04-10", 41000, "winter", "a5")),
+    ("2026-04-11", "2026-04-30", ("2026-04-11", 44100, "summer", "a4")),   # first day is inclusive
+    ("2026-04-01", "2026-04-09", ("2026-04-09", 43900, "summer", "a1")),   # last day is inclusive
+    ("2026-04-12", "2026-12-31", None),
+])
+def test_best_lap_date_window(first, last, expected):
+    assert BestLapIndex(SUMMARIES).best("Plytinės Kartodromas", "Ignas M.", first, last) == expected
+
+
+def test_best_lap_configuration_filter():
+    index = BestLapIndex(SUMMARIES)
+    day = ("2026-04-10", "2026-04-10")
+    assert index.best("Plytinės Kartodromas", "Ignas M.", *day, "Summer")[3] == "a3"
+    assert index.best("plytines kartodromas", "ignas m", *day, "WINTER") is None  # ė isn't folded to e
+    assert index.best("Plytinės kartodromas", "ignas m", *day, "WINTER")[3] == "a5"
+    assert index.best("Plytinės Kartodromas", "Ignas M.", *day, "Endurance") is None
+
+
+def test_best_lap_ties_go_to_the_earlier_session():
+    assert BestLapIndex(SUMMARIES).best("Plytinės Kartodromas", "Ernest S.", "2026-01-01", "2026-12-31")[3] == "c1"
+
+
+def test_best_lap_applies_driver_aliases():
+    assert BestLapIndex(SUMMARIES).best("Plytinės Kartodromas", "Povilas L.", "2026-04-10", "2026-04-10") is None
+    index = BestLapIndex(SUMMARIES, {"Povilas Lukoševičius": "Povilas L."})
+    assert index.best("Plytinės Kartodromas", "Povilas L.", "2026-04-10", "2026-04-10")[3] == "b1"
+
+
+def test_venue_times_typed_in_times_override_sessions(capsys):
+    season = {"year": 2026, "drivers": ["Ignas M.", "Povilas L.", "Ernest S.", "Romualdas P."],
+              "times": {"Plytinė": {"Ignas M.": "00:44.000", "Ernest S.": "00:44.800", "Romualdas P.": "00:46.250"}}}
+    venue = {"label": "Plytinė", "done": True, "track": "Plytinės Kartodromas",
+             "configuration": "Summer", "date": "2026-04-10"}
+    index = BestLapIndex(SUMMARIES, {"Povilas Lukoševičius": "Povilas L."})
+    assert venue_times(season, venue, index) == {
+        "Ignas M.": {"ms": 44000, "source": "manual", "session": None},        # overrides a3 (44.8)
+        "Ernest S.": {"ms": 44800, "source": "manual", "session": "c1"},       # agrees with c1
+        "Romualdas P.": {"ms": 46250, "source": "manual", "session": None},    # no session
+        "Povilas L.": {"ms": 44500, "source": "session", "session": "b1"},
+    }
+    assert "[override] 2026 Plytinė / Ignas M.: typed-in 00:44.000, best session 00:44.800 (a3)" \
+        in capsys.readouterr().out
+
+
+def test_venue_without_track_uses_typed_in_times_only():
+    season = {"drivers": ["Ignas M."], "times": {"Max": {"Ignas M.": "00:38.500"}}}
+    assert venue_times(season, {"label": "Max", "done": True}, BestLapIndex(SUMMARIES)) == {
+        "Ignas M.": {"ms": 38500, "source": "manual", "session": None}}
+
+
+def cell(ms, source="manual"):
+    return {"ms": ms, "source": source, "session": None}
+
+
+def test_standings_dns_penalty_and_ranking():
+    venues = [{"label": "A", "done": True}, {"label": "B", "done": True}]
+    times = [{"X": cell(40000), "Y": cell(41000), "Z": cell(42000)},
+             {"X": cell(50000), "Y": cell(49000)}]                  # Z didn't start at B
+    rows = standings_rows(venues, ["Z", "Y", "X"], times)
+
+    assert [r["driver"] for r in rows] == ["Y", "X", "Z"]
+    z = rows[2]
+    assert z["laps"][1] == {"ms": 50000, "dns": True}                 # charged the slowest time at B
+    assert z["total"] == 42000 + 50000
+    assert rows[0]["laps"][1] == {"ms": 49000, "rank": 1, "source": "manual", "session": None}
+    assert [r["gap"] for r in rows] == [0, 0, 2000]
+    assert [r["interval"] for r in rows] == [None, 0, 2000]
+    assert [r["pace"] for r in rows] == [100, 100, 100 - championship.PACE_SPAN]
+
+
+def test_standings_pending_venue_leaves_totals_open():
+    venues = [{"label": "A", "done": True}, {"label": "B", "done": False}]
+    rows = standings_rows(venues, ["X", "Y"], [{"X": cell(41000), "Y": cell(40000)}, None])
+    assert [r["driver"] for r in rows] == ["Y", "X"]
+    assert all(r["total"] is None and r["laps"][1] == {"pending": True} for r in rows)
+    assert [r["partial_total"] for r in rows] == [40000, 41000]
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("sessions").mkdir()
+    Path("sessions/sessions-list.json").write_text(json.dumps({"sessions": SUMMARIES}), encoding="utf-8")
+    data = {"seasons": [
+        {"year": 2025, "name": "Spring Challenge", "status": "complete", "drivers": ["Ignas M.", "Ernest S."],
+         "venues": [{"label": "Max", "color": "blue", "done": True}],
+         "times": {"Max": {"Ignas M.": "00:38.900", "Ernest S.": "00:40.142"}}},
+        {"year": 2026, "name": "Spring Challenge", "status": "active", "drivers": ["Ignas M.", "Ernest S."],
+         "venues": [{"label": "Plytinė", "color": "purple", "done": True, "track": "Plytinės Kartodromas",
+                     "configuration": "Summer", "date": "2026-04-10"}],
+         "times": {}},
+    ]}
+    championship.CHAMPIONSHIP_DATA_FILE.write_text(json.dumps(data), encoding="utf-8")
+    return data
+
+
+def standings():
+    return {s["year"]: s for s in json.loads(championship.STANDINGS_FILE.read_text(encoding="utf-8"))["seasons"]}
+
+
+def test_only_changed_seasons_are_recomputed(archive, capsys):
+    assert championship.build_standings()
+    first = standings()
+    assert [r["driver"] for r in first[2026]["rows"]] == ["Ignas M.", "Ernest S."]
+    assert first[2026]["rows"][0]["laps"][0]["session"] == "a3"
+
+    archive["seasons"][1]["drivers"].append("Povilas L.")                # unrelated to 2025
+    championship.CHAMPIONSHIP_DATA_FILE.write_text(json.dumps(archive), encoding="utf-8")
+    capsys.readouterr()
+    assert championship.build_standings()
+    out = capsys.readouterr().out
+    second = standings()
+
+    assert "1 recomputed, 1 unchanged" in out
+    assert second[2025] == first[2025]
+    assert second[2026]["inputs"] != first[2026]["inputs"]
+    assert [r["driver"] for r in second[2026]["rows"]] == ["Ignas M.", "Ernest S.", "Povilas L."]
+
+
+def test_unreadable_data_file_fails(archive):
+    championship.CHAMPIONSHIP_DATA_FILE.write_text("{oops", encoding="utf-8")
+    assert championship.build_standings() is False
@@ -0,0 +1,150 @@
+"""check_videos.py against local stubs of the oEmbed and Data API endpoints."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import check_videos
+
+
+@pytest.fixture
+def oembed(stub_server, monkeypatch):
+    """Start a stub oEmbed server answering `statuses[video_id]` (default 200)."""
+    def start(statuses):
+        def handler(path, query):
+            video_id = query.get("url", "").rsplit("=", 1)[-1]
+            status = statuses.get(video_id, 200)
+            return status, b'{"type": "video"}' if status == 200 else b""
+        server = stub_server(handler)
+        monkeypatch.setattr(check_videos, "OEMBED_URL", f"{server.url}/oembed")
+        return server
+    monkeypatch.setattr(check_videos, "RATE_LIMITER", check_videos.TokenBucket(1000, 1000))
+    return start
+
+
+def test_oembed_available(oembed):
+    server = oembed({})
+    assert check_videos.check_oembed("aaaaaaaaaaa") is True
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize("status", [401, 404])
+def test_oembed_unplayable(oembed, status):
+    server = oembed({"bbbbbbbbbbb": status})
+    assert check_videos.check_oembed("bbbbbbbbbbb") is False
+    assert len(server.requests) == 1  # a definite answer is not retried
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_oembed_transient_errors_are_retried_then_unknown(oembed, monkeypatch, status):
+    sleeps = []
+    monkeypatch.setattr(check_videos.time, "sleep", sleeps.append)
+    monkeypatch.setattr(check_videos.random, "uniform", lambda a, b: 0.0)
+    server = oembed({"ccccccccccc": status})
+    assert check_videos.check_oembed("ccccccccccc") is None
+    assert len(server.requests) == check_videos.MAX_ATTEMPTS
+    base = check_videos.BACKOFF_BASE
+    assert sleeps == [base * 2 ** n for n in range(check_videos.MAX_ATTEMPTS - 1)]
+
+
+def test_token_bucket_caps_rate_across_workers(oembed, monkeypatch):
+    rate, burst, calls = 40.0, 2, 22
+    monkeypatch.setattr(check_videos, "RATE_LIMITER", check_videos.TokenBucket(rate, burst))
+    server = oembed({})
+    ids = [f"{n:011d}" for n in range(calls)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert all(pool.map(check_videos.check_oembed, ids))
+
+    times = sorted(t for t, _, _ in server.requests)
+    assert len(times) == calls
+    # After the burst, requests can't arrive faster than `rate` per second.
+    assert times[-1] - times[0] >= (calls - burst) / rate * 0.9
+    for i in range(burst + 1, calls):
+        # Any burst + 1 consecutive requests span at least one token interval.
+        assert times[i] - times[i - burst - 1] >= 1 / rate * 0.9
+
+
+PLAYABLE = {"privacyStatus": "public", "embeddable": True, "uploadStatus": "processed"}
+
+
+@pytest.fixture
+def data_api(stub_server, monkeypatch):
+    """
+    Start a stub videos.list endpoint. IDs in `gone` are left out of `items`,
+    `statuses` maps an ID to the privacyStatus to report, and a non-200
+    `status` fails every request.
+    """
+    def start(gone=(), statuses=None, status=200):
+        def handler(path, query):
+            if status != 200:
+                error = {"error": {"code": status, "errors": [{"reason": "quotaExceeded"}]}}
+                return status, json.dumps(error).encode()
+            items = [{"id": vid, "status": {**PLAYABLE, "privacyStatus": (statuses or {}).get(vid, "public")}}
+                     for vid in query["id"].split(",") if vid not in gone]
+            return 200, json.dumps({"items": items}).encode()
+        server = stub_server(handler)
+        monkeypatch.setattr(check_videos, "DATA_API_URL", f"{server.url}/youtube/v3/videos")
+        return server
+    monkeypatch.setattr(check_videos, "DATA_API_KEY", "test-key")
+    monkeypatch.setattr(check_videos, "RATE_LIMITER", check_videos.TokenBucket(1000, 1000))
+    monkeypatch.setattr(check_videos.time, "sleep", lambda s: None)
+    return start
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """Write one session file per video ID; returns a reader for their
+    video_available flags."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "sessions").mkdir()
+
+    def write(video_ids, available=None):
+        for vid in video_ids:
+            data = {"session_id": vid, "video_url": f"https://youtu.be/{vid}"}
+            if available is not None:
+                data["video_available"] = available
+            (tmp_path / "sessions" / f"{vid}.json").write_text(json.dumps(data), encoding="utf-8")
+
+        def flags():
+            return {vid: json.loads((tmp_path / "sessions" / f"{vid}.json").read_text())
+                    .get("video_available") for vid in video_ids}
+        return flags
+    return write
+
+
+def test_data_api_one_request_per_chunk(data_api, sessions):
+    server = data_api()
+    ids = [f"v{n:010d}" for n in range(2 * check_videos.DATA_API_BATCH + 20)]
+    flags = sessions(ids)
+    check_videos.check_all_sessions(workers=3, backend="data-api")
+
+    chunks = sorted(len(q["id"].split(",")) for _, _, q in server.requests)
+    assert chunks == [20, check_videos.DATA_API_BATCH, check_videos.DATA_API_BATCH]
+    assert all("maxResults" not in q and q["key"] == "test-key" for _, _, q in server.requests)
+    assert flags() == {vid: True for vid in ids}
+
+
+def test_data_api_missing_ids_are_unavailable(data_api):
+    data_api(gone={"bbbbbbbbbbb"}, statuses={"ccccccccccc": "private"})
+    assert check_videos.check_data_api(["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"]) == {
+        "aaaaaaaaaaa": True, "bbbbbbbbbbb": False, "ccccccccccc": False}
+
+
+@pytest.mark.parametrize("status, attempts", [(403, 1), (500, check_videos.MAX_ATTEMPTS),
+                                              (503, check_videos.MAX_ATTEMPTS)])
+def test_data_api_errors_leave_cache_and_files_alone(data_api, sessions, status, attempts):
+    server = data_api(status=status)
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+    assert check_videos.check_data_api(ids) == {vid: None for vid in ids}
+    assert len(server.requests) == attempts
+
+    flags = sessions(ids, available=True)
+    stale = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat(timespec="seconds")
+    cache = {vid: {"available": True, "checked_at": stale, "changed_at": stale} for vid in ids}
+    check_videos.CACHE_FILE.write_text(json.dumps(cache), encoding="utf-8")
+    check_videos.check_all_sessions(workers=1, ttl=timedelta(days=1), backend="data-api")
+
+    assert json.loads(check_videos.CACHE_FILE.read_text(encoding="utf-8")) == cache
+    assert flags() == {vid: True for vid in ids}
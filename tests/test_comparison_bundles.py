@@ -0,0 +1,16 @@
+"""Comparison records keep one slot per lap entry of the session file."""
+
+import generate_list
+
+
+def test_non_dict_laps_keep_their_slot():
+    record = generate_list.comparison_record({"laps": [
+        {"lap": 1, "time": "00:44.900"}, None, "00:45.000", {"lap": 4, "time": "bad"}, {"lap": 5, "time": "00:44.100"},
+    ]})
+    assert record["laps"] == [44.9, None, None, "bad", 44.1]
+    assert record["lap_numbers"] == [1, None, None, 4, 5]
+
+
+def test_plain_laps_have_no_lap_numbers():
+    record = generate_list.comparison_record({"laps": [{"lap": 1, "time": "44.9"}, {"lap": 2, "time": 45.25}]})
+    assert record == {"laps": [44.9, 45.25]}
@@ -0,0 +1,106 @@
+"""generate_list.py --incremental must write the same bytes as a full rebuild."""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+import generate_list
+
+
+def session(session_id, driver, track, date, laps, configuration="Full"):
+    return {
+        "session_id": session_id,
+        "driver": driver,
+        "track": {"name": track, "configuration": configuration},
+        "kart": "7",
+        "video_url": "",
+        "session_date": date,
+        "laps": [{"lap": i + 1, "time": t} for i, t in enumerate(laps)],
+    }
+
+
+def write_session(root, data):
+    path = root / "sessions" / f"{data['session_id']}.json"
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def outputs(root):
+    """Bytes of sessions-list.json, tracks-list.json and every shard file."""
+    found = {}
+    for path in [root / generate_list.OUTPUT_FILE, root / generate_list.TRACKS_OUTPUT_FILE,
+                 *sorted((root / generate_list.SHARD_DIR).rglob("*.json"))]:
+        found[str(path.relative_to(root))] = path.read_bytes()
+    return found
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_list, "resolve_coordinates_from_maps_link", lambda link: None)
+    monkeypatch.setattr(generate_list, "fetch_weather_range", lambda *a, **k: None)
+    root = tmp_path / "work"
+    (root / "sessions").mkdir(parents=True)
+    write_session(root, session("s1", "Ignas M", "Test Ring", "2025-05-01", ["00:45.100", "00:44.900"]))
+    write_session(root, session("s2", "Ignas M", "Test Ring", "2025-05-08", ["00:44.700", "00:44.800"]))
+    write_session(root, session("s3", "Ignas M.", "Club Circuit", "2025-06-01", ["01:02.300"]))
+    write_session(root, session("s4", "Povilas L.", "Test Ring", "2025-06-02", ["00:43.950", "00:44.010"]))
+    monkeypatch.chdir(root)
+    assert generate_list.generate_sessions_list(incremental=True)
+    return root
+
+
+def assert_matches_full_build(root, tmp_path):
+    """Build a copy of the session files from scratch and compare outputs."""
+    fresh = tmp_path / f"fresh-{len(list(tmp_path.iterdir()))}"
+    (fresh / "sessions").mkdir(parents=True)
+    for path in (root / "sessions").glob("*.json"):
+        if path.name not in generate_list.NON_SESSION_FILES:
+            shutil.copy2(path, fresh / "sessions" / path.name)
+    incremental = outputs(root)
+    os.chdir(fresh)
+    try:
+        assert generate_list.generate_sessions_list()
+    finally:
+        os.chdir(root)
+    assert incremental == outputs(fresh)
+
+
+def rebuild(root):
+    assert generate_list.generate_sessions_list(incremental=True)
+    assert (root / generate_list.BUILD_MANIFEST_FILE).is_file()
+
+
+def test_add_file(archive, tmp_path):
+    write_session(archive, session("s5", "Povilas L.", "Club Circuit", "2025-07-01", ["01:01.900"]))
+    rebuild(archive)
+    assert_matches_full_build(archive, tmp_path)
+
+
+def test_edit_file(archive, tmp_path):
+    data = session("s2", "Ignas M", "Test Ring", "2025-05-08", ["00:44.700", "00:43.100", "00:44.000"])
+    write_session(archive, data)
+    rebuild(archive)
+    assert_matches_full_build(archive, tmp_path)
+    summaries = json.loads((archive / generate_list.OUTPUT_FILE).read_text(encoding="utf-8"))["sessions"]
+    assert next(s for s in summaries if s["id"] == "s2")["fastest_lap_s"] == pytest.approx(43.1)
+
+
+def test_delete_file(archive, tmp_path):
+    (archive / "sessions" / "s4.json").unlink()
+    rebuild(archive)
+    assert_matches_full_build(archive, tmp_path)
+    # Povilas L. had no other session: his driver shard must be gone too.
+    assert not list((archive / generate_list.SHARD_DIR / "drivers").glob("povilas*"))
+
+
+def test_edit_changes_canonical_fold(archive, tmp_path):
+    # "Ignas M" leads 2:1, so s3's "Ignas M." folds into it. Respelling s1
+    # flips the majority, which must re-fold the unchanged s2 as well.
+    write_session(archive, session("s1", "Ignas M.", "Test Ring", "2025-05-01", ["00:45.100", "00:44.900"]))
+    rebuild(archive)
+    assert_matches_full_build(archive, tmp_path)
+    summaries = json.loads((archive / generate_list.OUTPUT_FILE).read_text(encoding="utf-8"))["sessions"]
+    assert {s["driver"] for s in summaries} == {"Ignas M.", "Povilas L."}
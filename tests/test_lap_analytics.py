@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+import generate_list
+
+np = pytest.importorskip("numpy")
+
+
+def laps(n, seed):
+    rng = random.Random(seed)
+    times = [round(rng.uniform(42.0, 44.5), 3) for _ in range(n)]
+    for i in rng.sample(range(n), n // 10):
+        times[i] = round(times[i] * rng.uniform(1.05, 1.4), 3)   # traffic
+    if n > 5:
+        times[n // 2] = 312.5                                     # a pit stop
+    return times
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 4, 5, 9, 10, 64, 65, 200, 1001])
+def test_numpy_and_pure_python_analytics_agree(n, monkeypatch):
+    times = laps(n, seed=n)
+    monkeypatch.setattr(generate_list, "ANALYTICS_NUMPY_MIN_LAPS", 0)
+    with_numpy = generate_list.compute_lap_analytics(times)
+    monkeypatch.setattr(generate_list, "np", None)
+    pure_python = generate_list.compute_lap_analytics(times)
+    assert with_numpy == pure_python
+    assert repr(with_numpy) == repr(pure_python)
+
+
+def test_lap_aggregates_agree_on_ties_and_even_medians():
+    ms = [43_000, 43_000, 44_290, 44_291, 43_500, 299_999, 300_000, 43_500]
+    assert generate_list._lap_aggregates_np(ms) == generate_list._lap_aggregates_py(ms)
@@ -0,0 +1,41 @@
+"""The packed lap store keeps lap indexes aligned with the session files."""
+
+import json
+import math
+
+import pytest
+
+import generate_list
+from lap_store import LapStore
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_list, "resolve_coordinates_from_maps_link", lambda link: None)
+    monkeypatch.setattr(generate_list, "fetch_weather_range", lambda *a, **k: None)
+    (tmp_path / "sessions").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_session(root, session_id, laps):
+    data = {"session_id": session_id, "driver": "Ignas M.", "track": {"name": "Test Ring"},
+            "session_date": "2025-05-01", "laps": laps}
+    (root / "sessions" / f"{session_id}.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+def stored(session_id):
+    with LapStore(generate_list.LAP_INDEX_FILE) as store:
+        return [None if math.isnan(t) else t for t in store.laps(session_id)]
+
+
+def test_non_dict_laps_are_stored_as_nan(archive):
+    write_session(archive, "s1", [{"lap": 1, "time": "00:44.900"}, None, "00:45.000",
+                                  {"lap": 4, "time": "n/a"}, {"lap": 5, "time": "00:44.100"}])
+    write_session(archive, "s2", [{"lap": 1, "time": "01:02.500"}])
+    assert generate_list.generate_sessions_list()
+
+    assert stored("s1") == [44.9, None, None, None, 44.1]
+    assert stored("s2") == [62.5]
+    with LapStore(generate_list.LAP_INDEX_FILE) as store:
+        assert store.byte_range("s2") == (5 * 8, 6 * 8 - 1)
@@ -0,0 +1,25 @@
+"""Range header handling of serve.py."""
+
+import pytest
+
+from serve import parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=999-999", (999, 999)),
+    ("bytes=1000-", (1000, 1000)),        # starts past the end: 416
+    ("bytes=1000-2000", (1000, 1000)),
+    ("bytes=-0", (1000, 1000)),
+    ("bytes=500-100", None),              # inverted: ignored, 200 with the full body
+    ("bytes=2000-1500", None),
+    ("bytes=0-99,200-299", None),
+    ("items=0-99", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
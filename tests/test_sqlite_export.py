@@ -0,0 +1,48 @@
+"""The --sqlite export of generate_list.py, synced across runs."""
+
+import json
+import sqlite3
+
+import pytest
+
+import generate_list
+
+
+def write_session(root, session_id, laps):
+    data = {"session_id": session_id, "driver": "Ignas M.", "track": {"name": "Test Ring"},
+            "session_date": "2025-05-01", "laps": laps}
+    (root / "sessions" / f"{session_id}.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_list, "resolve_coordinates_from_maps_link", lambda link: None)
+    monkeypatch.setattr(generate_list, "fetch_weather_range", lambda *a, **k: None)
+    (tmp_path / "sessions").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def export(root):
+    db = root / "sessions.db"
+    assert generate_list.generate_sessions_list(sqlite_path=db)
+    conn = sqlite3.connect(db)
+    try:
+        return (sorted(conn.execute("SELECT file, laps_count FROM sessions")),
+                sorted(conn.execute("SELECT file, idx FROM laps")))
+    finally:
+        conn.close()
+
+
+def test_non_dict_laps_are_skipped(archive):
+    write_session(archive, "s1", [{"lap": 1, "time": "00:44.900"}, "00:45.000", None, {"lap": 4, "time": "00:44.700"}])
+    assert export(archive) == ([("s1.json", 2)], [("s1.json", 0), ("s1.json", 3)])
+
+
+def test_rows_of_a_file_that_no_longer_parses_are_deleted(archive):
+    write_session(archive, "s1", [{"lap": 1, "time": "00:44.900"}])
+    write_session(archive, "s2", [{"lap": 1, "time": "00:45.300"}])
+    assert export(archive)[0] == [("s1.json", 1), ("s2.json", 1)]
+
+    (archive / "sessions" / "s2.json").write_text("{not json", encoding="utf-8")
+    assert export(archive) == ([("s1.json", 1)], [("s1.json", 0)])
@@ -0,0 +1,173 @@
+"""ingest_telemetry.py on synthetic logs with known answers."""
+
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ingest_telemetry  # noqa: E402
+
+LAT0, LON0 = 54.9, 23.9
+LAP_M = 377.0
+LEAD_IN_S = 37.3
+LAP_TIMES = [30.1, 29.4, 31.0, 29.8]
+
+
+def circuit_log():
+    """
+    (t, speed m/s, lat, lon) rows at 10 Hz: a straight lead-in of LEAD_IN_S
+    seconds from the pits to the start/finish line, then LAP_TIMES laps of a
+    LAP_M metre circle at a constant speed each, then a few seconds more.
+    """
+    radius = LAP_M / (2 * math.pi)
+    rows = []
+
+    def add(t, v, x, y):
+        lat = LAT0 + math.degrees(y / ingest_telemetry.EARTH_RADIUS_M)
+        lon = LON0 + math.degrees(x / (ingest_telemetry.EARTH_RADIUS_M * math.cos(math.radians(LAT0))))
+        rows.append((round(t, 1), v, lat, lon))
+
+    i = 0
+    lead_v = 150.0 / LEAD_IN_S
+    while i * 0.1 < LEAD_IN_S - 1e-9:
+        add(i * 0.1, lead_v, radius, -150.0 + lead_v * i * 0.1)
+        i += 1
+    angle, start = 0.0, i * 0.1
+    for lap_time in LAP_TIMES + [5.0]:
+        v = LAP_M / lap_time if lap_time != 5.0 else LAP_M / LAP_TIMES[-1]
+        end = start + lap_time
+        while i * 0.1 < end - 1e-9:
+            theta = angle + v * (i * 0.1 - start) / radius
+            add(i * 0.1, v, radius * math.cos(theta), radius * math.sin(theta))
+            i += 1
+        angle += v * lap_time / radius
+        start = end
+    return rows
+
+
+def write_csv(path, header, rows):
+    path.write_text(header + "\n" + "\n".join(",".join(str(c) for c in row) for row in rows) + "\n",
+                    encoding="utf-8")
+    return path
+
+
+def test_nmea_time_of_day_wraps_past_midnight(tmp_path):
+    log = tmp_path / "s.nmea"
+    log.write_text("\n".join([
+        "$GPRMC,235958.00,A,5454.000,N,02354.000,E,10.0,0.0,010525,,,A*00",
+        "$GPRMC,235959.00,V,5454.000,N,02354.000,E,10.0,0.0,010525,,,A*00",   # void fix
+        "$GPRMC,235959.50,A,5454.000,N,02354.000,W,20.0,0.0,010525,,,A*00",
+        "$GNRMC,000000.50,A,5454.000,S,02354.000,E,0.0,0.0,020525,,,A*00",
+        "$GPGGA,000001.00,5454.000,N,02354.000,E,1,08,0.9,100.0,M,0.0,M,,*00",
+    ]) + "\n", encoding="utf-8")
+    t, v, lat, lon = ingest_telemetry.parse_nmea(log).arrays()
+    assert t.tolist() == [0.0, 1.5, 2.5]
+    assert v.tolist() == pytest.approx([5.14444, 10.28888, 0.0])
+    assert lat.tolist() == pytest.approx([54.9, 54.9, -54.9])
+    assert lon.tolist() == pytest.approx([23.9, -23.9, 23.9])
+
+
+def test_csv_epoch_times_and_kmh_speeds(tmp_path):
+    log = write_csv(tmp_path / "s.csv", "Timestamp,GPS Speed (km/h),Lat,Lon",
+                    [(1714550400.0 + k * 0.1, 36.0 * k, LAT0, LON0) for k in range(4)])
+    t, v, lat, lon = ingest_telemetry.parse_csv(log).arrays()
+    assert t.tolist() == pytest.approx([0.0, 0.1, 0.2, 0.3])
+    assert v.tolist() == pytest.approx([0.0, 10.0, 20.0, 30.0])
+    assert lat.tolist() == [LAT0] * 4
+
+
+@pytest.mark.parametrize("header, scale", [("time,speed_mph", 0.44704), ("time,speed", 1.0)])
+def test_csv_speed_units(tmp_path, header, scale):
+    log = write_csv(tmp_path / "s.csv", header, [(0.5, 10.0), (1.0, 20.0)])
+    t, v, _, _ = ingest_telemetry.parse_csv(log).arrays()
+    assert t.tolist() == [0.5, 1.0]  # relative times are kept as they are
+    assert v.tolist() == pytest.approx([10.0 * scale, 20.0 * scale])
+
+
+def test_csv_iso_timestamps_and_missing_time_column(tmp_path):
+    iso = write_csv(tmp_path / "iso.csv", "time,speed",
+                    [("2025-05-01T10:00:00Z", 1), ("2025-05-01T10:00:00.5Z", 2)])
+    assert ingest_telemetry.parse_csv(iso).arrays()[0].tolist() == [0.0, 0.5]
+    untimed = write_csv(tmp_path / "untimed.csv", "speed", [(1,), (2,), (3,)])
+    assert ingest_telemetry.parse_csv(untimed).arrays()[0].tolist() == pytest.approx([0.1, 0.2, 0.3])
+
+
+def speed_trace(segments, step=0.1):
+    """Piecewise-linear speed trace from (duration s, end speed m/s) segments,
+    starting at the first segment's end speed."""
+    v = [segments[0][1]]
+    for duration, target in segments[1:]:
+        n = round(duration / step)
+        start = v[-1]
+        v += [start + (target - start) * (k + 1) / n for k in range(n)]
+    return np.array(v)
+
+
+def test_brake_zone_is_kept_and_kerb_strike_rejected():
+    step = 0.1
+    sv = ingest_telemetry._moving_mean(speed_trace([
+        (0, 20.0), (2.0, 20.0),
+        (1.5, 11.0), (3.0, 11.0),            # brake: 9 m/s shed at 6 m/s², and it stays down
+        (0.6, 6.0), (0.3, 11.0), (3.0, 11.0),  # kerb: 5 m/s lost, back up within 0.3 s
+    ], step), ingest_telemetry.SMOOTH_SAMPLES)
+    zones = ingest_telemetry.detect_brake_zones(sv, step)
+    assert len(zones["i0"]) == 1
+    assert 1.7 <= zones["i0"][0] * step <= 2.1
+    assert 3.4 <= zones["i1"][0] * step <= 3.9
+    assert zones["lost"][0] == pytest.approx(9.0, abs=1.0)  # measured from the smoothed entry speed
+    assert zones["peak"][0] == pytest.approx(6.0, abs=0.3)
+
+    # The same strike without the rebound is a brake zone.
+    held = ingest_telemetry._moving_mean(speed_trace([(0, 11.0), (3.0, 11.0), (0.6, 6.0), (3.0, 6.0)], step),
+                                         ingest_telemetry.SMOOTH_SAMPLES)
+    assert len(ingest_telemetry.detect_brake_zones(held, step)["i0"]) == 1
+
+
+def test_brake_zones_closer_than_merge_gap_are_merged(monkeypatch):
+    step = 0.1
+    sv = speed_trace([(0, 20.0), (1.0, 20.0), (1.0, 14.0), (0.2, 14.0), (1.0, 8.0), (2.0, 8.0)], step)
+    zones = ingest_telemetry.detect_brake_zones(sv, step)
+    assert len(zones["i0"]) == 1
+    assert zones["i0"][0] == 10
+    assert zones["i1"][0] == 32
+    assert zones["lost"][0] == pytest.approx(6.0)
+
+    monkeypatch.setattr(ingest_telemetry, "BRAKE_MERGE_GAP", 0.1)
+    assert len(ingest_telemetry.detect_brake_zones(sv, step)["i0"]) == 2
+
+
+def test_laps_are_aligned_on_a_synthetic_circuit(tmp_path):
+    log = write_csv(tmp_path / "s.csv", "time,speed,lat,lon", circuit_log())
+    track = ingest_telemetry.clean_track(ingest_telemetry.parse_csv(log))
+    artifact = ingest_telemetry.build_artifact(track, LAP_TIMES)
+
+    assert artifact["lap_offset_s"] == pytest.approx(LEAD_IN_S, abs=0.05)
+    assert artifact["lap_alignment_rms_m"] < 1.0
+    assert [lap["lap"] for lap in artifact["laps"]] == [1, 2, 3, 4]
+    for lap, lap_time in zip(artifact["laps"], LAP_TIMES):
+        assert lap["end_s"] - lap["start_s"] == pytest.approx(lap_time, abs=0.05)
+        assert lap["distance_m"] == pytest.approx(LAP_M, abs=2.0)
+    assert artifact["brake_zones"] == []
+
+
+def test_laps_that_dont_fit_the_trace_are_not_aligned(tmp_path):
+    log = write_csv(tmp_path / "s.csv", "time,speed,lat,lon", circuit_log())
+    track = ingest_telemetry.clean_track(ingest_telemetry.parse_csv(log))
+    assert ingest_telemetry.build_artifact(track, [45.0, 52.0, 61.0, 70.0])["laps"] == []
+
+
+def test_ingest_all_writes_the_artifact_and_links_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "sessions").mkdir()
+    (tmp_path / "telemetry").mkdir()
+    session = {"session_id": "s1", "laps": [{"lap": k + 1, "time": f"00:{t:06.3f}"} for k, t in enumerate(LAP_TIMES)]}
+    Path("sessions/s1.json").write_text(json.dumps(session, indent=2), encoding="utf-8")
+    write_csv(tmp_path / "telemetry" / "s1.csv", "time,speed,lat,lon", circuit_log())
+
+    assert ingest_telemetry.ingest_all([Path("telemetry")])
+    artifact = json.loads((ingest_telemetry.ARTIFACT_DIR / "s1.json").read_text(encoding="utf-8"))
+    assert artifact["lap_offset_s"] == pytest.approx(LEAD_IN_S, abs=0.05)
+    assert json.loads(Path("sessions/s1.json").read_text(encoding="utf-8"))["telemetry"]["file"] == "telemetry/s1.json"
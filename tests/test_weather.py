@@ -0,0 +1,86 @@
+"""The Open-Meteo range prefetch in generate_list.py against a stub archive."""
+
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import generate_list
+
+KAUNAS = (54.9, 23.9)
+VILNIUS = (54.7, 25.3)
+
+
+def day_weather(day):
+    """Values the stub serves for one day; distinct for every date."""
+    d = date.fromisoformat(day)
+    return {"temp_max": d.day + 0.5, "temp_min": d.day - 0.5, "wind_kmh": d.month * 1.0,
+            "rain_mm": 0.0, "wmo_code": d.day % 4}
+
+
+def archive_handler(failing_latitudes=()):
+    def handler(path, query):
+        if float(query["latitude"]) in failing_latitudes:
+            return 503, b""
+        first, last = date.fromisoformat(query["start_date"]), date.fromisoformat(query["end_date"])
+        days = [(first + timedelta(n)).isoformat() for n in range((last - first).days + 1)]
+        weather = [day_weather(d) for d in days]
+        daily = {"time": days,
+                 "temperature_2m_max": [w["temp_max"] for w in weather],
+                 "temperature_2m_min": [w["temp_min"] for w in weather],
+                 "wind_speed_10m_max": [w["wind_kmh"] for w in weather],
+                 "precipitation_sum": [w["rain_mm"] for w in weather],
+                 "weather_code": [w["wmo_code"] for w in weather]}
+        return 200, json.dumps({"daily": daily}).encode()
+    return handler
+
+
+@pytest.fixture
+def archive(stub_server, monkeypatch, tmp_path):
+    def start(**kwargs):
+        server = stub_server(archive_handler(**kwargs))
+        monkeypatch.setattr(generate_list, "WEATHER_ARCHIVE_URL", f"{server.url}/v1/archive")
+        return server
+    monkeypatch.setattr(generate_list, "WEATHER_CACHE_FILE", tmp_path / "weather-cache.json")
+    generate_list.load_weather_cache()
+    return start
+
+
+def test_prefetch_makes_one_request_per_location_range(archive):
+    server = archive()
+    lookups = [(*KAUNAS, "2025-05-03"), (*KAUNAS, "2025-05-17"), (*KAUNAS, "2025-06-01"),
+               (*VILNIUS, "2025-07-09"), (*VILNIUS, "2025-07-09")]
+    generate_list.prefetch_weather(lookups)
+
+    ranges = sorted((q["latitude"], q["start_date"], q["end_date"]) for _, _, q in server.requests)
+    assert ranges == [("54.7", "2025-07-09", "2025-07-09"), ("54.9", "2025-05-03", "2025-06-01")]
+    for lat, lng, day in lookups:
+        assert generate_list.cached_fetch_weather(lat, lng, day) == day_weather(day)
+    assert len(server.requests) == 2
+
+
+def test_far_apart_dates_are_split_into_separate_ranges(archive):
+    server = archive()
+    generate_list.prefetch_weather([(*KAUNAS, "2023-04-01"), (*KAUNAS, "2025-04-01")])
+    assert sorted((q["start_date"], q["end_date"]) for _, _, q in server.requests) == [
+        ("2023-04-01", "2023-04-01"), ("2025-04-01", "2025-04-01")]
+
+
+def test_failed_range_is_remembered_until_retry_after(archive):
+    server = archive(failing_latitudes={VILNIUS[0]})
+    generate_list.prefetch_weather([(*KAUNAS, "2025-05-03"), (*VILNIUS, "2025-07-09"), (*VILNIUS, "2025-07-12")])
+    assert len(server.requests) == 2
+
+    for day in ("2025-07-09", "2025-07-12"):
+        entry = generate_list.WEATHER_CACHE[generate_list.weather_cache_key(*VILNIUS, day)]
+        assert entry["weather"] is None
+        assert datetime.fromisoformat(entry["retry_after"]) > datetime.now(timezone.utc)
+        assert generate_list.cached_fetch_weather(*VILNIUS, day) is None
+    assert generate_list.cached_fetch_weather(*KAUNAS, "2025-05-03") == day_weather("2025-05-03")
+    assert generate_list.WEATHER_STATS["failures"] == 2
+
+    # A later run inside the retry window doesn't ask again.
+    generate_list.WEATHER_PREFETCHED_KEYS.clear()
+    generate_list.prefetch_weather([(*VILNIUS, "2025-07-09"), (*VILNIUS, "2025-07-12")])
+    assert generate_list.cached_fetch_weather(*VILNIUS, "2025-07-09") is None
+    assert len(server.requests) == 2
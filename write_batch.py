@@ -0,0 +1,179 @@
+"""
+Shared write layer for the generator scripts (generate_list.py, check_videos.py).
+
+Updates are staged in a WriteBatch and written together by flush() at the end
+of a run. A file is only rewritten when its serialized bytes actually differ
+from what's on disk, and every write goes to a temp file in the same
+directory followed by an atomic rename, so a crash never leaves a truncated
+JSON file behind. JSON is serialized in the target file's existing layout
+(indent, separators, ASCII escaping, line endings, trailing newline), so a
+one-field change produces a one-line diff.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def detect_json_format(text: str) -> Dict[str, Any]:
+    """
+    Infer how an existing JSON file was serialized, as keyword arguments for
+    dump_json(). Files written by json.dump/JSON.stringify use one consistent
+    indent, so the first indented line is enough to tell.
+    """
+    newline = "\r\n" if "\r\n" in text else "\n"
+    m = re.search(r"\n([ \t]+)\S", text)
+    if m:
+        indent: Any = "\t" if m.group(1).startswith("\t") else len(m.group(1))
+        separators = (",", ": ")
+    else:
+        indent = None
+        separators = (", ", ": ") if re.search(r",\s", text) else (",", ":")
+    return {
+        "indent": indent,
+        "separators": separators,
+        "ensure_ascii": "\\u" in text and not any(ord(c) > 127 for c in text),
+        "newline": newline,
+        "trailing_newline": text.endswith(("\n", "\r\n")),
+    }
+
+
+def dump_json(data: Any, indent: Any = 2, separators: Optional[Tuple[str, str]] = None,
+              ensure_ascii: bool = False, newline: str = "\n",
+              trailing_newline: bool = False, sort_keys: bool = False) -> str:
+    """json.dumps with explicit control over line endings and the final newline."""
+    if separators is None:
+        separators = (",", ": ") if indent is not None else (", ", ": ")
+    text = json.dumps(data, indent=indent, separators=separators,
+                      ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+    if trailing_newline:
+        text += "\n"
+    if newline != "\n":
+        text = text.replace("\n", newline)
+    return text
+
+
+class WriteBatch:
+    """Collects file contents and writes the ones that changed in one flush."""
+
+    def __init__(self, memo: Optional[Dict[Path, Tuple[str, bytes]]] = None) -> None:
+        self.pending: Dict[Path, Optional[bytes]] = {}
+        # Optional cache shared by successive batches (generate_list.py --watch):
+        # each path's last encoded bytes, keyed by a hash of its data in
+        # compact form. json.dumps only uses its C encoder without indent, so
+        # checking the compact form is much cheaper than re-indenting.
+        self.memo = memo
+        self.written: list = []
+        self.unchanged: list = []
+        self.deleted: list = []
+
+    def stage_text(self, path: Path, text: str) -> None:
+        self.pending[Path(path)] = text.encode("utf-8")
+
+    def stage_bytes(self, path: Path, payload: bytes) -> None:
+        self.pending[Path(path)] = payload
+
+    def stage_json(self, path: Path, data: Any, *, preserve_format: bool = True,
+                   sort_keys: bool = False, **defaults: Any) -> None:
+        """
+        Stage `data` as JSON. If the file exists and preserve_format is set,
+        its current layout wins over `defaults` (dump_json keyword arguments,
+        used for new files). With a memo, an indented file whose data hasn't
+        changed reuses its previous bytes; compact files are encoded directly,
+        which costs no more than the check.
+        """
+        path = Path(path)
+        fmt = dict(defaults)
+        if preserve_format:
+            try:
+                fmt.update(detect_json_format(path.read_text(encoding="utf-8")))
+            except (OSError, UnicodeDecodeError):
+                pass
+        if self.memo is None or fmt.get("indent") is None:
+            self.stage_text(path, dump_json(data, sort_keys=sort_keys, **fmt))
+            return
+        compact = json.dumps(data, separators=(",", ":"), sort_keys=sort_keys)
+        key = hashlib.sha1(f"{sorted(fmt.items())!r}{compact}".encode("utf-8")).hexdigest()
+        cached = self.memo.get(path)
+        if cached is None or cached[0] != key:
+            cached = (key, dump_json(data, sort_keys=sort_keys, **fmt).encode("utf-8"))
+            self.memo[path] = cached
+        self.stage_bytes(path, cached[1])
+
+    def stage_encoded(self, path: Path, source: bytes, encode: Callable[[bytes], bytes]) -> None:
+        """Stage encode(source), e.g. a compressed sibling; with a memo, the
+        previous result is reused while `source` is unchanged."""
+        path = Path(path)
+        if self.memo is None:
+            self.stage_bytes(path, encode(source))
+            return
+        key = hashlib.sha1(source).hexdigest()
+        cached = self.memo.get(path)
+        if cached is None or cached[0] != key:
+            cached = (key, encode(source))
+            self.memo[path] = cached
+        self.stage_bytes(path, cached[1])
+
+    def staged(self, path: Path) -> bytes:
+        """The bytes currently staged for `path` (KeyError if none)."""
+        payload = self.pending[Path(path)]
+        if payload is None:
+            raise KeyError(path)
+        return payload
+
+    def stage_delete(self, path: Path) -> None:
+        """Remove `path` on flush (used for generated files that went stale)."""
+        self.pending[Path(path)] = None
+
+    def flush(self) -> Tuple[list, list]:
+        """
+        Write every staged file whose bytes differ from the disk copy and
+        remove the ones staged for deletion. Returns (written, unchanged) path
+        lists. A failed write raises OSError after the files before it have
+        been written.
+        """
+        for path, payload in self.pending.items():
+            if payload is None:
+                try:
+                    path.unlink()
+                    self.deleted.append(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                if path.read_bytes() == payload:
+                    self.unchanged.append(path)
+                    continue
+            except OSError:
+                pass
+            atomic_write_bytes(path, payload)
+            self.written.append(path)
+        self.pending.clear()
+        return self.written, self.unchanged
+
+
+def atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """Write via a temp file in the same directory + os.replace()."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise